@@ -0,0 +1,194 @@
+# coding=utf-8
+"""
+Throughput, latency and memory of ``WHMAPIClient`` against the local fake
+WHM server, fully offline:
+
+* single - a new connection per call, as before connection pooling.
+* pooled - sequential calls over a keep-alive connection.
+* concurrent - threads sharing one client, with a socket each or taking
+  turns on a few.
+* large - a listing of many accounts, decoded whole, streamed or paged.
+* retained - memory held by a listing kept as dicts or typed records.
+* replayed - sequential calls served from a recorded cassette.
+
+    python benchmarks/bench_client.py [--calls 2000] [--threads 16]
+                                      [--accounts 20000] [--latency 0]
+"""
+from __future__ import division, print_function
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_whm import FakeWHMProcess  # noqa: E402
+from cpanel.clients.results import AccountSummary  # noqa: E402
+from cpanel.clients.transport import (  # noqa: E402
+    RecordingTransport, ReplayTransport
+)
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+def report(name, elapsed, latencies, peak=None):
+    line = '{:<28} {:>9.0f} calls/s   p50 {:>7.2f}ms   p99 {:>7.2f}ms'.format(
+        name, len(latencies) / elapsed,
+        percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+    )
+    if peak is not None:
+        line += '   peak {:>7.1f}MiB'.format(peak / 1024 / 1024)
+    print(line)
+
+
+def timed_calls(func, calls):
+    latencies = []
+    for _ in range(calls):
+        start = default_timer()
+        func()
+        latencies.append(default_timer() - start)
+    return latencies
+
+
+def bench_sequential(server, name, calls, **pool_kwargs):
+    client = server.make_client(pool=server.make_pool(**pool_kwargs))
+    client.acctcounts('root')
+    start = default_timer()
+    latencies = timed_calls(lambda: client.acctcounts('root'), calls)
+    report(name, default_timer() - start, latencies)
+    client.close()
+
+
+def bench_replayed(server, calls):
+    cassette = tempfile.NamedTemporaryFile(suffix='.cassette', delete=False)
+    cassette.close()
+    try:
+        recorder = RecordingTransport(cassette.name)
+        server.make_client(transport=recorder).acctcounts('root')
+        recorder.close()
+
+        client = server.make_client(transport=ReplayTransport(cassette.name))
+        start = default_timer()
+        latencies = timed_calls(lambda: client.acctcounts('root'), calls)
+        report('replayed', default_timer() - start, latencies)
+        client.transport.close()
+    finally:
+        os.remove(cassette.name)
+
+
+def bench_concurrent(server, name, calls, threads, **pool_kwargs):
+    client = server.make_client(pool=server.make_pool(**pool_kwargs))
+    latencies = []
+    per_thread = calls // threads
+
+    def worker():
+        latencies.extend(
+            timed_calls(lambda: client.acctcounts('root'), per_thread)
+        )
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = default_timer()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    report(name, default_timer() - start, latencies)
+    print('{:<28} {:>9} connections opened'.format(
+        '', client.get_pool_stats()['created']
+    ))
+    client.close()
+
+
+def bench_large(server, name, fetch, calls=5):
+    latencies = []
+    peak = None
+    for _ in range(calls):
+        gc.collect()
+        if tracemalloc is not None:
+            tracemalloc.start()
+        start = default_timer()
+        count = fetch()
+        latencies.append(default_timer() - start)
+        if tracemalloc is not None:
+            peak = max(peak or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        assert count == server.accounts, count
+    report(name, sum(latencies), latencies, peak)
+
+
+def bench_retained(server, name, fetch):
+    if tracemalloc is None:
+        return
+    gc.collect()
+    tracemalloc.start()
+    accounts = fetch()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(accounts) == server.accounts, len(accounts)
+    print('{:<28} {:>9.0f} bytes/account'.format(
+        name, retained / len(accounts)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--accounts', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Server side latency per request, in seconds.')
+    args = parser.parse_args()
+
+    with FakeWHMProcess(latency=args.latency,
+                        accounts=args.accounts) as server:
+        bench_sequential(server, 'single', args.calls // 4, maxsize=0)
+        bench_sequential(server, 'pooled', args.calls)
+        bench_replayed(server, args.calls)
+        bench_concurrent(server, 'concurrent x{}'.format(args.threads),
+                         args.calls, args.threads, maxsize=args.threads)
+        bench_concurrent(server, 'concurrent x{} 4 sockets'.format(
+            args.threads
+        ), args.calls, args.threads, maxsize=4, max_connections=4)
+
+        client = server.make_client()
+        bench_large(
+            server, 'large {} buffered'.format(args.accounts),
+            lambda: len(client.listaccts()['data']['acct'])
+        )
+        bench_large(
+            server, 'large {} streamed'.format(args.accounts),
+            lambda: sum(1 for _ in client.stream('data.acct').listaccts())
+        )
+        for prefetch in (False, True):
+            bench_large(
+                server, 'large {} paged{}'.format(
+                    args.accounts, ' +prefetch' if prefetch else ''
+                ),
+                lambda: sum(1 for _ in client.iter_listaccts(
+                    page_size=1000, prefetch=prefetch
+                ))
+            )
+
+        bench_retained(
+            server, 'retained {} dicts'.format(args.accounts),
+            lambda: list(client.stream('data.acct').listaccts())
+        )
+        bench_retained(
+            server, 'retained {} records'.format(args.accounts),
+            lambda: [AccountSummary.from_dict(account) for account
+                     in client.stream('data.acct').listaccts()]
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# coding=utf-8
+"""
+Per-call cost of resolving the endpoint name of a ``WHMAPIClient`` method.
+
+Compares the old ``inspect.getouterframes`` based lookup against the
+endpoint bound once by the ``endpoint`` decorator, at a shallow and at a
+deep call stack. The network is stubbed out, only dispatch is measured.
+
+    python benchmarks/bench_endpoint_dispatch.py
+"""
+from __future__ import print_function
+import inspect
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from cpanel.clients.whm_api_client import WHMAPIClient  # noqa: E402
+
+
+class StubbedClient(WHMAPIClient):
+
+    def __init__(self):
+        pass
+
+    def _query(self, request_type, endpoint, data):
+        return endpoint
+
+
+class FrameInspectingClient(StubbedClient):
+    """
+    The dispatch ``WHMAPIClient`` used before endpoints were bound.
+    """
+
+    def _query_get(self, params):
+        endpoint = inspect.getouterframes(inspect.currentframe(), 2)[1][3]
+        return self._query(self.REQUEST_TYPE_GET, endpoint, params)
+
+    def accountsummary(self, user, domain):
+        return self._query_get({'user': user, 'domain': domain})
+
+
+def call_at_depth(depth, func):
+    if depth:
+        return call_at_depth(depth - 1, func)
+    return func()
+
+
+def bench(label, client, depth, number):
+    def call():
+        return client.accountsummary('user', 'example.com')
+
+    assert call_at_depth(depth, call) == 'accountsummary'
+    elapsed = min(timeit.repeat(
+        lambda: call_at_depth(depth, call), number=number, repeat=3
+    ))
+    print('{:<16} depth={:<4} {:>10.2f} us/call'.format(
+        label, depth, elapsed / number * 1e6
+    ))
+
+
+def main():
+    for depth in (0, 50):
+        bench('inspect', FrameInspectingClient(), depth, 200)
+        bench('bound endpoint', StubbedClient(), depth, 20000)
+
+
+if __name__ == '__main__':
+    main()
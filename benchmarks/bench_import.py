@@ -0,0 +1,131 @@
+# coding=utf-8
+"""
+Cold start of a one-shot script using ``WHMAPIClient``, each case timed in
+fresh interpreters, over the time of starting an empty one:
+
+* import - importing the client.
+* import async - importing the asyncio client as well.
+* one call - importing the client and making a call to the fake server.
+
+Also checks that modules only some scripts need (asyncio, the endpoint
+declarations, the batch, stream and typed proxies) aren't imported by
+importing the client, and only the declarations by making a call. Exits
+with status 1 when one is, or when the import takes longer than
+``--max-ms``, so it can guard against regressions. Python 3.5 and 3.6
+import asyncio along with the package, it isn't checked there.
+
+    python benchmarks/bench_import.py [--runs 20] [--max-ms 0]
+"""
+from __future__ import division, print_function
+import argparse
+import json
+import os
+import subprocess
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_whm import CERTIFICATE, FakeWHMProcess  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+DEFERRED = (
+    'asyncio',
+    'cpanel.clients.async_whm_api_client',
+    'cpanel.clients.batch',
+    'cpanel.clients.pagination',
+    'cpanel.clients.results',
+    'cpanel.clients.specs',
+    'cpanel.clients.streaming',
+)
+if (3, 5) <= sys.version_info < (3, 7):
+    # Without module __getattr__ the package imports the async client.
+    DEFERRED = tuple(name for name in DEFERRED
+                     if name not in ('asyncio',
+                                     'cpanel.clients.async_whm_api_client'))
+# Made by the call.
+CALL_DEFERRED = tuple(name for name in DEFERRED
+                      if name != 'cpanel.clients.specs')
+
+IMPORT = 'import cpanel.clients.whm_api_client'
+IMPORT_ASYNC = IMPORT + '\nimport cpanel.clients.async_whm_api_client'
+CALL = '''
+import functools, ssl
+from cpanel.clients.pool import ConnectionPool
+from cpanel.clients.whm_api_client import WHMAPIClient
+from cpanel.compat import HTTPSConnection
+context = ssl.create_default_context(cafile={cafile!r})
+pool = ConnectionPool('localhost', {port}, connection_class=functools.partial(
+    HTTPSConnection, context=context))
+client = WHMAPIClient('localhost', 'root', 'secret', port={port}, pool=pool)
+assert client.acctcounts('root')['metadata']['result']
+'''
+REPORT = '''
+import json, sys
+print(json.dumps(sorted(set(sys.modules) & set({deferred!r}))))
+'''
+
+
+def run(code):
+    """
+    :returns: The seconds the interpreter took and its output.
+    :rtype: tuple
+    """
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    start = default_timer()
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     env=environment)
+    return default_timer() - start, output
+
+
+def bench(name, code, runs, baseline=0.0):
+    """
+    :returns: The median milliseconds over the baseline.
+    :rtype: float
+    """
+    samples = sorted(run(code)[0] for _ in range(runs))
+    median = (samples[runs // 2] - baseline) * 1000
+    print('{:<24} {:>8.1f}ms'.format(name, median))
+    return median
+
+
+def check_deferred(name, code, deferred):
+    """
+    :returns: Whether none of the deferred modules were imported.
+    :rtype: bool
+    """
+    imported = json.loads(run(code + REPORT.format(deferred=deferred))[1])
+    if imported:
+        print('{} imported {}'.format(name, ', '.join(imported)))
+    return not imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=0,
+                        help='Fail when the import takes longer.')
+    args = parser.parse_args()
+
+    # Compiles the modules once so no run pays for it.
+    run(IMPORT_ASYNC)
+    samples = sorted(run('pass')[0] for _ in range(args.runs))
+    baseline = samples[args.runs // 2]
+    print('{:<24} {:>8.1f}ms'.format('interpreter', baseline * 1000))
+
+    imported = bench('import', IMPORT, args.runs, baseline)
+    bench('import async', IMPORT_ASYNC, args.runs, baseline)
+    with FakeWHMProcess(accounts=10) as server:
+        call = CALL.format(cafile=CERTIFICATE, port=server.port)
+        bench('one call', call, args.runs, baseline)
+        ok = check_deferred('one call', call, CALL_DEFERRED)
+    ok = check_deferred('import', IMPORT, DEFERRED) and ok
+
+    if args.max_ms and imported > args.max_ms:
+        print('import exceeds {}ms'.format(args.max_ms))
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# coding=utf-8
+"""
+Per-call cost of preparing a ``WHMAPIClient`` request: encoding the
+parameters and building the URL, body and headers, with no network.
+
+Compares encoding every call from scratch, as before memoization, against
+``_build_request`` for a small ``GET`` and the big default ``addpkg``
+parameter list sent by ``POST``.
+
+    python benchmarks/bench_request_building.py
+"""
+from __future__ import print_function
+from base64 import b64encode
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from cpanel.clients.whm_api_client import WHMAPIClient  # noqa: E402
+from cpanel.compat import urllib  # noqa: E402
+
+
+class ParamsClient(WHMAPIClient):
+
+    def __init__(self):
+        super(ParamsClient, self).__init__('localhost', 'root', 'secret')
+
+    def _query(self, request_type, endpoint, data):
+        return request_type, endpoint, data
+
+
+class UnmemoizedClient(ParamsClient):
+    """
+    Request building before the encoded parameters and headers were
+    memoized.
+    """
+
+    def _build_request(self, request_type, endpoint, data):
+        credentials = '{}:{}'.format(self.get_username(),
+                                     self.get_password())
+        headers = {
+            'Authorization': 'Basic ' + b64encode(
+                credentials.encode('utf-8')
+            ).decode('ascii')
+        }
+        encoded = urllib.urlencode([
+            (k, (1 if v else 0) if isinstance(v, bool) else v)
+            for k, v in data.items()
+        ])
+        url = '/json-api/{}'.format(endpoint)
+        if request_type == self.REQUEST_TYPE_GET:
+            return '{}?{}'.format(url, encoded), None, headers
+        payload = encoded.encode('ascii')
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        headers['Content-Length'] = str(len(payload))
+        return url, payload, headers
+
+
+def bench(label, client, call, number=20000):
+    request = call(ParamsClient())
+    assert client._build_request(*request) == \
+        UnmemoizedClient()._build_request(*request)
+
+    elapsed = min(timeit.repeat(
+        lambda: client._build_request(*request), number=number, repeat=3
+    ))
+    print('{:<28} {:>8.2f} us/request'.format(
+        label, elapsed / number * 1e6
+    ))
+
+
+def main():
+    calls = (
+        ('accountsummary', lambda c: c.accountsummary('user',
+                                                      'example.com')),
+        ('addpkg', lambda c: c.addpkg('basic')),
+    )
+    for name, call in calls:
+        bench('{} unmemoized'.format(name), UnmemoizedClient(), call)
+        bench('{} memoized'.format(name), ParamsClient(), call)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""
+Throughput of a fleet-wide job run by ``ShardedExecutor`` with one worker
+process against several, with a fake WHM server per host.
+
+Each task lists a host's accounts and counts the suspended ones in the
+worker, so the job is bound by decoding responses rather than by the
+network. Only scales with the cores available to the workers and the
+fake servers.
+
+    python benchmarks/bench_sharded.py [--hosts 4] [--tasks 50]
+                                       [--accounts 2000] [--processes 4]
+"""
+from __future__ import division, print_function
+import argparse
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_whm import FakeWHMProcess, make_client  # noqa: E402
+from cpanel.clients.sharding import ShardedExecutor  # noqa: E402
+
+
+def fake_client(hostname, port):
+    return make_client(port)
+
+
+def count_suspended(client):
+    return sum(1 for account in client.listaccts()['data']['acct']
+               if account['suspended'])
+
+
+def bench(hosts, tasks, processes):
+    executor = ShardedExecutor(hosts, processes=processes,
+                               client_class=fake_client)
+    start = default_timer()
+    failed = sum(1 for res in executor.run(
+        (host['hostname'], count_suspended, ())
+        for _ in range(tasks) for host in hosts
+    ) if res.error)
+    elapsed = default_timer() - start
+    print('{:<24} {:>8.0f} tasks/s {:>6} failed'.format(
+        '{} process{}'.format(processes, 'es' if processes > 1 else ''),
+        tasks * len(hosts) / elapsed, failed
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--hosts', type=int, default=4)
+    parser.add_argument('--tasks', type=int, default=50,
+                        help='Tasks per host.')
+    parser.add_argument('--accounts', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    servers = [FakeWHMProcess(accounts=args.accounts).start()
+               for _ in range(args.hosts)]
+    try:
+        hosts = [{'hostname': 'web{}'.format(index), 'port': server.port}
+                 for index, server in enumerate(servers)]
+        bench(hosts, args.tasks, 1)
+        bench(hosts, args.tasks, args.processes)
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+# coding=utf-8
+"""
+A local stand-in for a WHM server's JSON API.
+
+Speaks ``/json-api/<endpoint>`` over HTTPS with the self-signed
+certificate in ``fake_whm.pem``, with configurable latency, response sizes
+and injected errors. Logging in through ``/login/`` opens a session for
+``/cpsess<token>/json-api/<endpoint>``::
+
+    with FakeWHMServer(latency=0.005, accounts=10000) as server:
+        client = server.make_client()
+        client.applist()
+
+``FakeWHMProcess`` runs the same server in a child process.
+"""
+import functools
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import socket
+import ssl
+import sys
+import threading
+import time
+
+if sys.version_info[0] == 2:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qsl, urlparse
+else:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from cpanel.clients.pool import ConnectionPool  # noqa: E402
+from cpanel.clients.whm_api_client import WHMAPIClient  # noqa: E402
+from cpanel.compat import HTTPSConnection  # noqa: E402
+
+CERTIFICATE = os.path.join(os.path.dirname(__file__), 'fake_whm.pem')
+# Bytes per chunk of chunked responses.
+CHUNK_SIZE = 4096
+
+
+def make_account(index):
+    """
+    :type index: int
+
+    :rtype: dict
+    """
+    user = 'user{:06d}'.format(index)
+    return {
+        'user': user,
+        'domain': '{}.example.com'.format(user),
+        'email': '{}@example.com'.format(user),
+        'ip': '10.0.{}.{}'.format(index // 256 % 256, index % 256),
+        'owner': 'root',
+        'plan': 'default',
+        'theme': 'paper_lantern',
+        'disklimit': 'unlimited',
+        'diskused': '{}M'.format(index % 1000),
+        'startdate': '15 Jun 13 10:00',
+        'unix_startdate': 1434189600 + index,
+        'suspended': 0,
+        'suspendreason': 'not suspended',
+        'maxaddons': 'unlimited',
+        'maxparked': 'unlimited',
+        'maxpop': 'unlimited',
+        'maxsql': 'unlimited',
+    }
+
+
+class FakeWHMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        url = urlparse(self.path)
+        query = parse_qsl(url.query, keep_blank_values=True)
+        form = []
+        gzipped = self.headers.get('Content-Encoding') == 'gzip'
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+            if gzipped:
+                body = gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+            form = parse_qsl(body.decode('ascii'), keep_blank_values=True)
+        self.server.received[url.path.rsplit('/', 1)[-1]] = {
+            'query': query, 'form': form, 'gzipped': gzipped,
+        }
+        return url.path, query + form
+
+    def _authenticated(self, path):
+        session = re.match(r'/(cpsess\d+)/', path)
+        if session is None:
+            return bool(self.headers.get('Authorization'))
+        cookie = re.search(r'whostmgrsession=(\w+)',
+                           self.headers.get('Cookie') or '')
+        return (cookie is not None
+                and self.server.is_session(session.group(1),
+                                           cookie.group(1)))
+
+    def _login(self, params):
+        args = dict(params)
+        if not args.get('user') or not args.get('pass'):
+            return self._send(401, {'status': 0, 'message': 'Denied.'})
+        token, cookie = self.server.open_session()
+        self._send(200, {
+            'status': 1,
+            'security_token': '/' + token,
+            'redirect': '/{}/'.format(token),
+        }, {'Set-Cookie': 'whostmgrsession={}; path=/; secure'.format(
+            cookie
+        )})
+
+    def _respond(self):
+        server = self.server
+        path, params = self._params()
+        endpoint = path.rsplit('/', 1)[-1]
+        server.record(endpoint or 'login')
+        if path.startswith('/login'):
+            return self._login(params)
+
+        latency = server.latency
+        if callable(latency):
+            latency = latency(endpoint)
+        if latency:
+            time.sleep(latency)
+
+        if server.drop_rate and random.random() < server.drop_rate:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(503, {'error': 'Injected failure.'})
+
+        if path.startswith('/cpsess') and not self._authenticated(path):
+            return self._send(401, {'error': 'Token denied.'})
+        if not self._authenticated(path):
+            return self._send(403, {'error': 'Access denied.'})
+        if endpoint in server.denied:
+            return self._send(403, {'metadata': {
+                'version': 1, 'result': 0, 'command': endpoint,
+                'reason': 'Permission denied.',
+            }})
+        self._send(200, server.build_response(endpoint, params))
+
+    def _handle(self):
+        self._respond()
+        self.served = getattr(self, 'served', 0) + 1
+        keep_alive_max = self.server.keep_alive_max
+        if keep_alive_max and self.served >= keep_alive_max:
+            # Closed without telling the client, like an idle timeout.
+            self.close_connection = True
+
+    do_GET = do_POST = _handle
+
+    def _send(self, status, document, headers=None):
+        body = json.dumps(document).encode('utf-8')
+        gzipped = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        if gzipped:
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+                f.write(body)
+            body = buf.getvalue()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        framing = self.server.framing
+        if framing == 'length':
+            self.send_header('Content-Length', str(len(body)))
+        elif framing == 'chunked':
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if framing != 'chunked':
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start:start + CHUNK_SIZE]
+            self.wfile.write('{:x}\r\n'.format(len(chunk)).encode('ascii') +
+                             chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class FakeWHMServer(ThreadingMixIn, HTTPServer):
+    """
+    :param latency: Seconds every response is delayed by, or a callable
+    taking the endpoint name and returning them.
+    :param accounts: The number of accounts listed by ``listaccts``, which
+    supports its pagination and reverse sorting.
+    :param error_rate: Share of requests answered with a 503.
+    :param drop_rate: Share of requests whose connection is dropped
+    without a response.
+    :param session_ttl: Seconds a login session lasts, requests of an
+    expired one are answered with a 401.
+    :param keep_alive_max: Requests served per connection before it gets
+    closed without warning the client.
+    :param denied: Endpoints answered with a 403 permission denial, as
+    for a reseller lacking the privilege.
+    :param framing: How response bodies end: ``'length'`` by their
+    Content-Length, ``'chunked'`` by chunked transfer encoding or
+    ``'close'`` by closing the connection.
+
+    Accounts made by ``createacct`` are kept in ``created``, creating one
+    again fails and ``accountsummary`` reports them. ``received`` keeps
+    the URL and body parameters of each endpoint's last request, and
+    whether its body came gzipped.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, port=0, latency=0, accounts=100, error_rate=0,
+                 drop_rate=0, session_ttl=3600, keep_alive_max=None,
+                 denied=(), framing='length'):
+        HTTPServer.__init__(self, ('127.0.0.1', port), FakeWHMHandler)
+        context = ssl.SSLContext(
+            getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23)
+        )
+        context.load_cert_chain(CERTIFICATE)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+        self.latency = latency
+        self.accounts = accounts
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.session_ttl = session_ttl
+        self.keep_alive_max = keep_alive_max
+        self.denied = frozenset(denied)
+        self.framing = framing
+        self.sessions = {}
+        self.requests = {}
+        self.created = {}
+        self.received = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up, e.g. after a timeout, are part of the tests.
+        if not isinstance(sys.exc_info()[1], socket.error):
+            HTTPServer.handle_error(self, request, client_address)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def open_session(self):
+        """
+        :returns: The security token and cookie of a new session.
+        :rtype: tuple
+        """
+        token = 'cpsess{:010d}'.format(random.randint(0, 10 ** 10 - 1))
+        cookie = '{:032x}'.format(random.getrandbits(128))
+        with self._lock:
+            self.sessions[token] = (cookie, time.time() + self.session_ttl)
+        return token, cookie
+
+    def is_session(self, token, cookie):
+        """
+        :rtype: bool
+        """
+        with self._lock:
+            session = self.sessions.get(token)
+        return (session is not None and session[0] == cookie
+                and session[1] > time.time())
+
+    def build_response(self, endpoint, params):
+        """
+        :type endpoint: str
+        :type params: list
+
+        :rtype: dict
+        """
+        response = {
+            'metadata': {
+                'version': 1,
+                'reason': 'OK',
+                'result': 1,
+                'command': endpoint,
+            },
+        }
+        args = dict(params)
+        if endpoint == 'listaccts':
+            indexes = range(self.accounts)
+            if args.get('api.sort.enable') == '1':
+                if args.get('api.sort.a.reverse') == '1':
+                    indexes = reversed(indexes)
+            if args.get('api.chunk.enable') == '1':
+                start = int(args.get('api.chunk.start', 1)) - 1
+                size = int(args.get('api.chunk.size', 20))
+                indexes = list(indexes)[start:start + size]
+                response['metadata']['chunk'] = {
+                    'start': start + 1, 'size': size,
+                    'records': self.accounts,
+                }
+            response['data'] = {'acct': [make_account(i) for i in indexes]}
+        elif endpoint == 'createacct':
+            user = args.get('username')
+            with self._lock:
+                exists = user in self.created
+                if not exists:
+                    account = dict(make_account(0), user=user,
+                                   domain=args.get('domain'))
+                    if args.get('plan'):
+                        account['plan'] = args['plan']
+                    if args.get('contactemail'):
+                        account['email'] = args['contactemail']
+                    self.created[user] = account
+            if exists:
+                response['metadata'].update(result=0, reason=(
+                    'Sorry, a user with that name already exists.'
+                ))
+        elif endpoint == 'accountsummary':
+            with self._lock:
+                account = self.created.get(args.get('user'))
+            response['data'] = {'acct': [account or make_account(0)]}
+        elif endpoint == 'acctcounts':
+            response['data'] = {'reseller': {
+                'account': self.accounts, 'active': self.accounts,
+                'suspended': 0, 'limit': None,
+                'user': args.get('user') or 'root',
+            }}
+        elif endpoint == 'applist':
+            response['data'] = {'app': ['accountsummary', 'acctcounts',
+                                        'applist', 'createacct', 'listaccts',
+                                        'limitbw', 'passwd']}
+        elif endpoint == 'batch':
+            response['data'] = {'payload': [
+                self.build_response(command.split('?', 1)[0], [])
+                for name, command in params if name == 'command'
+            ]}
+        return response
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def make_pool(self, **kwargs):
+        return make_pool(self.port, **kwargs)
+
+    def make_client(self, **kwargs):
+        return make_client(self.port, **kwargs)
+
+
+def _serve(ports, kwargs):
+    server = FakeWHMServer(**kwargs)
+    ports.put(server.port)
+    server.serve_forever()
+
+
+class FakeWHMProcess(object):
+    """
+    Runs a ``FakeWHMServer`` in a child process, so the server neither
+    competes with the client for the GIL nor shows up in its memory use.
+    Takes the same arguments as ``FakeWHMServer``.
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.accounts = kwargs.get('accounts', 100)
+        self.port = None
+        self._process = None
+
+    def start(self):
+        ports = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(ports, self.kwargs)
+        )
+        self._process.daemon = True
+        self._process.start()
+        self.port = ports.get(timeout=10)
+        return self
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def make_pool(self, **kwargs):
+        return make_pool(self.port, **kwargs)
+
+    def make_client(self, **kwargs):
+        return make_client(self.port, **kwargs)
+
+
+def make_pool(port, **kwargs):
+    """
+    A connection pool trusting the fake server's certificate.
+
+    :type port: int
+
+    :rtype: cpanel.clients.pool.ConnectionPool
+    """
+    context = ssl.create_default_context(cafile=CERTIFICATE)
+    kwargs.setdefault('connection_class', functools.partial(
+        HTTPSConnection, context=context
+    ))
+    return ConnectionPool('localhost', port, **kwargs)
+
+
+def make_client(port, client_class=WHMAPIClient, pool=None, **kwargs):
+    """
+    A client of the fake server.
+
+    :type port: int
+
+    :rtype: cpanel.clients.whm_api_client.WHMAPIClient
+    """
+    return client_class(
+        'localhost', 'root', 'secret', port=port,
+        pool=pool or make_pool(port), **kwargs
+    )
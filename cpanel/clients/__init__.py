@@ -1 +1,16 @@
+import sys
+
 from cpanel.clients.whm_api_client import WHMAPIClient
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # Importing asyncio takes longer than all of the sync client, most
+        # scripts never need it.
+        if name == 'AsyncWHMAPIClient':
+            from cpanel.clients.async_whm_api_client import AsyncWHMAPIClient
+            return AsyncWHMAPIClient
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+        )
+elif sys.version_info >= (3, 5):
+    from cpanel.clients.async_whm_api_client import AsyncWHMAPIClient
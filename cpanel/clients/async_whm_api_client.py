@@ -0,0 +1,394 @@
+# coding=utf-8
+import asyncio
+import json
+import ssl
+import time
+import zlib
+
+from cpanel.clients.cache import ResponseCache
+from cpanel.clients.endpoints import get_endpoint
+from cpanel.clients.whm_api_client import WHMAPIClient
+
+
+class AsyncConnectionPool(object):
+    """
+    Keep-alive pool of asyncio stream connections to a single WHM host.
+
+    Besides reusing idle connections, the pool caps how many requests may
+    be in flight against the host at once.
+    """
+    hostname = None
+    port = None
+    maxsize = None
+    idle_timeout = None
+    max_concurrency = None
+    ssl_context = None
+
+    def __init__(self, hostname, port=2087, maxsize=10, idle_timeout=60.0,
+                 max_concurrency=100, ssl_context=None):
+        """
+        :type hostname: str
+        :type port: int
+        :param maxsize: The maximum number of idle connections kept open.
+        :type maxsize: int
+        :param idle_timeout: Seconds an idle connection may sit in the pool
+        before it gets closed instead of reused.
+        :type idle_timeout: float
+        :param max_concurrency: The maximum number of requests in flight
+        against the host.
+        :type max_concurrency: int
+        :param ssl_context: Defaults to ``ssl.create_default_context()``.
+        :type ssl_context: ssl.SSLContext
+        """
+        self.hostname = hostname
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+        self.ssl_context = ssl_context or ssl.create_default_context()
+
+        self._idle = []
+        self._semaphore = None
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'in_use': 0,
+        }
+
+    def get_semaphore(self):
+        """
+        The semaphore is created lazily so it binds to the running loop.
+
+        :rtype: asyncio.Semaphore
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def get_connection(self):
+        """
+        Checks a connection out of the pool, opening a new one when there
+        is no healthy idle connection available.
+
+        :returns: The ``(reader, writer)`` pair and whether it was reused.
+        :rtype: tuple
+        """
+        now = time.time()
+        self._stats['in_use'] += 1
+        while self._idle:
+            reader, writer, released_at = self._idle.pop()
+            if (now - released_at > self.idle_timeout
+                    or reader.at_eof() or writer.transport.is_closing()):
+                self._stats['discarded'] += 1
+                writer.close()
+                continue
+            self._stats['reused'] += 1
+            return (reader, writer), True
+
+        self._stats['created'] += 1
+        try:
+            connection = await asyncio.open_connection(
+                self.hostname, self.port, ssl=self.ssl_context
+            )
+        except BaseException:
+            self._stats['in_use'] -= 1
+            raise
+        return connection, False
+
+    def put_connection(self, connection):
+        """
+        :type connection: tuple
+        """
+        self._stats['in_use'] -= 1
+        reader, writer = connection
+        if len(self._idle) < self.maxsize:
+            self._idle.append((reader, writer, time.time()))
+            return
+        self._stats['discarded'] += 1
+        writer.close()
+
+    def discard_connection(self, connection):
+        """
+        :type connection: tuple
+        """
+        self._stats['in_use'] -= 1
+        self._stats['discarded'] += 1
+        connection[1].close()
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        idle, self._idle = self._idle, []
+        for _, writer, _ in idle:
+            writer.close()
+
+    def get_stats(self):
+        """
+        :returns: Counters of ``created``, ``reused``, ``discarded``,
+        ``in_use`` and ``idle`` connections.
+        :rtype: dict
+        """
+        stats = dict(self._stats)
+        stats['idle'] = len(self._idle)
+        return stats
+
+
+def _unsupported(name):
+    """
+    Makes a method refusing to run on the asyncio client.
+
+    :type name: str
+
+    :rtype: function
+    """
+
+    def method(self, *args, **kwargs):
+        raise TypeError('{}() is not supported by {}, use WHMAPIClient '
+                        'instead.'.format(name, type(self).__name__))
+
+    method.__name__ = name
+    return method
+
+
+class AsyncWHMAPIClient(WHMAPIClient):
+    """
+    asyncio flavour of ``WHMAPIClient``.
+
+    Exposes the very same API methods, each of them returns a coroutine::
+
+        client = AsyncWHMAPIClient('host', 'root', 'secret')
+        summary = await client.accountsummary('user', 'example.com')
+
+    Supports connection pooling, a concurrency limit per host, per call
+    timeouts, compression, coalescing of identical reads and API tokens.
+    The response cache, governor, retry policy, instruments, login
+    sessions and transports of ``WHMAPIClient`` are not supported, nor are
+    ``batch()``, ``stream()``, ``typed()`` and ``iter_listaccts()``, which
+    raise ``TypeError``.
+    """
+    timeout = None
+
+    batch = _unsupported('batch')
+    stream = _unsupported('stream')
+    typed = _unsupported('typed')
+    iter_listaccts = _unsupported('iter_listaccts')
+
+    def __init__(self, hostname, username, password, port=2087, pool=None,
+                 pool_maxsize=10, pool_idle_timeout=60.0,
+                 max_concurrency=100, timeout=None, ssl_context=None,
+                 compress=False, coalesce=False, api_token=None):
+        """
+        :type hostname: str
+        :type username: str
+        :type password: str
+        :type port: int
+        :param pool: A connection pool to share with other clients talking
+        to the same host. A private one is created when omitted.
+        :type pool: AsyncConnectionPool
+        :param pool_maxsize: The maximum number of idle keep-alive
+        connections of the private pool.
+        :type pool_maxsize: int
+        :param pool_idle_timeout: Seconds before an idle connection of the
+        private pool gets closed.
+        :type pool_idle_timeout: float
+        :param max_concurrency: The maximum number of requests in flight
+        against the host through the private pool.
+        :type max_concurrency: int
+        :param timeout: Seconds each call may take, ``None`` waits forever.
+        :type timeout: float
+        :param ssl_context: SSL context of the private pool.
+        :type ssl_context: ssl.SSLContext
+        :param compress: Whether to gzip big request bodies and accept
+        gzipped responses.
+        :type compress: bool
+        :param coalesce: Whether concurrent identical calls to read-only
+        endpoints share a single request.
+        :type coalesce: bool
+        :param api_token: A WHM API token of ``username`` to authenticate
+        with instead of the password.
+        :type api_token: str
+        """
+        if pool is None:
+            pool = AsyncConnectionPool(
+                hostname, port, maxsize=pool_maxsize,
+                idle_timeout=pool_idle_timeout,
+                max_concurrency=max_concurrency, ssl_context=ssl_context
+            )
+        super(AsyncWHMAPIClient, self).__init__(
+            hostname, username, password, port=port, pool=pool,
+            compress=compress, api_token=api_token
+        )
+        self.timeout = timeout
+        self._flights = {} if coalesce else None
+
+    def get_timeout(self):
+        """
+        :rtype: float
+        """
+        return self.timeout
+
+    def _build_message(self, request_type, url, payload, headers):
+        """
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+
+        :rtype: bytes
+        """
+        lines = [
+            '{} {} HTTP/1.1'.format(request_type, url),
+            'Host: {}:{}'.format(self.get_hostname(), self.get_port()),
+        ]
+        if payload is None:
+            lines.append('Content-Length: 0')
+        for name, value in headers.items():
+            lines.append('{}: {}'.format(name, value))
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head + payload if payload is not None else head
+
+    @staticmethod
+    async def _read_response(reader, status_line):
+        """
+        Reads the rest of an HTTP/1.1 response.
+
+        :type reader: asyncio.StreamReader
+        :param status_line: The response's first line, already read.
+        :type status_line: bytes
+
+        :returns: The decoded body and whether the server will close the
+        connection.
+        :rtype: tuple
+        """
+        version = status_line.split(b' ', 1)[0]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection_header = headers.get('connection', '').lower()
+        will_close = (connection_header == 'close'
+                      or (version == b'HTTP/1.0'
+                          and connection_header != 'keep-alive'))
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b';', 1)[0].strip(), 16)
+                if not size:
+                    # Skip the trailer section.
+                    while (await reader.readline()) not in (b'\r\n', b'\n',
+                                                            b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            will_close = True
+
+        if headers.get('content-encoding') == 'gzip':
+            body = zlib.decompress(body, WHMAPIClient.GZIP_WBITS)
+        return body, will_close
+
+    async def _request(self, request_type, url, payload=None, headers=None):
+        """
+        Sends a request over a pooled connection and reads the whole
+        response body.
+
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+
+        :rtype: bytes
+        """
+        request = self._build_message(
+            request_type, url, payload, headers or self.get_auth_header()
+        )
+        async with self.pool.get_semaphore():
+            while True:
+                connection, reused = await self.pool.get_connection()
+                reader, writer = connection
+                sent = False
+                try:
+                    writer.write(request)
+                    await writer.drain()
+                    sent = True
+                    status_line = await reader.readline()
+                except BaseException as e:
+                    self.pool.discard_connection(connection)
+                    # As with ``_is_stale``, a stale keep-alive connection
+                    # broke while sending. Once the request was sent, a
+                    # reset may come from a server that processed it.
+                    if (reused and not sent
+                            and isinstance(e, (BrokenPipeError,
+                                               ConnectionResetError))):
+                        continue
+                    raise
+                if not status_line:
+                    self.pool.discard_connection(connection)
+                    # Closed without a single byte of response, the server
+                    # dropped the idle connection before reading it.
+                    if reused:
+                        continue
+                    raise ConnectionResetError(
+                        'Connection closed by the server.'
+                    )
+
+                try:
+                    body, will_close = await self._read_response(
+                        reader, status_line
+                    )
+                except BaseException:
+                    self.pool.discard_connection(connection)
+                    raise
+
+                if will_close:
+                    self.pool.discard_connection(connection)
+                else:
+                    self.pool.put_connection(connection)
+                return body
+
+    async def _query(self, request_type, endpoint, data):
+        """
+        Queries specified WHM Server's JSON API.
+
+        :type request_type: str
+        :type endpoint: str
+        :type data: dict
+
+        :rtype: dict
+        """
+        url, payload, headers = self._build_request(
+            request_type, endpoint, data
+        )
+
+        def fetch():
+            return asyncio.wait_for(
+                self._request(request_type, url, payload, headers),
+                self.get_timeout()
+            )
+
+        spec = get_endpoint(endpoint)
+        if (self._flights is None or spec is None
+                or not spec.is_cacheable(data)):
+            return json.loads(await fetch())
+
+        key = ResponseCache.make_key(endpoint, data)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = asyncio.ensure_future(fetch())
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        # Shielded so a cancelled caller doesn't cancel the others.
+        return json.loads(await asyncio.shield(flight))
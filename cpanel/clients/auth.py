@@ -0,0 +1,165 @@
+# coding=utf-8
+import json
+import re
+import threading
+from timeit import default_timer
+
+from cpanel.clients.encoding import encode_params
+
+
+class LoginError(Exception):
+    """
+    WHM refused to open a session.
+    """
+
+
+class SessionExpiredError(Exception):
+    """
+    WHM rejected the session of a request, it gets renewed and the request
+    sent again. ``body`` holds the rejection's response body.
+    """
+    url = None
+    body = None
+
+    def __init__(self, status, url, body=None):
+        super(SessionExpiredError, self).__init__(
+            'Session rejected with status {}.'.format(status)
+        )
+        self.url = url
+        self.body = body
+
+
+class WHMSession(object):
+    """
+    A WHM login session shared by every request of a client.
+
+    Logging in once trades the password check cpsrvd does on every Basic
+    authenticated request for a ``cpsess`` security token, prefixed to
+    the request paths, and a session cookie. The session logs in when the
+    client builds its first request and logs in again when WHM rejects
+    it, e.g. once it expired.
+
+    WHM rejects an expired session with a 401, or a 403 saying the token
+    is no longer valid. Other 403s deny the user permission and are
+    returned as they are, as is a rejection of a session opened less than
+    ``min_age`` seconds earlier, which logging in again would not fix.
+    """
+    LOGIN_URL = '/login/?login_only=1'
+    COOKIE_NAME = 'whostmgrsession'
+    EXPIRED_STATUS = 401
+    # Tells a 403 for the session from one for the user's privileges.
+    EXPIRED_PATTERN = re.compile(
+        br'(?i)\b(?:token|session)\b[^.]{0,40}?\b(?:denied|expired|invalid)'
+    )
+
+    client = None
+    security_token = None
+    min_age = 1.0
+
+    def __init__(self, client):
+        """
+        :param client: The client whose credentials open the session and
+        whose requests use it.
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        """
+        self.client = client
+        self._lock = threading.Lock()
+        self._logged_in_at = None
+        self._cookie_pattern = re.compile(
+            r'{}=([^;,\s]+)'.format(re.escape(self.COOKIE_NAME))
+        )
+
+    def get_security_token(self):
+        """
+        :returns: The ``/cpsess...`` token, ``None`` before logging in.
+        :rtype: str
+        """
+        return self.security_token
+
+    def login(self):
+        """
+        Opens a new session and hands it to the client.
+
+        :raises LoginError: when WHM refuses the credentials.
+        """
+        client = self.client
+        payload = encode_params({
+            'user': client.get_username(),
+            'pass': client.get_password(),
+        }).encode('ascii')
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Content-Length': str(len(payload)),
+        }
+        connection, response = client._open(
+            client.REQUEST_TYPE_POST, self.LOGIN_URL, payload, headers
+        )
+        complete = False
+        try:
+            body = response.read()
+            complete = True
+            cookies = response.getheader('Set-Cookie') or ''
+        finally:
+            client._release(connection, response, complete)
+
+        try:
+            document = json.loads(body)
+        except ValueError:
+            document = {}
+        cookie = self._cookie_pattern.search(cookies)
+        token = document.get('security_token')
+        if response.status != 200 or not token or cookie is None:
+            raise LoginError('Login as {} failed with status {}: {}'.format(
+                client.get_username(), response.status,
+                document.get('message') or document.get('reason')
+            ))
+
+        self.security_token = token.rstrip('/')
+        self._logged_in_at = default_timer()
+        client.set_session_credentials(self.security_token, {
+            'Cookie': '{}={}'.format(self.COOKIE_NAME, cookie.group(1))
+        })
+
+    def is_expired(self, status, body):
+        """
+        Whether a response rejects the session rather than the request.
+
+        :type status: int
+        :type body: bytes
+
+        :rtype: bool
+        """
+        if status == self.EXPIRED_STATUS:
+            return True
+        return status == 403 and bool(self.EXPIRED_PATTERN.search(body))
+
+    def ensure(self):
+        """
+        Logs in unless a session is open already.
+        """
+        if self.security_token is not None:
+            return
+        with self._lock:
+            if self.security_token is None:
+                self.login()
+
+    def renew(self, url):
+        """
+        Logs in again after a request was rejected. Concurrent requests
+        rejected for the same session only log in once.
+
+        :param url: The URL of the rejected request.
+        :type url: str
+
+        :returns: Whether the request may be sent again, ``False`` when
+        the session it used was opened less than ``min_age`` seconds ago.
+        :rtype: bool
+        """
+        with self._lock:
+            if self.security_token is None:
+                self.login()
+            elif url.startswith(self.security_token + '/'):
+                if default_timer() - self._logged_in_at < self.min_age:
+                    return False
+                self.login()
+            return True
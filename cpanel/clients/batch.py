@@ -0,0 +1,119 @@
+# coding=utf-8
+from cpanel.clients.endpoints import get_endpoint, get_proxy_method
+
+
+class BatchCall(object):
+    """
+    A call queued in a ``WHMBatch``, its ``result`` is filled in once the
+    batch has been sent.
+    """
+    endpoint = None
+    params = None
+    result = None
+
+    def __init__(self, endpoint, params):
+        """
+        :type endpoint: str
+        :type params: dict
+        """
+        self.endpoint = endpoint
+        self.params = params
+
+    def __repr__(self):
+        return '<BatchCall {}>'.format(self.endpoint)
+
+
+class WHMBatch(object):
+    """
+    Collects API calls and sends them through WHM API 1's ``batch``
+    function, many commands per HTTP round-trip.
+
+    Any API method of the client can be called on the batch with its usual
+    signature, it returns a ``BatchCall`` instead of the response.
+    """
+    BATCH_ENDPOINT = 'batch'
+
+    client = None
+    chunk_size = None
+    calls = None
+
+    def __init__(self, client, chunk_size=50):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        :param chunk_size: The number of commands per HTTP request.
+        :type chunk_size: int
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1.')
+        self.client = client
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    def __getattr__(self, name):
+        return get_proxy_method(self, type(self.client), name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self):
+        return len(self.calls)
+
+    def _query(self, request_type, endpoint, data):
+        """
+        Queues the call instead of sending it.
+
+        :rtype: BatchCall
+        """
+        call = BatchCall(endpoint, data)
+        self.calls.append(call)
+        return call
+
+    def _send(self, calls):
+        """
+        Sends one chunk of calls and hands each its own result.
+
+        :type calls: list
+        """
+        params = [('api.version', 1)]
+        for call in calls:
+            params.append((
+                'command',
+                '{}?{}'.format(
+                    call.endpoint, self.client._encode_params(call.params)
+                )
+            ))
+        response = self.client._query(
+            self.client.REQUEST_TYPE_POST, self.BATCH_ENDPOINT, params
+        )
+
+        payload = (response.get('data') or {}).get('payload')
+        if not isinstance(payload, list) or len(payload) != len(calls):
+            # The batch failed as a whole, every call shares its response.
+            payload = [response] * len(calls)
+
+        for call, result in zip(calls, payload):
+            call.result = result
+
+        cache = self.client.get_cache()
+        if cache is not None:
+            for call in calls:
+                spec = get_endpoint(call.endpoint)
+                cache.invalidate(
+                    call.params, spec.invalidates if spec is not None else ()
+                )
+
+    def execute(self):
+        """
+        Sends the queued calls, ``chunk_size`` commands per request.
+
+        :returns: The result of every queued call, in call order.
+        :rtype: list
+        """
+        calls, self.calls = self.calls, []
+        for start in range(0, len(calls), self.chunk_size):
+            self._send(calls[start:start + self.chunk_size])
+        return [call.result for call in calls]
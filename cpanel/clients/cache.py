@@ -0,0 +1,154 @@
+# coding=utf-8
+from collections import OrderedDict
+import threading
+import time
+
+
+class ResponseCache(object):
+    """
+    TTL and LRU bounded cache of raw responses of read-only endpoints.
+
+    Entries are keyed by endpoint and parameters. When a mutating call is
+    made, every entry sharing one of its ``IDENTITY_PARAMS`` values is
+    dropped, as are all entries of the endpoints the call declares it
+    invalidates, e.g. ``listaccts`` after ``createacct``, so reads never
+    return data older than the client's own writes.
+
+    Every invalidation starts a new generation. A read in flight while an
+    invalidation happened may have been answered before the write, so its
+    response is not stored.
+    """
+    IDENTITY_PARAMS = ('user', 'username', 'domain')
+
+    maxsize = None
+    ttl = None
+    endpoint_ttls = None
+
+    def __init__(self, maxsize=1024, ttl=60.0, endpoint_ttls=None):
+        """
+        :param maxsize: The maximum number of entries, the least recently
+        used entry is evicted beyond it.
+        :type maxsize: int
+        :param ttl: Seconds an entry stays fresh.
+        :type ttl: float
+        :param endpoint_ttls: Per endpoint overrides of ``ttl``.
+        :type endpoint_ttls: dict
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.endpoint_ttls = endpoint_ttls or {}
+
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    @staticmethod
+    def make_key(endpoint, params):
+        """
+        :type endpoint: str
+        :type params: dict
+
+        :rtype: tuple
+        """
+        items = params.items() if isinstance(params, dict) else params
+        return (endpoint, ) + tuple(sorted(
+            (k, str(v)) for k, v in items
+        ))
+
+    @classmethod
+    def _identities(cls, params):
+        """
+        :type params: dict
+
+        :rtype: set
+        """
+        items = params.items() if isinstance(params, dict) else params
+        return set(
+            str(v) for k, v in items if k in cls.IDENTITY_PARAMS and v
+        )
+
+    def get(self, key):
+        """
+        :type key: tuple
+
+        :returns: The cached value or ``None`` on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            # Mark as most recently used.
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[1]
+
+    def get_generation(self):
+        """
+        :returns: The number of invalidations so far, to pass to ``set``.
+        :rtype: int
+        """
+        return self._generation
+
+    def set(self, key, value, generation=None):
+        """
+        :type key: tuple
+        :param generation: The generation when the value was requested,
+        the value isn't stored if an invalidation happened since.
+        :type generation: int
+        """
+        ttl = self.endpoint_ttls.get(key[0], self.ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, params, endpoints=()):
+        """
+        Drops every entry sharing a user or domain with ``params`` and
+        every entry of ``endpoints``.
+
+        :param params: The parameters of a mutating call.
+        :type params: dict
+        :param endpoints: The names of the endpoints whose responses the
+        call changes whatever their parameters.
+        :type endpoints: tuple
+        """
+        identities = self._identities(params)
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                if (key[0] in endpoints
+                        or identities & self._identities(key[1:])):
+                    del self._entries[key]
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_stats(self):
+        """
+        :returns: Counters of ``hits``, ``misses``, ``evictions`` and
+        ``invalidations`` and the current ``size``.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
@@ -0,0 +1,119 @@
+# coding=utf-8
+from base64 import b64encode
+import threading
+
+from cpanel.compat import urllib
+
+# Bounds the memo, which only grows with new parameter names.
+MEMO_MAXSIZE = 4096
+
+# Never memoized, so secrets don't outlive the call.
+SECRET_PARAMS = frozenset(('pass', 'password', 'key'))
+
+_pairs = {}
+_lock = threading.Lock()
+
+
+def _key(name, value):
+    # The type is part of the key as ``1``, ``1.0`` and ``True`` are equal
+    # but encode differently.
+    return name, type(value), value
+
+
+def _encode(name, value):
+    if isinstance(value, bool):
+        value = 1 if value else 0
+    return urllib.urlencode([(name, value)])
+
+
+def remember_pairs(pairs):
+    """
+    Memoizes the encoded form of parameters sent over and over, e.g. the
+    defaults of declared endpoints.
+
+    :param pairs: ``(name, value)`` pairs, those of secret parameters are
+    left out.
+    :type pairs: iterable
+    """
+    encoded = {}
+    for name, value in pairs:
+        if name in SECRET_PARAMS:
+            continue
+        try:
+            encoded[_key(name, value)] = _encode(name, value)
+        except TypeError:
+            # Unhashable, e.g. a list.
+            continue
+    with _lock:
+        if len(_pairs) + len(encoded) <= MEMO_MAXSIZE:
+            _pairs.update(encoded)
+
+
+def encode_pair(name, value):
+    """
+    URL-encodes one request parameter, booleans are sent as ``1`` or
+    ``0``.
+
+    The encoded form of booleans and of the parameters given to
+    ``remember_pairs`` is memoized. Other values, e.g. user names or the
+    commands of a batch, are encoded every time so no request data
+    outlives its call.
+
+    :type name: str
+    :type value: object
+
+    :rtype: str
+    """
+    try:
+        encoded = _pairs.get(_key(name, value))
+    except TypeError:
+        # Unhashable, e.g. a list.
+        return urllib.urlencode([(name, value)])
+    if encoded is not None:
+        return encoded
+    if isinstance(value, bool):
+        remember_pairs(((name, value), ))
+    return _encode(name, value)
+
+
+def encode_params(data):
+    """
+    URL-encodes request parameters without changing them.
+
+    :param data: A dictionary or a sequence of ``(name, value)`` pairs.
+    :type data: dict
+
+    :rtype: str
+    """
+    if isinstance(data, dict):
+        data = data.items()
+    return '&'.join([encode_pair(name, value) for name, value in data])
+
+
+def basic_auth_header(username, password):
+    """
+    The HTTP Basic ``Authorization`` header of a credential set.
+
+    :type username: str
+    :type password: str
+
+    :rtype: dict
+    """
+    credentials = '{}:{}'.format(username, password)
+    return {
+        'Authorization': 'Basic ' + b64encode(
+            credentials.encode('utf-8')
+        ).decode('ascii')
+    }
+
+
+def token_auth_header(username, token):
+    """
+    The ``Authorization`` header of a WHM API token.
+
+    :type username: str
+    :type token: str
+
+    :rtype: dict
+    """
+    return {'Authorization': 'whm {}:{}'.format(username, token)}
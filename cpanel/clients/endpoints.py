@@ -0,0 +1,388 @@
+# coding=utf-8
+import functools
+import textwrap
+import threading
+
+from cpanel.clients.encoding import remember_pairs
+
+
+ENDPOINTS = {}
+# Marks parameters without a default.
+REQUIRED = object()
+DOC_URL = ('https://documentation.cpanel.net/display/SDK/'
+           'WHM+API+1+Functions+-+{}')
+
+_specs = None
+_specs_lock = threading.Lock()
+
+
+class Endpoint(object):
+    """
+    Metadata of a WHM JSON API endpoint.
+
+    Endpoints declared in ``cpanel.clients.specs`` also know their
+    parameters, from which the client method is made on first use.
+    """
+    name = None
+    request_type = None
+    cacheable = False
+    idempotent = False
+    params = None
+    doc = None
+    validate = None
+    invalidates = ()
+    param_docs = None
+
+    def __init__(self, name, request_type, cacheable=False, idempotent=None,
+                 params=None, doc=None, validate=None, invalidates=(),
+                 param_docs=None):
+        """
+        :type name: str
+        :type request_type: str
+        :param cacheable: Whether responses may be served from a cache.
+        Either a bool or a callable taking the request parameters, for
+        endpoints which only read with certain parameters.
+        :type cacheable: bool
+        :param idempotent: Whether sending a request twice does no harm,
+        so it can be retried after any failure. Either a bool or a
+        callable taking the request parameters, defaults to
+        ``cacheable``.
+        :type idempotent: bool
+        :param params: ``(name, argument, default)`` of every parameter,
+        in argument order. ``argument`` is the method's argument name and
+        ``default`` is ``REQUIRED`` for required ones. ``None`` for hand
+        written methods.
+        :type params: tuple
+        :param doc: A one-line summary of the function.
+        :type doc: str
+        :param validate: Checks the request parameters, raising
+        ``ValueError`` on bad ones.
+        :type validate: callable
+        :param invalidates: Names of cacheable endpoints whose responses
+        a call changes whatever their parameters, e.g. ``listaccts`` for
+        ``createacct``.
+        :type invalidates: tuple
+        :param param_docs: ``(type, description)`` of parameters by
+        argument name, for the method's docstring.
+        :type param_docs: dict
+        """
+        self.name = name
+        self.request_type = request_type
+        self.cacheable = cacheable
+        self.idempotent = cacheable if idempotent is None else idempotent
+        self.params = params
+        self.doc = doc
+        self.validate = validate
+        self.invalidates = tuple(invalidates)
+        self.param_docs = param_docs or {}
+        if params:
+            # Most calls leave the defaults, e.g. those of addpkg.
+            remember_pairs(
+                (wire, default) for wire, _, default in params
+                if default is not REQUIRED and default is not None
+            )
+
+    def __repr__(self):
+        return '<Endpoint {}>'.format(self.name)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        :param spec: A row of ``cpanel.clients.specs.SPECS``.
+        :type spec: tuple
+
+        :rtype: Endpoint
+        """
+        name, request_type, params, options = (tuple(spec) + ({}, ))[:4]
+        parsed = []
+        for param in params:
+            default = REQUIRED
+            if isinstance(param, tuple):
+                param, default = param
+            wire, _, argument = param.partition(':')
+            parsed.append((wire, argument or wire, default))
+        return cls(name, request_type, params=tuple(parsed), **options)
+
+    def is_cacheable(self, params):
+        """
+        :type params: dict
+
+        :rtype: bool
+        """
+        if callable(self.cacheable):
+            return bool(self.cacheable(params))
+        return self.cacheable
+
+    def is_idempotent(self, params):
+        """
+        :type params: dict
+
+        :rtype: bool
+        """
+        if callable(self.idempotent):
+            return bool(self.idempotent(params))
+        return self.idempotent
+
+    def build_params(self, args, kwargs):
+        """
+        Maps the arguments of a call to the request parameters. Optional
+        parameters left to ``None`` are not sent, lists are sent comma
+        separated.
+
+        :type args: tuple
+        :type kwargs: dict
+
+        :rtype: dict
+        """
+        if len(args) > len(self.params):
+            raise TypeError('{}() takes at most {} arguments'.format(
+                self.name, len(self.params)
+            ))
+        params = {}
+        for index, (wire, argument, default) in enumerate(self.params):
+            if index < len(args):
+                if argument in kwargs:
+                    raise TypeError('{}() got multiple values for {}'.format(
+                        self.name, argument
+                    ))
+                value = args[index]
+            else:
+                value = kwargs.pop(argument, default)
+            if value is REQUIRED:
+                raise TypeError('{}() missing argument {}'.format(
+                    self.name, argument
+                ))
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ','.join(str(item) for item in value)
+            params[wire] = value
+        if kwargs:
+            raise TypeError('{}() got unexpected arguments {}'.format(
+                self.name, ', '.join(sorted(kwargs))
+            ))
+        if self.validate is not None:
+            self.validate(params)
+        return params
+
+    def make_method(self):
+        """
+        Makes the client method of a declared endpoint. It is compiled
+        with the endpoint's parameters as its arguments, so it has a real
+        signature for ``inspect`` and Python checks the calls.
+
+        :rtype: function
+        """
+        arguments = []
+        defaults = {}
+        for _, argument, default in self.params:
+            if default is REQUIRED:
+                arguments.append(argument)
+            else:
+                defaults[argument] = default
+                arguments.append('{0}=_defaults[{0!r}]'.format(argument))
+        values = ''.join(
+            '{}, '.format(argument) for _, argument, _ in self.params
+        )
+        source = (
+            'def {name}(self, {arguments}):\n'
+            '    return self._query(_request_type, {name!r},\n'
+            '                       _build_params(({values}), {{}}))\n'
+        ).format(name=self.name, arguments=', '.join(arguments),
+                 values=values)
+        namespace = {
+            '__name__': __name__,
+            '_defaults': defaults,
+            '_request_type': self.request_type,
+            '_build_params': self.build_params,
+        }
+        exec(compile(source, '<endpoint {}>'.format(self.name), 'exec'),
+             namespace)
+        method = namespace[self.name]
+        method.__doc__ = self.get_docstring()
+        method.endpoint = self.name
+        method.request_type = self.request_type
+        return method
+
+    def get_docstring(self):
+        """
+        :rtype: str
+        """
+        lines = [self.doc or name_to_title(self.name), '',
+                 DOC_URL.format(self.name), '']
+        for wire, argument, default in self.params or ():
+            _type, description = self.param_docs.get(argument, (None, None))
+            line = ':param {}:'.format(argument)
+            if description:
+                line += ' ' + description
+            if wire != argument:
+                line += ' Sent as ``{}``.'.format(wire)
+            if default is None:
+                line += ' Optional.'
+            elif default is not REQUIRED:
+                line += ' Defaults to ``{!r}``.'.format(default)
+            lines.extend(textwrap.wrap(line, 72))
+            if _type:
+                lines.append(':type {}: {}'.format(argument, _type))
+        lines.extend(['', ':rtype: dict'])
+        return '\n'.join(lines)
+
+
+def name_to_title(name):
+    """
+    :type name: str
+
+    :rtype: str
+    """
+    return name.replace('_', ' ').capitalize()
+
+
+def _load_specs():
+    """
+    Imports the endpoint declarations the first time they're needed.
+
+    :returns: The declarations by endpoint name.
+    :rtype: dict
+    """
+    global _specs
+    if _specs is None:
+        with _specs_lock:
+            if _specs is None:
+                from cpanel.clients.specs import SPECS
+                _specs = dict((spec[0], spec) for spec in SPECS)
+    return _specs
+
+
+def get_endpoint(name):
+    """
+    :type name: str
+
+    :rtype: Endpoint
+    """
+    spec = ENDPOINTS.get(name)
+    if spec is not None:
+        return spec
+    declared = _load_specs().get(name)
+    if declared is None:
+        return None
+    return ENDPOINTS.setdefault(name, Endpoint.from_spec(declared))
+
+
+def get_endpoint_names():
+    """
+    :returns: The names of all hand written and declared endpoints.
+    :rtype: list
+    """
+    return sorted(set(ENDPOINTS) | set(_load_specs()))
+
+
+def get_method(cls, name):
+    """
+    Gets an API method of a client class, see ``ClientType``.
+
+    :type cls: type
+    :type name: str
+
+    :returns: The method or ``None`` if there is no such method.
+    :rtype: function
+    """
+    return getattr(cls, name, None)
+
+
+class ClientType(type):
+    """
+    Metaclass of the clients, making the methods of declared endpoints on
+    first use.
+
+    They are made on lookups of the class as well as of its instances, so
+    e.g. ``hasattr`` and ``mock.patch.object`` find them, and listed by
+    ``dir``. A subclass overriding one has its bases' made when first
+    instantiated, for ``super()`` to find them. Doing so when the class
+    is created would import the declarations along with any subclass.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        if not cls.__dict__.get('_overrides_made'):
+            for klass in cls.__mro__[:-1]:
+                for attribute in vars(klass):
+                    if not attribute.startswith('_'):
+                        for base in klass.__bases__:
+                            getattr(base, attribute, None)
+            cls._overrides_made = True
+        return super(ClientType, cls).__call__(*args, **kwargs)
+
+    def __getattr__(cls, name):
+        spec = None if name.startswith('_') else get_endpoint(name)
+        if spec is None or spec.params is None:
+            raise AttributeError(name)
+        setattr(cls, name, spec.make_method())
+        return type.__getattribute__(cls, name)
+
+    def __dir__(cls):
+        names = set(_load_specs())
+        for klass in cls.__mro__:
+            names.update(vars(klass))
+        return sorted(names)
+
+
+def get_proxy_method(proxy, cls, name):
+    """
+    Gets an API method of a client class bound to a proxy standing in for
+    the client, e.g. a batch, whose ``_query`` then gets the calls.
+
+    :type proxy: object
+    :type cls: type
+    :type name: str
+
+    :raises AttributeError: when there is no such API method.
+
+    :rtype: callable
+    """
+    method = get_method(cls, name)
+    if getattr(method, 'endpoint', None) is None:
+        raise AttributeError(name)
+    # Python 2 gives unbound methods, which only take client instances.
+    return functools.partial(getattr(method, '__func__', method), proxy)
+
+
+def endpoint(request_type, name=None, cacheable=False, idempotent=None):
+    """
+    Binds a client method to a WHM JSON API endpoint.
+
+    The decorated method only builds the request parameters and returns
+    them, the endpoint name is resolved once when the class is defined
+    instead of on every call. The name defaults to the method's name.
+
+    Endpoints which only map arguments to parameters are declared in
+    ``cpanel.clients.specs`` instead.
+
+    :param request_type: The HTTP request type, ``GET`` or ``POST``.
+    :type request_type: str
+    :param name: The API function name.
+    :type name: str
+    :param cacheable: See ``Endpoint``.
+    :type cacheable: bool
+    :param idempotent: See ``Endpoint``.
+    :type idempotent: bool
+
+    :rtype: function
+    """
+    def decorator(method):
+        endpoint_name = name or method.__name__
+        ENDPOINTS[endpoint_name] = Endpoint(
+            endpoint_name, request_type, cacheable, idempotent
+        )
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self._query(
+                request_type,
+                endpoint_name,
+                method(self, *args, **kwargs)
+            )
+
+        wrapper.endpoint = endpoint_name
+        wrapper.request_type = request_type
+        return wrapper
+
+    return decorator
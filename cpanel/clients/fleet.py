@@ -0,0 +1,101 @@
+# coding=utf-8
+from collections import namedtuple
+import time
+
+from cpanel.clients.whm_api_client import WHMAPIClient
+from cpanel.clients.workers import run_threads
+
+
+FleetResult = namedtuple('FleetResult', ('hostname', 'result', 'error'))
+
+
+class FleetTimeoutError(Exception):
+    """
+    The host did not answer before the fleet operation's deadline.
+    """
+
+
+class WHMFleet(object):
+    """
+    Runs the same API call against many WHM servers in parallel.
+
+    Hosts are queried on a bounded pool of worker threads and results are
+    yielded as each host finishes, so the wall-clock time of a call is
+    about the one of the slowest host::
+
+        fleet = WHMFleet([
+            {'hostname': 'web1.example.com', 'username': 'root',
+             'password': 'secret'},
+            {'hostname': 'web2.example.com', 'username': 'root',
+             'password': 'secret'},
+        ])
+        for res in fleet.run('acctcounts', args=('reseller', ), deadline=30):
+            print(res.hostname, res.error or res.result)
+    """
+    clients = None
+    max_workers = None
+
+    def __init__(self, hosts, max_workers=10, client_class=WHMAPIClient):
+        """
+        :param hosts: Either clients or dictionaries of keyword arguments
+        to create them from (``hostname``, ``username``, ``password`` and
+        optionally ``port``).
+        :type hosts: list
+        :param max_workers: The maximum number of hosts queried at once.
+        :type max_workers: int
+        :param client_class: The client class to create clients with.
+        :type client_class: type
+        """
+        self.clients = [
+            host if isinstance(host, WHMAPIClient) else client_class(**host)
+            for host in hosts
+        ]
+        self.max_workers = max_workers
+
+    def get_clients(self):
+        """
+        :rtype: list
+        """
+        return self.clients
+
+    def run(self, method, args=(), kwargs=None, deadline=None):
+        """
+        Calls ``method`` on every host.
+
+        :param method: The client method name, e.g. ``applist``.
+        :type method: str
+        :param args: Positional arguments of the call.
+        :type args: tuple
+        :param kwargs: Keyword arguments of the call.
+        :type kwargs: dict
+        :param deadline: Seconds the whole operation may take. Hosts which
+        did not finish in time are reported with a ``FleetTimeoutError``.
+        :type deadline: float
+
+        :returns: A ``FleetResult`` per host, in order of completion.
+        :rtype: generator
+        """
+        kwargs = kwargs or {}
+        expires_at = None if deadline is None else time.time() + deadline
+        pending = dict(enumerate(self.clients))
+
+        def call(item):
+            index, client = item
+            try:
+                result = getattr(client, method)(*args, **kwargs)
+            except Exception as e:
+                return index, None, e
+            return index, result, None
+
+        for index, result, error in run_threads(
+                list(pending.items()), call,
+                min(self.max_workers, len(self.clients)), expires_at):
+            client = pending.pop(index)
+            yield FleetResult(client.get_hostname(), result, error)
+
+        for index in sorted(pending):
+            yield FleetResult(
+                pending[index].get_hostname(),
+                None,
+                FleetTimeoutError('Deadline of {}s exceeded.'.format(deadline))
+            )
@@ -0,0 +1,218 @@
+# coding=utf-8
+import threading
+from timeit import default_timer
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(hostname, port=2087, **kwargs):
+    """
+    Returns the process wide governor of a WHM host, creating it with
+    ``kwargs`` on first use. Clients sharing it share its limits::
+
+        client = WHMAPIClient('host', 'root', 'secret',
+                              governor=get_governor('host', rate=20))
+
+    :type hostname: str
+    :type port: int
+
+    :rtype: HostGovernor
+    """
+    key = (hostname, port)
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = _governors[key] = HostGovernor(**kwargs)
+        return governor
+
+
+class HostGovernor(object):
+    """
+    Limits the request rate and the concurrency against a WHM host.
+
+    The rate is capped by a token bucket. The number of requests in flight
+    is capped by a limit which adapts to the host's health: it grows
+    additively while requests succeed, and shrinks multiplicatively when
+    requests fail or the latency rises beyond ``latency_tolerance`` times
+    its baseline.
+
+    Latencies are smoothed into a moving average, so the jitter of a
+    healthy host isn't taken for overload, and compared with a baseline
+    following that average much more slowly. Both are tracked per
+    endpoint, a slow ``listaccts`` of a big server is not a sign of
+    overload next to a quick ``applist``.
+    """
+    rate = None
+    burst = None
+    min_limit = None
+    max_limit = None
+    backoff = None
+    latency_tolerance = None
+    smoothing = None
+    baseline_smoothing = None
+
+    def __init__(self, rate=None, burst=None, initial_limit=8, min_limit=1,
+                 max_limit=64, backoff=0.7, latency_tolerance=2.0,
+                 smoothing=0.2, baseline_smoothing=0.02):
+        """
+        :param rate: Requests per second, ``None`` doesn't limit the rate.
+        :type rate: float
+        :param burst: Requests which may be sent at once on top of the
+        rate. Defaults to ``rate``.
+        :type burst: float
+        :param initial_limit: The concurrency limit to start with.
+        :type initial_limit: int
+        :param min_limit: The concurrency limit never goes below it.
+        :type min_limit: int
+        :param max_limit: The concurrency limit never goes beyond it.
+        :type max_limit: int
+        :param backoff: Factor the limit is multiplied with on overload.
+        :type backoff: float
+        :param latency_tolerance: How many times its baseline the average
+        latency may reach before the host is considered overloaded.
+        :type latency_tolerance: float
+        :param smoothing: Weight of each latency in the moving average.
+        :type smoothing: float
+        :param baseline_smoothing: Weight of the moving average in the
+        baseline, far lower so that overload stands out.
+        :type baseline_smoothing: float
+        """
+        self.rate = rate
+        self.burst = max(burst or rate or 1, 1)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+
+        self._limit = float(max(min(initial_limit, max_limit), min_limit))
+        self._in_flight = 0
+        self._tokens = self.burst
+        self._refilled_at = default_timer()
+        # The moving average and baseline latencies by endpoint.
+        self._latencies = {}
+        self._decreased_at = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'requests': 0,
+            'errors': 0,
+            'throttled': 0,
+            'increases': 0,
+            'decreases': 0,
+        }
+
+    def get_limit(self):
+        """
+        :rtype: int
+        """
+        return int(self._limit)
+
+    def _take_token(self):
+        """
+        :returns: Seconds to wait for the next token, ``0`` when one was
+        taken.
+        :rtype: float
+        """
+        if self.rate is None:
+            return 0
+        now = default_timer()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled_at) * self.rate
+        )
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+
+        :returns: The start time to hand to ``release``.
+        :rtype: float
+        """
+        throttled = False
+        with self._condition:
+            while True:
+                if self._in_flight >= int(self._limit):
+                    throttled = True
+                    self._condition.wait()
+                    continue
+                wait = self._take_token()
+                if not wait:
+                    break
+                throttled = True
+                self._condition.wait(wait)
+            self._in_flight += 1
+            self._stats['requests'] += 1
+            if throttled:
+                self._stats['throttled'] += 1
+        return default_timer()
+
+    def release(self, started, error=False, endpoint=None, latency=None):
+        """
+        Records the outcome of a request and adapts the concurrency limit.
+
+        :param started: What ``acquire`` returned.
+        :type started: float
+        :param error: Whether the request failed.
+        :type error: bool
+        :param endpoint: The API function called, whose latencies the
+        request's is averaged with.
+        :type endpoint: str
+        :param latency: Seconds the host took to answer, defaults to the
+        time since ``started``.
+        :type latency: float
+        """
+        if latency is None:
+            latency = default_timer() - started
+        with self._condition:
+            self._in_flight -= 1
+            if error:
+                self._stats['errors'] += 1
+                self._decrease(started)
+            else:
+                average, baseline = self._latencies.get(
+                    endpoint, (latency, latency)
+                )
+                average += (latency - average) * self.smoothing
+                baseline += (average - baseline) * self.baseline_smoothing
+                self._latencies[endpoint] = (average, baseline)
+                if average > baseline * self.latency_tolerance:
+                    self._decrease(started)
+                elif self._limit < self.max_limit:
+                    # About one more slot per limit's worth of successes.
+                    self._limit = min(
+                        self.max_limit, self._limit + 1.0 / self._limit
+                    )
+                    self._stats['increases'] += 1
+            self._condition.notify_all()
+
+    def _decrease(self, started):
+        if started < self._decreased_at:
+            # Sent before the last back off, which accounted for it already.
+            return
+        self._decreased_at = default_timer()
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        self._stats['decreases'] += 1
+
+    def get_stats(self):
+        """
+        :returns: The current ``limit``, ``in_flight`` requests and
+        ``(average, baseline)`` ``latencies`` by endpoint, and counters of
+        ``requests``, ``errors``, ``throttled`` requests and limit
+        ``increases`` and ``decreases``.
+        :rtype: dict
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({
+                'limit': int(self._limit),
+                'in_flight': self._in_flight,
+                'latencies': dict(self._latencies),
+            })
+        return stats
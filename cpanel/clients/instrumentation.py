@@ -0,0 +1,206 @@
+# coding=utf-8
+import bisect
+import threading
+from timeit import default_timer
+
+
+class RequestEvent(object):
+    """
+    What happened during one API call.
+
+    ``timings`` maps phase names to seconds:
+
+    * ``connect`` - TCP connect and TLS handshake, only for new connections.
+    * ``ttfb`` - From sending the request until the response headers.
+    * ``read`` - Reading the response body.
+    * ``decode`` - Decoding the JSON body.
+    * ``total`` - The whole call.
+    """
+    __slots__ = (
+        'hostname', 'endpoint', 'request_type', 'status', 'request_bytes',
+        'response_bytes', 'reused', 'cached', 'coalesced', 'error',
+        'timings', 'started',
+    )
+
+    def __init__(self, hostname, endpoint, request_type):
+        """
+        :type hostname: str
+        :type endpoint: str
+        :type request_type: str
+        """
+        self.hostname = hostname
+        self.endpoint = endpoint
+        self.request_type = request_type
+        self.status = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.reused = None
+        self.cached = False
+        self.coalesced = False
+        self.error = None
+        self.timings = {}
+        self.started = default_timer()
+
+    def __repr__(self):
+        return '<RequestEvent {} {}>'.format(self.hostname, self.endpoint)
+
+    def finish(self):
+        self.timings['total'] = default_timer() - self.started
+
+
+class Instrument(object):
+    """
+    Base class of instruments receiving the ``RequestEvent`` of every call
+    of the clients they are attached to. Both hooks do nothing by default.
+    """
+
+    def before_request(self, event):
+        """
+        Called before the request is sent, only the call's identity is
+        known yet.
+
+        :type event: RequestEvent
+        """
+
+    def after_request(self, event):
+        """
+        Called once the call finished, successfully or not.
+
+        :type event: RequestEvent
+        """
+
+
+class Histogram(object):
+    """
+    Histogram of durations over exponentially growing buckets, from 0.1ms
+    to about a minute.
+    """
+    BOUNDS = tuple(0.0001 * 1.25 ** i for i in range(60))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """
+        :type value: float
+        """
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+        :param q: A percentile between 0 and 100.
+        :type q: float
+
+        :returns: The upper bound of the bucket holding the percentile.
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if index < len(self.BOUNDS):
+                    return min(self.BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class HistogramCollector(Instrument):
+    """
+    Keeps per host and endpoint histograms of every phase's duration, as
+    well as status codes, errors and payload sizes, in memory::
+
+        collector = HistogramCollector()
+        client = WHMAPIClient(..., instruments=[collector])
+        ...
+        collector.get_stats()[('host', 'accountsummary')]['ttfb']['p99']
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def after_request(self, event):
+        """
+        :type event: RequestEvent
+        """
+        key = (event.hostname, event.endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'histograms': {},
+                    'statuses': {},
+                    'errors': 0,
+                    'cached': 0,
+                    'coalesced': 0,
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                }
+            for phase, seconds in event.timings.items():
+                histogram = entry['histograms'].get(phase)
+                if histogram is None:
+                    histogram = entry['histograms'][phase] = Histogram()
+                histogram.add(seconds)
+            if event.status is not None:
+                entry['statuses'][event.status] = (
+                    entry['statuses'].get(event.status, 0) + 1
+                )
+            if event.error is not None:
+                entry['errors'] += 1
+            if event.cached:
+                entry['cached'] += 1
+            if event.coalesced:
+                entry['coalesced'] += 1
+            entry['request_bytes'] += event.request_bytes
+            entry['response_bytes'] += event.response_bytes
+
+    def get_stats(self):
+        """
+        :returns: Per ``(hostname, endpoint)``, a summary of every phase,
+        the status code counts, the number of errors, cache hits and
+        coalesced calls and the total payload sizes.
+        :rtype: dict
+        """
+        stats = {}
+        with self._lock:
+            for key, entry in self._entries.items():
+                stats[key] = dict(
+                    (phase, histogram.summary())
+                    for phase, histogram in entry['histograms'].items()
+                )
+                stats[key].update({
+                    'statuses': dict(entry['statuses']),
+                    'errors': entry['errors'],
+                    'cached': entry['cached'],
+                    'coalesced': entry['coalesced'],
+                    'request_bytes': entry['request_bytes'],
+                    'response_bytes': entry['response_bytes'],
+                })
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
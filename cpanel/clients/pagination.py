@@ -0,0 +1,83 @@
+# coding=utf-8
+import threading
+
+from cpanel.compat import queue
+
+
+def iter_pages(fetch_page, page_size, prefetch=True):
+    """
+    Iterates over the pages of a paginated listing.
+
+    With ``prefetch`` the next page is fetched by a background thread
+    while the caller works through the current one. The page after it is
+    only fetched once the caller took the next one, so memory stays
+    bounded by two pages, the caller's and the next.
+
+    :param fetch_page: Callable taking the 1-based index of a page's first
+    record and the page size, returning the page's records.
+    :type fetch_page: callable
+    :type page_size: int
+    :type prefetch: bool
+
+    :returns: One list of records per page.
+    :rtype: generator
+    """
+    if not prefetch:
+        start = 1
+        while True:
+            page = fetch_page(start, page_size)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            start += page_size
+
+    pages = queue.Queue()
+    # Holds a token while the fetcher may fetch a page, taking a page
+    # gives it back.
+    taken = queue.Queue()
+    taken.put(None)
+    stopped = threading.Event()
+
+    def wait_taken():
+        while not stopped.is_set():
+            try:
+                taken.get(timeout=0.1)
+                return True
+            except queue.Empty:
+                continue
+        return False
+
+    def put(item):
+        pages.put(item)
+        return not stopped.is_set()
+
+    def fetch():
+        start = 1
+        try:
+            while wait_taken():
+                page = fetch_page(start, page_size)
+                if page and not put((page, None)):
+                    return
+                if len(page) < page_size:
+                    break
+                start += page_size
+        except Exception as e:
+            put((None, e))
+            return
+        put((None, None))
+
+    thread = threading.Thread(target=fetch)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            page, error = pages.get()
+            if error is not None:
+                raise error
+            if page is None:
+                return
+            taken.put(None)
+            yield page
+    finally:
+        stopped.set()
@@ -0,0 +1,210 @@
+# coding=utf-8
+import select
+import threading
+import time
+
+from cpanel.compat import HTTPSConnection
+
+
+class PoolTimeoutError(Exception):
+    """
+    No connection of the pool freed up within ``block_timeout``.
+    """
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive pool of HTTPS connections to a single WHM host.
+
+    Idle connections are kept around for reuse instead of doing a fresh
+    TCP + TLS handshake on every request. Connections are checked out
+    with ``get_connection`` and handed back with ``put_connection`` once
+    the response has been fully read. Each checked out connection belongs
+    to a single thread, so any number of threads can share the pool.
+
+    With ``max_connections`` the threads take turns on a fixed number of
+    sockets instead of opening one each when they all call at once.
+    """
+    hostname = None
+    port = None
+    maxsize = None
+    idle_timeout = None
+    max_connections = None
+    block_timeout = None
+    connection_class = HTTPSConnection
+
+    def __init__(self, hostname, port=2087, maxsize=4, idle_timeout=60.0,
+                 connection_class=None, max_connections=None,
+                 block_timeout=None):
+        """
+        :type hostname: str
+        :type port: int
+        :param maxsize: The maximum number of idle connections kept open.
+        :type maxsize: int
+        :param idle_timeout: Seconds an idle connection may sit in the pool
+        before it gets closed instead of reused.
+        :type idle_timeout: float
+        :param connection_class: Class used to open new connections.
+        Defaults to ``HTTPSConnection``.
+        :type connection_class: type
+        :param max_connections: The maximum number of connections checked
+        out at once, ``None`` for no limit. Checkouts beyond it wait for a
+        connection to come back. A thread holding a connection, e.g. while
+        iterating a stream, must not wait for another one.
+        :type max_connections: int
+        :param block_timeout: Seconds to wait for a connection when
+        ``max_connections`` are checked out, ``None`` waits forever.
+        :type block_timeout: float
+        """
+        self.hostname = hostname
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        if connection_class is not None:
+            self.connection_class = connection_class
+        self.max_connections = max_connections
+        self.block_timeout = block_timeout
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'in_use': 0,
+        }
+
+    def _new_connection(self):
+        """
+        :rtype: HTTPSConnection
+        """
+        return self.connection_class(self.hostname, self.port)
+
+    @staticmethod
+    def is_connection_dropped(connection):
+        """
+        Checks whether an idle connection has been closed by the server.
+
+        An idle keep-alive socket must not be readable, a readable socket
+        means the peer either closed it or sent something unexpected.
+
+        :type connection: HTTPSConnection
+
+        :rtype: bool
+        """
+        sock = getattr(connection, 'sock', None)
+        if sock is None:
+            # Not connected yet, it'll connect on the next request.
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError, select.error):
+            return True
+        return bool(readable)
+
+    def get_connection(self):
+        """
+        Checks a connection out of the pool, opening a new one when there
+        is no healthy idle connection available.
+
+        :raises PoolTimeoutError: when ``max_connections`` are checked out
+        for longer than ``block_timeout``.
+
+        :returns: The connection and whether it was reused.
+        :rtype: tuple
+        """
+        stale = []
+        connection = None
+        with self._lock:
+            self._wait_available()
+            now = time.time()
+            while self._idle:
+                candidate, released_at = self._idle.pop()
+                if (now - released_at > self.idle_timeout
+                        or self.is_connection_dropped(candidate)):
+                    stale.append(candidate)
+                    continue
+                connection = candidate
+                break
+            self._stats['discarded'] += len(stale)
+            self._stats['in_use'] += 1
+            if connection is not None:
+                self._stats['reused'] += 1
+            else:
+                self._stats['created'] += 1
+
+        for candidate in stale:
+            candidate.close()
+
+        if connection is not None:
+            return connection, True
+        return self._new_connection(), False
+
+    def _wait_available(self):
+        """
+        Waits until a connection may be checked out, the lock is held.
+        """
+        if self.max_connections is None:
+            return
+        deadline = None
+        if self.block_timeout is not None:
+            deadline = time.time() + self.block_timeout
+        while self._stats['in_use'] >= self.max_connections:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    raise PoolTimeoutError(
+                        'All {} connections to {} are in use.'.format(
+                            self.max_connections, self.hostname
+                        )
+                    )
+            self._available.wait(timeout)
+
+    def put_connection(self, connection):
+        """
+        Returns a connection to the pool once its response was fully read.
+
+        :type connection: HTTPSConnection
+        """
+        with self._lock:
+            self._stats['in_use'] -= 1
+            self._available.notify()
+            if len(self._idle) < self.maxsize:
+                self._idle.append((connection, time.time()))
+                return
+            self._stats['discarded'] += 1
+        connection.close()
+
+    def discard_connection(self, connection):
+        """
+        Closes a checked out connection instead of returning it to the pool.
+
+        :type connection: HTTPSConnection
+        """
+        with self._lock:
+            self._stats['in_use'] -= 1
+            self._stats['discarded'] += 1
+            self._available.notify()
+        connection.close()
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def get_stats(self):
+        """
+        :returns: Counters of ``created``, ``reused``, ``discarded``,
+        ``in_use`` and ``idle`` connections.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        return stats
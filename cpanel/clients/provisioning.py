@@ -0,0 +1,270 @@
+# coding=utf-8
+from collections import namedtuple
+import json
+import os
+import threading
+
+from cpanel.clients.workers import RunStats, run_threads
+
+
+ProvisioningResult = namedtuple(
+    'ProvisioningResult', ('username', 'steps', 'failed_step', 'error')
+)
+
+
+class ProvisioningError(Exception):
+    """
+    WHM answered a provisioning step with a failure. ``response`` holds
+    the whole response.
+    """
+    step = None
+    response = None
+
+    def __init__(self, step, response):
+        reason = ((response.get('metadata') or {}).get('reason')
+                  or response.get('error'))
+        super(ProvisioningError, self).__init__(
+            '{} failed: {}'.format(step, reason)
+        )
+        self.step = step
+        self.response = response
+
+
+class Checkpoint(object):
+    """
+    Append-only journal of the completed provisioning steps, one JSON
+    line per step, so an interrupted run can skip what's already done.
+
+    Each line is flushed as soon as its step completes. A line cut short
+    by a crash is ignored, its step simply runs again.
+    """
+    path = None
+
+    def __init__(self, path):
+        """
+        :param path: The journal file, created when missing.
+        :type path: str
+        """
+        self.path = path
+        self._done = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._done.add((entry['name'], entry['step']))
+
+    def is_done(self, name, step):
+        """
+        :type name: str
+        :type step: str
+
+        :rtype: bool
+        """
+        return (name, step) in self._done
+
+    def mark_done(self, name, step):
+        """
+        :type name: str
+        :type step: str
+        """
+        line = json.dumps({'name': name, 'step': step}) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+            self._done.add((name, step))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ProvisioningPipeline(object):
+    """
+    Provisions accounts in bulk: ``addpkg`` once per package, then
+    ``createacct``, ``passwd`` and ``limitbw`` for every account.
+
+    Accounts are worked on by a bounded pool of threads sharing the
+    client, each account's steps running in order. Completed steps are
+    journaled in the checkpoint file, running the pipeline again with the
+    same file resumes where it stopped. A ``createacct`` failing for an
+    account which already exists with the same domain counts as done, so
+    an account created by a run which stopped before journaling it does
+    not block the resumed run::
+
+        pipeline = ProvisioningPipeline(client, 'reseller1.checkpoint')
+        specs = ({'username': user, 'domain': domain, 'plan': 'basic',
+                  'password': secret, 'bwlimit': 1024}
+                 for user, domain, secret in rows)
+        for res in pipeline.run(specs, packages=[{'name': 'basic'}]):
+            if res.error:
+                print(res.username, res.failed_step, res.error)
+        print(pipeline.get_stats())
+    """
+    STEPS = ('createacct', 'passwd', 'limitbw')
+    # Spec keys passed on to ``createacct``.
+    CREATE_OPTIONS = ('plan', 'contactemail')
+
+    client = None
+    checkpoint = None
+    max_workers = None
+
+    def __init__(self, client, checkpoint_path, max_workers=8):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        :param checkpoint_path: The journal of completed steps.
+        :type checkpoint_path: str
+        :param max_workers: The maximum number of accounts provisioned
+        at once.
+        :type max_workers: int
+        """
+        self.client = client
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.max_workers = max_workers
+
+        self._stats = RunStats('accounts', 'steps')
+
+    def _call(self, step, method, *args, **kwargs):
+        """
+        :raises ProvisioningError: when WHM reports a failure.
+
+        :rtype: dict
+        """
+        response = method(*args, **kwargs)
+        metadata = response.get('metadata') or {}
+        if not metadata.get('result'):
+            raise ProvisioningError(step, response)
+        return response
+
+    def _provision(self, spec):
+        """
+        Runs the account's steps not done yet, stopping at the first
+        failure.
+
+        :type spec: dict
+
+        :rtype: ProvisioningResult
+        """
+        username = spec['username']
+        options = dict((name, spec[name]) for name in self.CREATE_OPTIONS
+                       if spec.get(name) is not None)
+        calls = {
+            'createacct': (self.client.createacct,
+                           (username, spec['domain']), options),
+        }
+        if spec.get('password') is not None:
+            calls['passwd'] = (self.client.passwd,
+                               (username, spec['password']), {})
+        if spec.get('bwlimit') is not None:
+            calls['limitbw'] = (self.client.limitbw,
+                                (username, spec['bwlimit']), {})
+
+        done = []
+        for step in self.STEPS:
+            if step not in calls or self.checkpoint.is_done(username, step):
+                continue
+            method, args, kwargs = calls[step]
+            try:
+                self._call(step, method, *args, **kwargs)
+            except Exception as e:
+                if step != 'createacct' or not self._account_exists(spec):
+                    self._stats.add_to_group(step, failed=True)
+                    return ProvisioningResult(username, tuple(done), step, e)
+            self.checkpoint.mark_done(username, step)
+            self._stats.add_to_group(step)
+            done.append(step)
+        return ProvisioningResult(username, tuple(done), None, None)
+
+    def _account_exists(self, spec):
+        """
+        Whether the account already exists with the spec's domain, e.g.
+        created by a run which stopped before journaling it.
+
+        :type spec: dict
+
+        :rtype: bool
+        """
+        try:
+            response = self._call('accountsummary',
+                                  self.client.accountsummary,
+                                  spec['username'], spec['domain'])
+        except Exception:
+            return False
+        return any(
+            account.get('user') == spec['username']
+            and account.get('domain') == spec['domain']
+            for account in (response.get('data') or {}).get('acct') or ()
+        )
+
+    def _add_packages(self, packages):
+        """
+        :param packages: Keyword arguments of ``addpkg``, one dict per
+        package.
+        :type packages: list
+        """
+        for package in packages:
+            name = package['name']
+            if self.checkpoint.is_done(name, 'addpkg'):
+                continue
+            try:
+                self._call('addpkg', self.client.addpkg, **package)
+            except Exception:
+                self._stats.add_to_group('addpkg', failed=True)
+                raise
+            self.checkpoint.mark_done(name, 'addpkg')
+            self._stats.add_to_group('addpkg')
+
+    def run(self, specs, packages=()):
+        """
+        Provisions the accounts.
+
+        Failed steps are not journaled, so they run again on the next run
+        with the same checkpoint, as do the later steps of their account.
+
+        :param specs: Account specs, each a dict with ``username`` and
+        ``domain`` and optionally ``plan`` and ``contactemail``, given to
+        ``createacct``, ``password`` and ``bwlimit``. The worker threads
+        take them one at a time, e.g. from a generator reading a CSV
+        file.
+        :type specs: iterable
+        :param packages: Keyword arguments of ``addpkg`` for the packages
+        to create first, one dict per package.
+        :type packages: list
+
+        :raises ProvisioningError: when a package can't be created.
+
+        :returns: A ``ProvisioningResult`` per account, in order of
+        completion.
+        :rtype: generator
+        """
+        self._stats.start()
+        self._add_packages(packages)
+        try:
+            for result in run_threads(specs, self._provision,
+                                      self.max_workers):
+                self._stats.add(result.error)
+                yield result
+        finally:
+            self.checkpoint.close()
+
+    def get_stats(self):
+        """
+        Counts of the current run so far, or of the last one once it
+        ended. Other threads may call it while ``run`` is going.
+
+        :returns: The number of ``accounts`` handled and ``failed``, the
+        ``ok`` and ``failed`` counts of each of the ``steps``, the
+        accounts' ``errors`` by exception type, the ``elapsed`` seconds
+        and the accounts handled per second as ``rate``.
+        :rtype: dict
+        """
+        return self._stats.get()
@@ -0,0 +1,345 @@
+# coding=utf-8
+from cpanel.clients.endpoints import get_proxy_method
+from cpanel.compat import intern
+
+_MISSING = object()
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # e.g. ``unlimited``
+        return value
+
+
+def _to_bool(value):
+    if value is None or value == '':
+        return None
+    return bool(_to_int(value))
+
+
+def _from_dict(cls, raw):
+    return cls.from_dict(raw)
+
+
+class Field(object):
+    """
+    A field of a ``Record``, read from the record's raw values and
+    converted on access.
+    """
+    name = None
+    convert = None
+    interned = False
+    index = None
+
+    def __init__(self, name, convert=None, interned=False):
+        """
+        :param name: The key of the field in the raw response.
+        :type name: str
+        :param convert: Converts the raw value on access.
+        :type convert: callable
+        :param interned: Whether the raw strings are interned, so all
+        records share a single copy of each value. Meant for fields with
+        few distinct values such as plans or owners.
+        :type interned: bool
+        """
+        self.name = name
+        self.convert = convert
+        self.interned = interned
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        value = record._values[self.index]
+        if value is _MISSING:
+            return None
+        if self.convert is not None:
+            return self.convert(value)
+        return value
+
+
+def fields(*specs):
+    """
+    Declares the fields of a ``Record`` subclass.
+
+    :param specs: ``Field`` instances, or plain names for string fields.
+
+    :rtype: function
+    """
+    def decorator(cls):
+        declared = []
+        for index, spec in enumerate(specs):
+            if not isinstance(spec, Field):
+                spec = Field(spec)
+            spec.index = index
+            setattr(cls, spec.name, spec)
+            declared.append(spec)
+        cls.FIELDS = tuple(declared)
+        return cls
+
+    return decorator
+
+
+class Record(object):
+    """
+    A compact, read-only view of a JSON object of the API.
+
+    The declared fields are stored as a tuple of the raw values, keys the
+    record does not declare are kept aside, so ``to_dict`` gives back the
+    original object.
+    """
+    __slots__ = ('_values', '_extra')
+    FIELDS = ()
+
+    def __init__(self, values, extra=None):
+        """
+        :param values: The raw values of ``FIELDS``, in order.
+        :type values: tuple
+        :param extra: The undeclared keys of the raw object.
+        :type extra: dict
+        """
+        self._values = values
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, raw):
+        """
+        :type raw: dict
+
+        :rtype: Record
+        """
+        values = []
+        found = 0
+        for field in cls.FIELDS:
+            value = raw.get(field.name, _MISSING)
+            if value is not _MISSING:
+                found += 1
+                if field.interned and isinstance(value, type(u'')):
+                    value = intern(value)
+            values.append(value)
+        extra = None
+        if len(raw) > found:
+            extra = dict(
+                (key, value) for key, value in raw.items()
+                if not isinstance(getattr(cls, key, None), Field)
+            )
+        return cls(tuple(values), extra)
+
+    def get(self, name, default=None):
+        """
+        Gets a value by its raw key, converted if it's a declared field.
+
+        :type name: str
+
+        :rtype: object
+        """
+        if isinstance(getattr(type(self), name, None), Field):
+            value = getattr(self, name)
+            return default if value is None else value
+        if self._extra is None:
+            return default
+        return self._extra.get(name, default)
+
+    def to_dict(self):
+        """
+        :returns: The raw object the record was built from.
+        :rtype: dict
+        """
+        raw = dict(self._extra or ())
+        for field, value in zip(self.FIELDS, self._values):
+            if value is not _MISSING:
+                raw[field.name] = value
+        return raw
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and self._values == other._values
+                and self._extra == other._extra)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _from_dict, (type(self), self.to_dict())
+
+    def __repr__(self):
+        return '<{} {}>'.format(
+            type(self).__name__, getattr(self, self.FIELDS[0].name)
+        )
+
+
+@fields(
+    Field('version', _to_int),
+    'reason',
+    Field('result', _to_bool),
+    Field('command', interned=True),
+)
+class Metadata(Record):
+    """
+    The ``metadata`` of a WHM API 1 response.
+    """
+    __slots__ = ()
+
+
+@fields(
+    'user',
+    'domain',
+    'email',
+    'ip',
+    Field('owner', interned=True),
+    Field('plan', interned=True),
+    Field('theme', interned=True),
+    Field('partition', interned=True),
+    Field('shell', interned=True),
+    Field('disklimit', interned=True),
+    'diskused',
+    'startdate',
+    Field('unix_startdate', _to_int),
+    Field('suspended', _to_bool),
+    Field('suspendreason', interned=True),
+    Field('suspendtime', _to_int),
+    Field('is_locked', _to_bool),
+    Field('maxaddons', interned=True),
+    Field('maxparked', interned=True),
+    Field('maxpop', interned=True),
+    Field('maxsql', interned=True),
+    Field('maxftp', interned=True),
+    Field('maxsub', interned=True),
+    Field('maxlst', interned=True),
+)
+class AccountSummary(Record):
+    """
+    An account as listed by ``accountsummary`` and ``listaccts``.
+    """
+    __slots__ = ()
+
+
+@fields(
+    Field('user', interned=True),
+    Field('account', _to_int),
+    Field('active', _to_int),
+    Field('suspended', _to_int),
+    Field('limit', _to_int),
+)
+class AccountCounts(Record):
+    """
+    A reseller's account counts, as listed by ``acctcounts``.
+    """
+    __slots__ = ()
+
+
+# The record type and ``data`` key of endpoints with typed results.
+RESULT_TYPES = {
+    'accountsummary': ('acct', AccountSummary),
+    'listaccts': ('acct', AccountSummary),
+    'acctcounts': ('reseller', AccountCounts),
+}
+
+
+class Result(object):
+    """
+    A typed WHM API 1 response.
+
+    ``data`` holds a tuple of records for list results, a single record
+    for object results and the raw ``data`` of endpoints without a record
+    type.
+    """
+    __slots__ = ('metadata', 'data', '_key')
+
+    def __init__(self, metadata, data, key=None):
+        """
+        :type metadata: Metadata
+        :type data: object
+        :param key: The ``data`` key holding the records, ``None`` when
+        ``data`` is raw.
+        :type key: str
+        """
+        self.metadata = metadata
+        self.data = data
+        self._key = key
+
+    @classmethod
+    def from_dict(cls, endpoint, response):
+        """
+        :type endpoint: str
+        :type response: dict
+
+        :rtype: Result
+        """
+        metadata = response.get('metadata')
+        if isinstance(metadata, dict):
+            metadata = Metadata.from_dict(metadata)
+
+        data = response.get('data')
+        key, record_type = RESULT_TYPES.get(endpoint, (None, None))
+        if (record_type is None or not isinstance(data, dict)
+                or list(data) != [key]):
+            return cls(metadata, data)
+
+        records = data[key]
+        if isinstance(records, list):
+            records = tuple(record_type.from_dict(record)
+                            for record in records)
+        elif isinstance(records, dict):
+            records = record_type.from_dict(records)
+        else:
+            return cls(metadata, data)
+        return cls(metadata, records, key)
+
+    def to_dict(self):
+        """
+        :returns: The raw response.
+        :rtype: dict
+        """
+        response = {}
+        metadata = self.metadata
+        if isinstance(metadata, Metadata):
+            metadata = metadata.to_dict()
+        if metadata is not None:
+            response['metadata'] = metadata
+
+        data = self.data
+        if isinstance(data, tuple):
+            data = {self._key: [record.to_dict() for record in data]}
+        elif isinstance(data, Record):
+            data = {self._key: data.to_dict()}
+        if data is not None:
+            response['data'] = data
+        return response
+
+    def __repr__(self):
+        return '<Result {}>'.format(
+            self.metadata.command if isinstance(self.metadata, Metadata)
+            else None
+        )
+
+
+class WHMTyped(object):
+    """
+    Proxy returning ``Result`` objects instead of raw dicts.
+
+    Any API method of the client can be called with its usual signature.
+    """
+    client = None
+
+    def __init__(self, client):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        """
+        self.client = client
+
+    def __getattr__(self, name):
+        return get_proxy_method(self, type(self.client), name)
+
+    def _query(self, request_type, endpoint, data):
+        """
+        :rtype: Result
+        """
+        return Result.from_dict(
+            endpoint, self.client._query(request_type, endpoint, data)
+        )
@@ -0,0 +1,144 @@
+# coding=utf-8
+import random
+import socket
+import threading
+import time
+
+from cpanel.compat import HTTPException
+
+
+class ConnectError(socket.error):
+    """
+    Connecting to the host failed, the request was never sent.
+    """
+
+
+class RetryBudget(object):
+    """
+    Caps retries to a share of the requests, so retries can't multiply the
+    load on a host which is already failing.
+
+    Every request deposits ``ratio`` of a token, every retry withdraws a
+    whole one. ``min_tokens`` lets a client with little traffic retry too.
+    """
+    ratio = None
+    min_tokens = None
+    max_tokens = None
+
+    def __init__(self, ratio=0.2, min_tokens=10, max_tokens=100):
+        """
+        :type ratio: float
+        :type min_tokens: float
+        :type max_tokens: float
+        """
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self._tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        :returns: Whether a retry is allowed.
+        :rtype: bool
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def get_tokens(self):
+        """
+        :rtype: float
+        """
+        return self._tokens
+
+
+class RetryPolicy(object):
+    """
+    When and how long to wait before sending a failed request again.
+
+    Idempotent requests are retried on connection errors, timeouts and
+    ``retry_statuses``. Other requests are only retried when connecting
+    failed, as the server may have acted on anything it received. Waits
+    grow exponentially with full jitter.
+    """
+    max_attempts = None
+    backoff_base = None
+    backoff_max = None
+    retry_statuses = None
+    budget = None
+
+    def __init__(self, max_attempts=3, backoff_base=0.1, backoff_max=5.0,
+                 retry_statuses=(502, 503, 504), budget=None):
+        """
+        :param max_attempts: Attempts per request, the first one included.
+        :type max_attempts: int
+        :param backoff_base: Seconds of the first wait's upper bound.
+        :type backoff_base: float
+        :param backoff_max: The upper bound of any wait.
+        :type backoff_max: float
+        :param retry_statuses: HTTP statuses idempotent requests are
+        retried on.
+        :type retry_statuses: tuple
+        :param budget: Defaults to a ``RetryBudget`` of its own.
+        :type budget: RetryBudget
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def is_retryable_error(self, error, idempotent):
+        """
+        :type error: Exception
+        :type idempotent: bool
+
+        :rtype: bool
+        """
+        if isinstance(error, ConnectError):
+            return True
+        return idempotent and isinstance(error, (socket.error, HTTPException))
+
+    def is_retryable_status(self, status, idempotent):
+        """
+        :type status: int
+        :type idempotent: bool
+
+        :rtype: bool
+        """
+        return idempotent and status in self.retry_statuses
+
+    def get_backoff(self, attempt):
+        """
+        :param attempt: The number of the attempt which just failed.
+        :type attempt: int
+
+        :rtype: float
+        """
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        )
+
+    def allow_retry(self, attempt):
+        """
+        Whether another attempt may follow the failed ``attempt``, taking
+        a token from the budget if so.
+
+        :type attempt: int
+
+        :rtype: bool
+        """
+        return attempt < self.max_attempts and self.budget.withdraw()
+
+    def sleep(self, attempt):
+        """
+        :type attempt: int
+        """
+        time.sleep(self.get_backoff(attempt))
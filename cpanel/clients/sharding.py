@@ -0,0 +1,314 @@
+# coding=utf-8
+from collections import namedtuple
+import multiprocessing
+import pickle
+import threading
+
+from cpanel.clients.whm_api_client import WHMAPIClient
+from cpanel.clients.workers import (
+    DONE, ERROR, RESULT, RunStats, iter_results
+)
+from cpanel.compat import queue
+
+
+ShardResult = namedtuple(
+    'ShardResult', ('hostname', 'method', 'args', 'result', 'error')
+)
+
+
+class WorkerExitedError(Exception):
+    """
+    A worker process died before finishing its tasks, e.g. killed or out
+    of memory.
+    """
+
+
+class RemoteError(Exception):
+    """
+    Stands in for an exception raised in a worker process which can't be
+    sent back to the parent as is.
+    """
+    type_name = None
+
+    def __init__(self, type_name, message):
+        super(RemoteError, self).__init__(
+            '{}: {}'.format(type_name, message)
+        )
+        self.type_name = type_name
+
+    def __reduce__(self):
+        message = str(self).split(': ', 1)[-1]
+        return type(self), (self.type_name, message)
+
+
+def _portable(error):
+    """
+    :type error: Exception
+
+    :returns: The error or a ``RemoteError`` if it doesn't survive
+    pickling.
+    :rtype: Exception
+    """
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        return RemoteError(type(error).__name__, error)
+    return error
+
+
+def _method_name(method):
+    """
+    :type method: str
+
+    :rtype: str
+    """
+    return method if isinstance(method, str) else method.__name__
+
+
+def _work(index, hosts, client_class, threads, tasks, results):
+    """
+    Runs in each worker process: calls its tasks with one client per host,
+    on a few threads sharing the clients.
+
+    :param index: The worker's index, sent with its ``DONE`` message.
+    :type index: int
+    :param hosts: Keyword arguments of the clients of the worker's hosts,
+    by hostname.
+    :type hosts: dict
+    :type client_class: type
+    :type threads: int
+    :type tasks: multiprocessing.Queue
+    :type results: multiprocessing.Queue
+    """
+    clients = {}
+    clients_lock = threading.Lock()
+
+    def get_client(hostname):
+        with clients_lock:
+            client = clients.get(hostname)
+            if client is None:
+                client = clients[hostname] = client_class(**hosts[hostname])
+            return client
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            hostname, method, args, kwargs = task
+            try:
+                client = get_client(hostname)
+                if callable(method):
+                    result = method(client, *args, **kwargs)
+                else:
+                    result = getattr(client, method)(*args, **kwargs)
+            except Exception as e:
+                results.put((RESULT, ShardResult(
+                    hostname, _method_name(method), args, None, _portable(e)
+                )))
+            else:
+                results.put((RESULT, ShardResult(
+                    hostname, _method_name(method), args, result, None
+                )))
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.daemon = True
+        thread.start()
+    for thread in pool:
+        thread.join()
+    for client in clients.values():
+        client.close()
+    results.put((DONE, index))
+
+
+class ShardedExecutor(object):
+    """
+    Runs API calls against many WHM servers on a pool of processes, so
+    decoding responses and the rest of the client's work scale with the
+    available cores rather than share one interpreter.
+
+    Hosts are split between the processes, each process calling the tasks
+    of its hosts on a few threads sharing one pooled client per host.
+    Results come back through a bounded queue as they complete, so a slow
+    consumer holds the workers back instead of piling up results::
+
+        executor = ShardedExecutor(hosts, processes=4)
+        tasks = ((host['hostname'], 'limitbw', (user, 'unlimited'))
+                 for host, user in accounts)
+        for res in executor.run(tasks):
+            if res.error:
+                print(res.hostname, res.args, res.error)
+        print(executor.get_stats())
+
+    A task's method is either a client method name or a module level
+    function taking the client first, e.g. to reduce a response in the
+    worker rather than send all of it back. Results and errors must be
+    picklable, errors which aren't are sent back as ``RemoteError``.
+    """
+    hosts = None
+    processes = None
+    threads = None
+    queue_size = None
+    client_class = None
+
+    def __init__(self, hosts, processes=None, threads=4, queue_size=1000,
+                 client_class=WHMAPIClient):
+        """
+        :param hosts: Dictionaries of keyword arguments to create the
+        clients from, in each worker process. Clients can't be shared
+        between processes.
+        :type hosts: list
+        :param processes: The number of worker processes, defaults to the
+        number of cores, or of hosts if fewer.
+        :type processes: int
+        :param threads: The number of threads calling tasks in each
+        worker process.
+        :type threads: int
+        :param queue_size: The maximum number of tasks waiting for each
+        worker and of results waiting for the consumer.
+        :type queue_size: int
+        :param client_class: The client class to create clients with,
+        importable by the worker processes.
+        :type client_class: type
+        """
+        self.hosts = dict((host['hostname'], host) for host in hosts)
+        self.processes = min(
+            processes or multiprocessing.cpu_count(), len(self.hosts)
+        ) or 1
+        self.threads = threads
+        self.queue_size = queue_size
+        self.client_class = client_class
+
+        # Hosts are dealt to the workers in turn.
+        self._shards = dict(
+            (hostname, index % self.processes)
+            for index, hostname in enumerate(sorted(self.hosts))
+        )
+        self._stats = RunStats('tasks', 'hosts')
+
+    def get_shard(self, hostname):
+        """
+        :returns: The index of the worker process calling the tasks of
+        the host.
+        :rtype: int
+        """
+        return self._shards[hostname]
+
+    def _feed(self, tasks, queues, results, cancelled):
+        """
+        Deals the tasks to the workers' queues, then tells them to stop.
+        """
+
+        def put(target, item):
+            while not cancelled.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            for task in tasks:
+                if cancelled.is_set():
+                    return
+                hostname, method, args = task[:3]
+                kwargs = task[3] if len(task) > 3 else {}
+                shard = self._shards.get(hostname)
+                if shard is None:
+                    put(results, (RESULT, ShardResult(
+                        hostname, _method_name(method), args, None,
+                        KeyError('Unknown host {}.'.format(hostname))
+                    )))
+                    continue
+                put(queues[shard], (hostname, method, args, kwargs))
+        except Exception as e:
+            # Iterating the tasks raised, which ends the run.
+            put(results, (ERROR, _portable(e)))
+        finally:
+            for tasks_queue in queues:
+                for _ in range(self.threads):
+                    put(tasks_queue, None)
+
+    def run(self, tasks):
+        """
+        Calls the tasks on the worker processes.
+
+        :param tasks: ``(hostname, method, args)`` or ``(hostname, method,
+        args, kwargs)`` tuples. A feeder thread reads them only as fast
+        as the workers' queues have room.
+        :type tasks: iterable
+
+        :raises WorkerExitedError: when a worker process died.
+
+        :returns: A ``ShardResult`` per task, in order of completion.
+        :rtype: generator
+        """
+        self._stats.start()
+
+        results = multiprocessing.Queue(self.queue_size)
+        queues = [multiprocessing.Queue(self.queue_size)
+                  for _ in range(self.processes)]
+        workers = []
+        for index, tasks_queue in enumerate(queues):
+            hosts = dict(
+                (hostname, host) for hostname, host in self.hosts.items()
+                if self._shards[hostname] == index
+            )
+            process = multiprocessing.Process(target=_work, args=(
+                index, hosts, self.client_class, self.threads, tasks_queue,
+                results
+            ))
+            process.daemon = True
+            process.start()
+            workers.append(process)
+
+        cancelled = threading.Event()
+        feeder = threading.Thread(
+            target=self._feed, args=(tasks, queues, results, cancelled)
+        )
+        feeder.daemon = True
+        feeder.start()
+
+        running = set(range(self.processes))
+
+        def check_workers():
+            for index in running:
+                if not workers[index].is_alive():
+                    raise WorkerExitedError(
+                        'Worker {} exited with code {}.'.format(
+                            index, workers[index].exitcode
+                        )
+                    )
+
+        try:
+            for result in iter_results(results, running,
+                                       check=check_workers):
+                self._stats.add_to_group(result.hostname,
+                                         failed=result.error is not None)
+                self._stats.add(result.error)
+                yield result
+        finally:
+            cancelled.set()
+            # Whatever is left in the queues is of no use anymore.
+            for pending in queues + [results]:
+                pending.cancel_join_thread()
+            for process in workers:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            feeder.join()
+
+    def get_stats(self):
+        """
+        May be polled from another thread, e.g. to report progress, while
+        ``run`` is yielding results; after the run it describes the whole
+        run.
+
+        :returns: The number of ``tasks`` completed and ``failed``, the
+        ``ok`` and ``failed`` counts of each of the ``hosts``, the counts
+        of ``errors`` by exception type, the ``elapsed`` seconds and the
+        throughput in tasks per second as ``rate``.
+        :rtype: dict
+        """
+        return self._stats.get()
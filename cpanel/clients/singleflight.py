@@ -0,0 +1,76 @@
+# coding=utf-8
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical calls made concurrently by several threads.
+
+    The first caller of a key runs the call, callers arriving while it is
+    in flight wait for it and share its result, or its exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'coalesced': 0,
+        }
+
+    def do(self, key, func):
+        """
+        :param key: Identifies the call, e.g. endpoint and parameters.
+        :type key: tuple
+        :param func: Makes the call, taking no arguments.
+        :type func: callable
+
+        :returns: The call's result and whether it was shared with an
+        earlier caller.
+        :rtype: tuple
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def get_stats(self):
+        """
+        :returns: Counters of ``calls`` made and ``coalesced`` ones which
+        shared another call's result, and the number ``in_flight``.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
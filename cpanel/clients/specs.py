@@ -0,0 +1,223 @@
+# coding=utf-8
+"""
+Declarations of the WHM API 1 functions without hand written client
+methods, see ``cpanel.clients.endpoints.Endpoint.from_spec``.
+
+Each row holds the function name, the HTTP request type, its parameters
+and optionally the keyword arguments of ``Endpoint``. A parameter is
+either its name, required, or a ``(name, default)`` pair. The argument
+name of the client method is the parameter name unless given as
+``name:argument``. The ``param_docs`` option gives the type and a
+description of the arguments for the method's docstring. Rows are only
+turned into endpoints, and methods, when first used.
+"""
+
+ZONE_TEMPLATES = ('standard', 'simple', 'standardvirtualftp')
+CUSTOM_ZONE_TEMPLATES = '/var/cpanel/zonetemplates/'
+
+
+def _validate_adddns(params):
+    template = params.get('template')
+    if (template is not None and template not in ZONE_TEMPLATES
+            and not template.startswith(CUSTOM_ZONE_TEMPLATES)):
+        raise ValueError('Unknown zone template {}.'.format(template))
+
+
+UNLIMITED = ('A positive integer between one and 999,999, or 0 or '
+             '``unlimited`` for no limit.')
+
+SPECS = (
+    ('abort_transfer_session', 'GET', ('transfer_session_id', ), {
+        'doc': 'Aborts an active transfer session.',
+        'param_docs': {
+            'transfer_session_id': ('str', "The transfer session's ID."),
+        },
+    }),
+    ('accesshash', 'GET', ('user', ('generate', False)), {
+        'doc': "Regenerates or retrieves a user's access hash.",
+        'cacheable': lambda params: not params.get('generate'),
+        'param_docs': {
+            'user': ('str', "The user's name."),
+            'generate': ('bool', 'Whether to regenerate the access hash.'),
+        },
+    }),
+    ('accountsummary', 'GET', ('user', 'domain'), {
+        'doc': "Retrieves a summary of a user's account.",
+        'cacheable': True,
+        'param_docs': {
+            'user': ('str', "The account's username."),
+            'domain': ('str', "The account's main domain."),
+        },
+    }),
+    ('acctcounts', 'GET', (('user', None), ), {
+        'doc': "Lists a reseller's total accounts, suspended accounts, "
+               "and account creation limit.",
+        'cacheable': True,
+        'param_docs': {
+            'user': ('str', "A reseller's username, the authenticated "
+                            "user's when not given."),
+        },
+    }),
+    ('add_configclusterserver', 'POST', ('name', 'user', 'key'), {
+        'doc': 'Adds a remote server to the configuration cluster.',
+        'param_docs': {
+            'name': ('str', "The remote server's name."),
+            'user': ('str', "The username of the server's root-level "
+                            "account."),
+            'key': ('str', "The server's remote access key."),
+        },
+    }),
+    ('adddns', 'POST', ('domain', 'ip', ('template', None),
+                        ('trueowner', None)), {
+        'doc': 'Creates a DNS zone from the standard or a custom zone '
+               'template.',
+        'validate': _validate_adddns,
+        'param_docs': {
+            'domain': ('str', "The new zone's domain."),
+            'ip': ('str', "The domain's IP address."),
+            'template': ('str', 'The zone template, one of ``standard``, '
+                                '``simple``, ``standardvirtualftp`` or a '
+                                'custom template file in {}. The standard '
+                                'one when not given.'.format(
+                                    CUSTOM_ZONE_TEMPLATES)),
+            'trueowner': ('str', "The zone owner's cPanel or WHM "
+                                 "username."),
+        },
+    }),
+    ('addips', 'POST', ('ips', 'netmask', ('excludes', None)), {
+        'doc': 'Adds an IP address or addresses to the server.',
+        'param_docs': {
+            'ips': ('list', 'The IPv4 addresses or ranges in Class C CIDR '
+                            'format.'),
+            'netmask': ('str', "The addresses' netmask."),
+            'excludes': ('list', 'IPv4 addresses of the ranges to '
+                                 'exclude.'),
+        },
+    }),
+    ('addpkg', 'POST', (
+        'name', ('featurelist', 'default'), ('quota', 'unlimited'),
+        ('ip', 'n'), ('cgi', True), ('frontpage', True), ('cpmod', None),
+        ('language', 'EN'), ('maxftp', 'unlimited'), ('maxsql', 'unlimited'),
+        ('maxpop', 'unlimited'), ('maxlists', 'unlimited'),
+        ('maxsub', 'unlimited'), ('maxpark', 'unlimited'),
+        ('maxaddon', 'unlimited'), ('hasshell', False),
+        ('bwlimit', 'unlimited'), ('MAX_EMAIL_PER_HOUR', 'unlimited'),
+        ('MAX_DEFER_FAIL_PERCENTAGE', 'unlimited'), ('digestauth', False),
+        ('_PACKAGE_EXTENSIONS', None),
+    ), {
+        'doc': 'Creates a hosting plan (package).',
+        'param_docs': {
+            'name': ('str', "The new hosting plan's name."),
+            'featurelist': ('str', "The hosting plan's feature list."),
+            'quota': ('str', 'The disk space quota in MB, 0 or '
+                             '``unlimited`` for no limit.'),
+            'ip': ('str', 'Whether accounts get a dedicated IP address, '
+                          '``y`` or ``n``.'),
+            'cgi': ('bool', 'Whether CGI access is enabled.'),
+            'frontpage': ('bool', 'Whether Microsoft FrontPage Extensions '
+                                  'are enabled.'),
+            'cpmod': ('str', 'The cPanel theme, e.g. ``paper_lantern``, '
+                             "the server's default when not given."),
+            'language': ('str', 'The default locale, a two-letter '
+                                'ISO-3166 code.'),
+            'maxftp': ('str', 'The maximum number of FTP accounts. ' +
+                       UNLIMITED),
+            'maxsql': ('str', 'The maximum number of databases of each '
+                              'available type. ' + UNLIMITED),
+            'maxpop': ('str', 'The maximum number of email accounts. ' +
+                       UNLIMITED),
+            'maxlists': ('str', 'The maximum number of mailing lists. ' +
+                         UNLIMITED),
+            'maxsub': ('str', 'The maximum number of subdomains. ' +
+                       UNLIMITED),
+            'maxpark': ('str', 'The maximum number of parked domains. ' +
+                        UNLIMITED),
+            'maxaddon': ('str', 'The maximum number of addon domains. ' +
+                         UNLIMITED),
+            'hasshell': ('bool', 'Whether accounts have shell access.'),
+            'bwlimit': ('str', 'The maximum bandwidth use in MB, 0 or '
+                               '``unlimited`` for no limit.'),
+            'MAX_EMAIL_PER_HOUR': ('str', 'The maximum number of emails an '
+                                          'account sends per hour, 0 or '
+                                          '``unlimited`` for no limit.'),
+            'MAX_DEFER_FAIL_PERCENTAGE': ('str', 'The percentage of failed '
+                                                 'or deferred messages per '
+                                                 'hour before outgoing mail '
+                                                 'is rate-limited, 0 or '
+                                                 '``unlimited`` for no '
+                                                 'limit.'),
+            'digestauth': ('bool', 'Whether Digest Authentication is '
+                                   'enabled.'),
+            '_PACKAGE_EXTENSIONS': ('list', 'The package extensions, none '
+                                            'when not given.'),
+        },
+    }),
+    # ptrdname stays fourth, where the former reverse DNS only method took
+    # it. The other record data is best passed by keyword.
+    ('addzonerecord', 'POST', (
+        'zone', 'name', 'type:_type', ('ptrdname', None),
+        ('class:_class', 'IN'), ('ttl', None), ('address', None),
+        ('cname', None), ('txtdata', None), ('exchange', None),
+        ('preference', None),
+    ), {
+        'doc': 'Adds a DNS zone record, e.g. a PTR record for reverse DNS.',
+        'param_docs': {
+            'zone': ('str', "The zone's domain, e.g. "
+                            "``1.168.192.in-addr.arpa`` for reverse DNS."),
+            'name': ('str', "The record's name, the last octet of the IP "
+                            "address for a PTR record."),
+            '_type': ('str', 'The record type, e.g. ``A`` or ``PTR``.'),
+            'ptrdname': ('str', 'The hostname a PTR record points to.'),
+            '_class': ('str', 'The record class.'),
+            'ttl': ('int', "The record's time to live in seconds."),
+            'address': ('str', 'The IP address of an A or AAAA record.'),
+            'cname': ('str', 'The canonical name of a CNAME record.'),
+            'txtdata': ('str', 'The text of a TXT record.'),
+            'exchange': ('str', 'The mail exchanger of an MX record.'),
+            'preference': ('int', 'The priority of an MX record.'),
+        },
+    }),
+    ('analyze_transfer_session_remote', 'GET', ('transfer_session_id', ), {
+        'doc': "Checks the remote server's credentials, which a transfer "
+               "session uses to connect.",
+        'idempotent': True,
+        'param_docs': {
+            'transfer_session_id': ('str', "The transfer session's ID."),
+        },
+    }),
+    ('applist', 'GET', (), {
+        'doc': 'Lists the API functions the authenticated user may call.',
+        'cacheable': True,
+    }),
+    ('createacct', 'GET', ('username', 'domain', ('plan', None),
+                           ('password', None), ('contactemail', None)), {
+        'doc': 'Creates a hosting account and sets up its domain.',
+        'invalidates': ('listaccts', 'acctcounts'),
+        'param_docs': {
+            'username': ('str', "The account's username."),
+            'domain': ('str', "The account's main domain."),
+            'plan': ('str', "The account's hosting plan."),
+            'password': ('str', "The account's password."),
+            'contactemail': ('str', "The account's contact email "
+                                    "address."),
+        },
+    }),
+    ('limitbw', 'GET', ('user', ('bwlimit', 'unlimited')), {
+        'doc': "Modifies an account's bandwidth usage (transfer) limit.",
+        'invalidates': ('listaccts', ),
+        'param_docs': {
+            'user': ('str', "The account's username."),
+            'bwlimit': ('str', 'The bandwidth limit in MB, 0 or '
+                               '``unlimited`` for no limit.'),
+        },
+    }),
+    ('passwd', 'GET', ('user', 'pass:password', ('db_pass_update', True)), {
+        'doc': 'Changes the password of a cPanel or WHM account.',
+        'param_docs': {
+            'user': ('str', "The account's username."),
+            'password': ('str', 'The new password.'),
+            'db_pass_update': ('bool', "Whether to change the account's "
+                                       "MySQL password too."),
+        },
+    }),
+)
@@ -0,0 +1,205 @@
+# coding=utf-8
+import codecs
+import json
+
+from cpanel.clients.endpoints import get_proxy_method
+
+
+class PathNotFoundError(ValueError):
+    """
+    The streamed response does not hold an array at the requested path,
+    typically because the call failed. ``document`` holds the top-level
+    values that were read, e.g. ``metadata``.
+    """
+    document = None
+
+    def __init__(self, path, document):
+        super(PathNotFoundError, self).__init__(
+            'No array at {} in response: {}'.format('.'.join(path), document)
+        )
+        self.document = document
+
+
+class _Scanner(object):
+    """
+    Reads JSON text from an iterable of byte chunks, keeping only the not
+    yet consumed part in memory.
+    """
+    WHITESPACE = ' \t\n\r'
+    # Characters which may continue a number.
+    NUMBER = '0123456789.eE+-'
+    COMPACT_AT = 64 * 1024
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._eof = False
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self):
+        """
+        :returns: Whether more text was read.
+        :rtype: bool
+        """
+        if self._eof:
+            return False
+        if self.pos > self.COMPACT_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        self.buf += self._decoder.decode(b'', True)
+        self._eof = True
+        return True
+
+    def drain(self):
+        """
+        Reads the rest of the input, so the connection it comes from can be
+        reused.
+        """
+        for _ in self._chunks:
+            pass
+        self._eof = True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, ``''`` at the end.
+
+        :rtype: str
+        """
+        while True:
+            while (self.pos < len(self.buf)
+                   and self.buf[self.pos] in self.WHITESPACE):
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        """
+        :type chars: str
+
+        :rtype: str
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('Expected one of {!r} at offset {}, got {!r}.'
+                             .format(chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decodes the next complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut by the chunk's end, e.g. ``1.`` of ``1.5``, is
+            # decoded up to the cut.
+            if ((end == len(self.buf) or self.buf[end] in self.NUMBER)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, path):
+    """
+    Incrementally parses a JSON document and yields the items of the
+    array found at ``path``, one at a time.
+
+    Only the item being decoded is held in memory, not the whole body nor
+    the whole decoded document.
+
+    :param chunks: The raw response body, as an iterable of byte chunks.
+    :param path: The keys leading to the array, e.g. ``('data', 'acct')``.
+    :type path: tuple
+
+    :rtype: generator
+    """
+    scanner = _Scanner(chunks)
+    skipped = {}
+    depth = 0
+
+    scanner.expect('{')
+    while depth < len(path):
+        if scanner.peek() == '}':
+            scanner.drain()
+            raise PathNotFoundError(path, skipped)
+        key = scanner.value()
+        scanner.expect(':')
+        if key != path[depth]:
+            value = scanner.value()
+            if depth == 0:
+                skipped[key] = value
+            if scanner.expect(',}') == '}':
+                scanner.drain()
+                raise PathNotFoundError(path, skipped)
+            continue
+        depth += 1
+        expected = '{' if depth < len(path) else '['
+        if scanner.peek() != expected:
+            scanner.drain()
+            raise PathNotFoundError(path, skipped)
+        scanner.expect(expected)
+
+    if scanner.peek() != ']':
+        while True:
+            yield scanner.value()
+            if scanner.expect(',]') == ']':
+                break
+    else:
+        scanner.expect(']')
+    scanner.drain()
+
+
+class WHMStream(object):
+    """
+    Calls API methods with their usual signature but returns a generator
+    over the records found at ``path`` of the response, decoded while the
+    body is read from the socket::
+
+        for app in client.stream('data.app').applist():
+            ...
+    """
+    client = None
+    path = None
+
+    def __init__(self, client, path):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        :param path: Dotted path or tuple of keys to the records array.
+        :type path: str
+        """
+        if not isinstance(path, tuple):
+            path = tuple(path.split('.'))
+        self.client = client
+        self.path = path
+
+    def __getattr__(self, name):
+        return get_proxy_method(self, type(self.client), name)
+
+    def _query(self, request_type, endpoint, data):
+        """
+        :rtype: generator
+        """
+        url, payload, headers = self.client._build_request(
+            request_type, endpoint, data
+        )
+        return iter_json_array(
+            self.client._request_chunks(request_type, url, payload, headers,
+                                        endpoint=endpoint),
+            self.path
+        )
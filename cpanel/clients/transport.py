@@ -0,0 +1,194 @@
+# coding=utf-8
+"""
+Transports plug in under a client's retries, governor and cache, in place
+of sending requests over its connection pool::
+
+    recorder = RecordingTransport('whm.cassette')
+    client = WHMAPIClient('host', 'root', 'secret', transport=recorder)
+    ...
+    recorder.close()
+
+    client = WHMAPIClient('host', 'root', 'secret',
+                          transport=ReplayTransport('whm.cassette'))
+"""
+import hashlib
+import itertools
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+from cpanel.compat import urllib
+
+MAGIC = b'WHMCASS1'
+# Key digest, status and body length of every recorded response.
+RECORD = struct.Struct('>20sHI')
+
+_SESSION_PREFIX = re.compile(r'^/cpsess\d+')
+
+
+class CassetteMissError(LookupError):
+    """
+    The cassette holds no response to the request.
+    """
+
+
+def make_key(request_type, url, payload=None, headers=None):
+    """
+    Digest identifying a request regardless of the session it's sent in
+    and of the compression of its body.
+
+    :type request_type: str
+    :type url: str
+    :type payload: bytes
+    :type headers: dict
+
+    :rtype: bytes
+    """
+    url = _SESSION_PREFIX.sub('', url)
+    if payload is not None and (headers or {}).get(
+            'Content-Encoding') == 'gzip':
+        payload = zlib.decompress(payload, 16 + zlib.MAX_WBITS)
+    digest = hashlib.sha1()
+    digest.update('{} {}\n'.format(request_type, url).encode('utf-8'))
+    digest.update(payload or b'')
+    return digest.digest()
+
+
+class Transport(object):
+    """
+    Base class of transports, sends requests over the client's connection
+    pool.
+    """
+
+    def send(self, client, request_type, url, payload=None, headers=None,
+             event=None):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :type event: cpanel.clients.instrumentation.RequestEvent
+
+        :returns: The response status and decoded body.
+        :rtype: tuple
+        """
+        return client._send_http(request_type, url, payload, headers, event)
+
+    def close(self):
+        pass
+
+
+class RecordingTransport(Transport):
+    """
+    Sends requests for real and appends every response to a cassette
+    file, flushed as it's recorded.
+
+    The cassette is a sequence of ``RECORD`` headers each followed by
+    the raw response body, after the ``MAGIC`` bytes.
+    """
+    path = None
+
+    def __init__(self, path):
+        """
+        :param path: The cassette, appended to if it exists.
+        :type path: str
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+
+    def send(self, client, request_type, url, payload=None, headers=None,
+             event=None):
+        status, body = super(RecordingTransport, self).send(
+            client, request_type, url, payload, headers, event
+        )
+        key = make_key(request_type, url, payload, headers)
+        with self._lock:
+            self._file.write(RECORD.pack(key, status, len(body)))
+            self._file.write(body)
+            self._file.flush()
+        return status, body
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Serves the responses of a cassette, without any network.
+
+    The cassette is memory-mapped and indexed once, bodies are only read
+    when served. Requests recorded more than once get their responses in
+    recorded order, starting over after the last one.
+    """
+    path = None
+    latency = None
+
+    def __init__(self, path, latency=None):
+        """
+        :type path: str
+        :param latency: Seconds each response is delayed by, or a callable
+        taking the URL and returning them, to simulate a server.
+        :type latency: float
+        """
+        self.path = path
+        self.latency = latency
+        self._index = {}
+        self._counters = {}
+
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError('{} is not a cassette.'.format(path))
+
+        offset = len(MAGIC)
+        while offset + RECORD.size <= size:
+            key, status, length = RECORD.unpack_from(self._map, offset)
+            offset += RECORD.size
+            if offset + length > size:
+                # Cut short while being recorded.
+                break
+            self._index.setdefault(key, []).append((status, offset, length))
+            offset += length
+        for key in self._index:
+            self._counters[key] = itertools.count()
+
+    def __len__(self):
+        return sum(len(responses) for responses in self._index.values())
+
+    def send(self, client, request_type, url, payload=None, headers=None,
+             event=None):
+        key = make_key(request_type, url, payload, headers)
+        responses = self._index.get(key)
+        if responses is None:
+            raise CassetteMissError('No recorded response to {} {}'.format(
+                request_type, urllib.unquote(url)
+            ))
+        status, offset, length = responses[
+            next(self._counters[key]) % len(responses)
+        ]
+
+        latency = self.latency
+        if callable(latency):
+            latency = latency(url)
+        if latency:
+            time.sleep(latency)
+
+        if event is not None:
+            event.status = status
+            event.response_bytes = length
+        return status, self._map[offset:offset + length]
+
+    def close(self):
+        self._map.close()
@@ -0,0 +1,417 @@
+# coding=utf-8
+from collections import namedtuple
+import hashlib
+import heapq
+import itertools
+import json
+import struct
+import threading
+from timeit import default_timer
+import zlib
+
+from cpanel.clients.cache import ResponseCache
+from cpanel.clients.endpoints import get_endpoint
+from cpanel.compat import intern
+
+
+ChangeEvent = namedtuple(
+    'ChangeEvent', ('endpoint', 'params', 'added', 'removed', 'modified')
+)
+
+
+def flatten(value, prefix='', fields=None):
+    """
+    Flattens a decoded response into its leaf values by dotted path, e.g.
+    ``acct.0.suspended``. Empty lists and dictionaries are leaves.
+
+    :type value: dict
+    :type prefix: str
+    :type fields: dict
+
+    :rtype: dict
+    """
+    if fields is None:
+        fields = {}
+    if isinstance(value, dict) and value:
+        items = value.items()
+    elif isinstance(value, list) and value:
+        items = enumerate(value)
+    else:
+        fields[prefix] = value
+        return fields
+    for key, item in items:
+        flatten(item, '{}.{}'.format(prefix, key) if prefix else str(key),
+                fields)
+    return fields
+
+
+def _field_hash(value):
+    """
+    :rtype: int
+    """
+    if isinstance(value, (dict, list)):
+        # Only empty ones are leaves.
+        return hash(type(value).__name__)
+    # Tells apart e.g. 1, 1.0 and True.
+    return hash((type(value).__name__, value))
+
+
+def _pack(hashes):
+    """
+    :rtype: bytes
+    """
+    return struct.pack('{}q'.format(len(hashes)), *hashes)
+
+
+def _unpack(packed):
+    """
+    :rtype: tuple
+    """
+    return struct.unpack('{}q'.format(len(packed) // 8), packed)
+
+
+class _Target(object):
+    __slots__ = ('endpoint', 'request_type', 'params', 'digest', 'layout',
+                 'hashes')
+
+    def __init__(self, endpoint, request_type, params):
+        self.endpoint = endpoint
+        self.request_type = request_type
+        self.params = params
+        # Digest of the last raw response body.
+        self.digest = None
+        # The sorted field paths, shared by targets of the same shape, and
+        # the packed hashes of their values.
+        self.layout = None
+        self.hashes = None
+
+
+class ChangeWatcher(object):
+    """
+    Polls read endpoints on an interval and tells subscribers which fields
+    of their responses changed, instead of handing over whole responses
+    to compare::
+
+        def on_change(event):
+            print(event.params['user'], event.modified, event.removed)
+
+        watcher = ChangeWatcher(client, interval=300)
+        watcher.subscribe(on_change)
+        for user in users:
+            watcher.watch('accountsummary', {'user': user})
+            watcher.watch('acctcounts', {'user': user})
+        watcher.start()
+
+    Only a digest of each response is kept. A response whose body did not
+    change costs one hash comparison, others are decoded and their
+    ``data`` compared field by field against hashes of the previous
+    values. Events carry the ``added`` and ``modified`` fields with their
+    new values, by dotted path, and the ``removed`` paths.
+
+    Each target is first polled at a fixed offset into the interval,
+    derived from its endpoint and parameters, then once per interval, so
+    the polls of many targets are spread out instead of coming in bursts.
+    A target whose poll falls behind by more than an interval skips the
+    missed polls rather than catching up.
+
+    Subscribers are called from the polling threads. Failed polls, and
+    failures WHM reports, are counted and leave the target's state as it
+    was, to compare with on the next poll.
+    """
+    client = None
+    interval = None
+    max_workers = None
+    emit_initial = False
+
+    def __init__(self, client, interval=300.0, max_workers=4,
+                 emit_initial=False):
+        """
+        :type client: cpanel.clients.whm_api_client.WHMAPIClient
+        :param interval: Seconds between two polls of a target.
+        :type interval: float
+        :param max_workers: The number of polling threads.
+        :type max_workers: int
+        :param emit_initial: Whether the first poll of a target emits all
+        its fields as added, rather than only recording them.
+        :type emit_initial: bool
+        """
+        self.client = client
+        self.interval = interval
+        self.max_workers = max_workers
+        self.emit_initial = emit_initial
+
+        self._targets = {}
+        self._layouts = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._running = False
+        self._stats = {
+            'polls': 0,
+            'unchanged': 0,
+            'changed': 0,
+            'errors': 0,
+            'subscriber_errors': 0,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def subscribe(self, callback):
+        """
+        :param callback: Called with a ``ChangeEvent`` for every change.
+        :type callback: callable
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        :type callback: callable
+        """
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def watch(self, endpoint, params=None):
+        """
+        Starts polling an endpoint with the given parameters. Watching it
+        again does nothing.
+
+        :param endpoint: The API function name, e.g. ``accountsummary``.
+        :type endpoint: str
+        :param params: The request parameters.
+        :type params: dict
+
+        :raises ValueError: when the endpoint does not only read, polling
+        it would change the server.
+        """
+        spec = get_endpoint(endpoint)
+        params = dict(params or {})
+        if spec is None or not spec.is_cacheable(params):
+            raise ValueError('{} cannot be watched, it is not a read '
+                             'endpoint.'.format(endpoint))
+        key = ResponseCache.make_key(endpoint, params)
+        offset = (zlib.crc32(repr(key).encode('utf-8')) & 0xffffffff
+                  ) / float(2 ** 32) * self.interval
+        with self._lock:
+            if key in self._targets:
+                return
+            self._targets[key] = _Target(endpoint, spec.request_type, params)
+            heapq.heappush(self._schedule, (
+                default_timer() + offset, next(self._sequence), key
+            ))
+            self._wakeup.notify()
+
+    def unwatch(self, endpoint, params=None):
+        """
+        Stops polling an endpoint with the given parameters.
+
+        :type endpoint: str
+        :type params: dict
+        """
+        key = ResponseCache.make_key(endpoint, params or {})
+        with self._lock:
+            # Its schedule entry is dropped when due.
+            self._targets.pop(key, None)
+
+    def __len__(self):
+        return len(self._targets)
+
+    def poll(self, endpoint, params=None):
+        """
+        Polls a watched target right away, notifying subscribers of any
+        change. Its schedule is left as is.
+
+        :type endpoint: str
+        :type params: dict
+
+        :raises KeyError: when the target is not watched.
+
+        :returns: The change or ``None``.
+        :rtype: ChangeEvent
+        """
+        key = ResponseCache.make_key(endpoint, params or {})
+        with self._lock:
+            target = self._targets[key]
+        return self._poll(target, raise_errors=True)
+
+    def _poll(self, target, raise_errors=False):
+        """
+        :type target: _Target
+        :param raise_errors: Whether to raise failures to poll rather than
+        only count them.
+        :type raise_errors: bool
+
+        :rtype: ChangeEvent
+        """
+        try:
+            body = self.client._query(
+                target.request_type, target.endpoint, target.params,
+                decode=False
+            )
+            digest = hashlib.sha1(body).digest()
+            if digest == target.digest:
+                self._count('unchanged')
+                return None
+
+            response = json.loads(body)
+            if not (response.get('metadata') or {}).get('result'):
+                raise ValueError('{} failed: {}'.format(
+                    target.endpoint, response.get('metadata')
+                ))
+        except Exception:
+            self._count('errors')
+            if raise_errors:
+                raise
+            return None
+
+        fields = flatten(response.get('data'))
+        layout = tuple(sorted(fields))
+        hashes = _pack([_field_hash(fields[path]) for path in layout])
+        with self._lock:
+            shared = self._layouts.get(layout)
+            if shared is None:
+                shared = tuple(intern(path) for path in layout)
+                self._layouts[shared] = shared
+            layout = shared
+            changes = self._diff(target, fields, layout, hashes)
+            target.digest = digest
+            target.layout = layout
+            target.hashes = hashes
+            self._stats['polls'] += 1
+            self._stats['changed' if changes else 'unchanged'] += 1
+            subscribers = list(self._subscribers)
+        if not changes:
+            return None
+
+        event = ChangeEvent(target.endpoint, target.params, *changes)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                self._count('subscriber_errors')
+        return event
+
+    def _diff(self, target, fields, layout, hashes):
+        """
+        :returns: The added fields, removed paths and modified fields, or
+        ``None`` when nothing changed.
+        :rtype: tuple
+        """
+        if target.layout is None:
+            if not self.emit_initial:
+                return None
+            return fields, (), {}
+
+        if target.layout is layout:
+            if target.hashes == hashes:
+                return None
+            modified = dict(
+                (path, fields[path]) for path, old, new
+                in zip(layout, _unpack(target.hashes), _unpack(hashes))
+                if old != new
+            )
+            return {}, (), modified
+
+        previous = dict(zip(target.layout, _unpack(target.hashes)))
+        added = {}
+        modified = {}
+        for path, new in zip(layout, _unpack(hashes)):
+            old = previous.pop(path, None)
+            if old is None:
+                added[path] = fields[path]
+            elif old != new:
+                modified[path] = fields[path]
+        return added, tuple(sorted(previous)), modified
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+            if name != 'subscriber_errors':
+                self._stats['polls'] += 1
+
+    def _next_due(self):
+        """
+        Waits for the next target due to be polled.
+
+        :returns: The target and when it was due, or ``None`` once
+        stopped.
+        :rtype: tuple
+        """
+        with self._lock:
+            while self._running:
+                timeout = None
+                if self._schedule:
+                    due, _, key = self._schedule[0]
+                    timeout = due - default_timer()
+                    if timeout <= 0:
+                        heapq.heappop(self._schedule)
+                        target = self._targets.get(key)
+                        if target is not None:
+                            return key, target, due
+                        continue
+                self._wakeup.wait(timeout)
+        return None
+
+    def _work(self):
+        while True:
+            due = self._next_due()
+            if due is None:
+                return
+            key, target, due = due
+            self._poll(target)
+
+            due += self.interval
+            now = default_timer()
+            if due <= now:
+                due += ((now - due) // self.interval + 1) * self.interval
+            with self._lock:
+                if self._targets.get(key) is target:
+                    heapq.heappush(self._schedule, (
+                        due, next(self._sequence), key
+                    ))
+                    self._wakeup.notify()
+
+    def start(self):
+        """
+        Starts the polling threads.
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [threading.Thread(target=self._work)
+                         for _ in range(max(self.max_workers, 1))]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the polling threads, after their polls in progress.
+        """
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def get_stats(self):
+        """
+        :returns: The number of targets ``watched``, the counts of
+        ``polls``, of those ``unchanged`` and ``changed``, of failed ones as
+        ``errors``, and of ``subscriber_errors`` raised by subscribers.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['watched'] = len(self._targets)
+        return stats
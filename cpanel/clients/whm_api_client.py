@@ -1,34 +1,166 @@
 # coding=utf-8
-from base64 import b64encode
-import inspect
+import errno
+import io
 import json
-
-from cpanel.compat import urllib, HTTPSConnection
-
-
-class WHMAPIClient(object):
+import socket
+from timeit import default_timer
+import zlib
+
+from cpanel.clients.auth import SessionExpiredError, WHMSession
+from cpanel.clients.cache import ResponseCache
+from cpanel.clients.encoding import (
+    basic_auth_header, encode_params, token_auth_header
+)
+from cpanel.clients.endpoints import (
+    ClientType, endpoint, get_endpoint, get_method
+)
+from cpanel.clients.instrumentation import RequestEvent
+from cpanel.clients.pool import ConnectionPool
+from cpanel.clients.retry import ConnectError
+from cpanel.clients.singleflight import SingleFlight
+from cpanel.compat import BadStatusLine, RemoteDisconnected, with_metaclass
+
+
+class WHMAPIClient(with_metaclass(ClientType, object)):
+    """
+    Client of a WHM server's JSON API.
+
+    Besides the methods written out here, every function declared in
+    ``cpanel.clients.specs`` is available as a method, made on first use.
+
+    A client is safe to share between threads, e.g. all the threads of a
+    threaded WSGI worker. Its configuration is set once by the constructor
+    and only read afterwards, requests prepare their URL, body and headers
+    without touching shared state, and each request checks a connection
+    out of the pool for itself. The pool, cache, governor, retry budget
+    and histograms take a lock only around their own bookkeeping.
+
+    The pool keeps ``pool_maxsize`` idle connections. Bound the sockets
+    opened under load with ``pool_max_connections``, requests beyond it
+    wait for a connection to be free::
+
+        client = WHMAPIClient('host', 'root', 'secret', pool_maxsize=8,
+                              pool_max_connections=8)
+    """
     hostname = None
     port = None
     username = None
     password = None
     auth_header = None
+    session = None
+    pool = None
+    cache = None
+    single_flight = None
+    transport = None
+    instruments = ()
+    governor = None
+    retry_policy = None
+    connect_timeout = None
+    read_timeout = None
+    compress = False
     REQUEST_TYPE_GET = 'GET'
     REQUEST_TYPE_POST = 'POST'
     ALLOWED_REQUEST_TYPES = (REQUEST_TYPE_GET, REQUEST_TYPE_POST, )
-
-    def __init__(self, hostname, username, password, port=2087):
+    # Request bodies smaller than this aren't worth compressing.
+    COMPRESS_MIN_SIZE = 1024
+    # Request bodies bigger than this are sent in blocks.
+    STREAM_SIZE = 64 * 1024
+    GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+    def __init__(self, hostname, username, password, port=2087, pool=None,
+                 pool_maxsize=4, pool_idle_timeout=60.0, cache=None,
+                 instruments=None, governor=None, retry_policy=None,
+                 connect_timeout=None, read_timeout=None, compress=False,
+                 pool_max_connections=None, coalesce=False, api_token=None,
+                 session=False, transport=None):
         """
         :type hostname: str
         :type username: str
         :type password: str
         :type port: int
+        :param pool: A connection pool to share with other clients talking
+        to the same host. A private one is created when omitted.
+        :type pool: cpanel.clients.pool.ConnectionPool
+        :param pool_maxsize: The maximum number of idle keep-alive
+        connections of the private pool.
+        :type pool_maxsize: int
+        :param pool_idle_timeout: Seconds before an idle connection of the
+        private pool gets closed.
+        :type pool_idle_timeout: float
+        :param cache: Opt-in cache of read-only endpoint responses.
+        :type cache: cpanel.clients.cache.ResponseCache
+        :param instruments: Instruments notified of every call, see
+        ``cpanel.clients.instrumentation``.
+        :type instruments: list
+        :param governor: Rate and concurrency limits of the host, usually
+        shared by all its clients through
+        ``cpanel.clients.governor.get_governor``.
+        :type governor: cpanel.clients.governor.HostGovernor
+        :param retry_policy: Retries failed requests when given.
+        :type retry_policy: cpanel.clients.retry.RetryPolicy
+        :param connect_timeout: Seconds to wait for a connection, ``None``
+        uses the default socket timeout.
+        :type connect_timeout: float
+        :param read_timeout: Seconds to wait on each socket read of the
+        response, ``None`` uses the default socket timeout.
+        :type read_timeout: float
+        :param compress: Whether to gzip big request bodies and accept
+        gzipped responses.
+        :type compress: bool
+        :param pool_max_connections: The maximum number of connections of
+        the private pool in use at once, ``None`` for no limit.
+        :type pool_max_connections: int
+        :param coalesce: Whether concurrent identical calls to read-only
+        endpoints share a single request, see
+        ``cpanel.clients.singleflight.SingleFlight``.
+        :type coalesce: bool
+        :param api_token: A WHM API token of ``username`` to authenticate
+        with instead of the password.
+        :type api_token: str
+        :param session: Whether to log in once and authenticate requests
+        with the session instead of the password, see
+        ``cpanel.clients.auth.WHMSession``.
+        :type session: bool
+        :param transport: Sends the requests instead of the connection
+        pool, e.g. to record or replay them, see
+        ``cpanel.clients.transport``. Session logins always use the pool.
+        :type transport: cpanel.clients.transport.Transport
         """
         self.hostname = hostname
         self.username = username
         self.password = password
         self.port = port
-
-        self.set_auth_header(self.get_username(), self.get_password())
+        if pool is None:
+            pool = ConnectionPool(hostname, port, maxsize=pool_maxsize,
+                                  idle_timeout=pool_idle_timeout,
+                                  max_connections=pool_max_connections)
+        self.pool = pool
+        self.cache = cache
+        if coalesce:
+            self.single_flight = SingleFlight()
+        self.instruments = tuple(instruments or ())
+        self.governor = governor
+        self.retry_policy = retry_policy
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compress = compress
+        self.transport = transport
+
+        if api_token is not None:
+            self.set_token_header(self.get_username(), api_token)
+        else:
+            self.set_auth_header(self.get_username(), self.get_password())
+        if session:
+            self.session = WHMSession(self)
+
+    def __getattr__(self, name):
+        method = get_method(type(self), name)
+        if method is None:
+            raise AttributeError(name)
+        return method.__get__(self, type(self))
+
+    def __dir__(self):
+        return sorted(set(dir(type(self))) | set(vars(self)))
 
     def get_hostname(self):
         """
@@ -56,520 +188,776 @@ class WHMAPIClient(object):
 
     def set_auth_header(self, username, password):
         """
+        Authenticates requests with HTTP Basic auth, the header is encoded
+        once and kept by the client.
+
         :type username: str
         :type password: str
         """
-        self.auth_header = {
-            'Authorization': 'Basic ' + b64encode(
-                '{}:{}'.format(self.get_username(),
-                               self.get_password())
-            )
-        }
+        self._set_credentials(basic_auth_header(username, password))
 
-    def get_auth_header(self):
+    def set_token_header(self, username, token):
         """
-        :rtype: dict
+        Authenticates requests with a WHM API token, which spares cpsrvd
+        checking the password on every request.
+
+        :type username: str
+        :type token: str
         """
-        return self.auth_header
+        self._set_credentials(token_auth_header(username, token))
 
-    def _query(self, request_type, endpoint, data):
+    def set_session_credentials(self, security_token, headers):
         """
-        Queries specified WHM Server's JSON API.
+        Authenticates requests with a login session, called by
+        ``cpanel.clients.auth.WHMSession`` whenever it logs in.
 
-        :param: request_type: The HTTP request type, it can be ``GET``
-        or ``POST``
-        :type request_type: str
-        :param endpoint: API endpoint.
-        :type endpoint: str
-        :param data: HTTP GET params..
-        :type data: dict
+        :param security_token: The ``/cpsess...`` path prefix.
+        :type security_token: str
+        :param headers: The session cookie header.
+        :type headers: dict
+        """
+        self._set_credentials(headers, security_token)
 
-        :rtype: dict
+    def _set_credentials(self, auth_header, url_prefix=''):
         """
-        for k, v in data.items():
-            if isinstance(v, bool):
-                data[k] = 1 if v else 0
+        Precomputes the fixed headers of each request type. They are
+        swapped in along with the URL prefix at once, so concurrent
+        requests never mix old and new credentials.
 
-        url = '/json-api/{}'.format(endpoint)
-        if request_type == self.REQUEST_TYPE_GET:
-            url = '{}?{}'.format(url, urllib.urlencode(data))
+        :type auth_header: dict
+        :type url_prefix: str
+        """
+        get_headers = dict(auth_header)
+        if self.compress:
+            get_headers['Accept-Encoding'] = 'gzip'
+        post_headers = dict(get_headers)
+        post_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.auth_header = auth_header
+        self._credentials = (url_prefix, {
+            self.REQUEST_TYPE_GET: get_headers,
+            self.REQUEST_TYPE_POST: post_headers,
+        })
 
-        connection = HTTPSConnection(self.get_hostname(), self.get_port())
-        connection.request(
-            method=request_type,
-            url=url,
-            headers=self.get_auth_header()
-        )
-        response = connection.getresponse()
-        data = json.loads(response.read())
-        connection.close()
+    def get_auth_header(self):
+        """
+        :rtype: dict
+        """
+        return self.auth_header
 
-        return data
+    def get_pool(self):
+        """
+        :rtype: cpanel.clients.pool.ConnectionPool
+        """
+        return self.pool
 
-    def _query_get(self, params):
+    def get_pool_stats(self):
         """
-        :type payload: dict
+        :rtype: dict
         """
-        endpoint = inspect.getouterframes(inspect.currentframe(), 2)[1][3]
-        return self._query(self.REQUEST_TYPE_GET, endpoint, params)
+        return self.pool.get_stats()
 
-    def _query_post(self, payload):
+    def get_cache(self):
         """
-        :type payload: dict
+        :rtype: cpanel.clients.cache.ResponseCache
         """
-        endpoint = inspect.getouterframes(inspect.currentframe(), 2)[1][3]
-        return self._query(self.REQUEST_TYPE_POST, endpoint, payload)
+        return self.cache
 
-    def abort_transfer_session(self, transfer_session_id):
+    def get_single_flight(self):
+        """
+        :rtype: cpanel.clients.singleflight.SingleFlight
         """
-        Abort Transfer Session
-        Aborts an active transfer session.
+        return self.single_flight
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+abort_transfer_session
+    def add_instrument(self, instrument):
+        """
+        The instruments are swapped for a new tuple, so requests already
+        running keep notifying the ones they started with.
 
-        :param transfer_session_id: The transfer session's ID.
-        :type: str
+        :type instrument: cpanel.clients.instrumentation.Instrument
+        """
+        self.instruments += (instrument, )
 
-        :returns: Only metadata.
-        :rtype: dict
+    def close(self):
+        """
+        Closes the idle connections of the client's pool.
         """
-        return self._query_get({'transfer_session_id': transfer_session_id})
+        self.pool.close()
 
-    def accesshash(self, user, generate):
+    def batch(self, chunk_size=50):
         """
-        Access Hash
-        Regenerates or retrieves a user's access hash.
+        Collects API calls to send them through WHM's ``batch`` function.
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+accesshash
+        The calls take the usual method signatures and are sent in chunks
+        of ``chunk_size`` commands per request when the block exits::
 
-        :param user: The user's name.
-        :type user: str
+            with client.batch() as b:
+                call = b.limitbw('user', 1024)
+                b.passwd('user', 'secret')
+            call.result
 
-        :param generate: Whether to regenerate the access hash.
-        :type generate: bool
+        :param chunk_size: The number of commands per HTTP request.
+        :type chunk_size: int
 
-        :returns: The user's access hash.
-        :rtype: str
+        :rtype: cpanel.clients.batch.WHMBatch
         """
-        return self._query_get({'user': user, 'generate': generate})
+        from cpanel.clients.batch import WHMBatch
+        return WHMBatch(self, chunk_size)
 
-    def accountsummary(self, user, domain):
+    def stream(self, path):
         """
-        Account Summary
-        Retrieves a summary of a user's account.
+        Streams the records of a list-style response one at a time.
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+accountsummary
+        The response is decoded incrementally while it's read from the
+        socket, so memory stays flat whatever the size of the list::
 
-        :param user: The account's username.
-        :type user: str
-        :param domain: The main domain for an account on the server.
-        :type domain: str
+            for app in client.stream('data.app').applist():
+                ...
 
-        :returns: A dictionary of account data
-        :rtype: dict
+        :param path: Dotted path to the records array in the response.
+        :type path: str
+
+        :rtype: cpanel.clients.streaming.WHMStream
         """
-        return self._query_get({'user': user, 'domain': domain})
+        from cpanel.clients.streaming import WHMStream
+        return WHMStream(self, path)
 
-    def acctcounts(self, user):
+    def typed(self):
         """
-        Account Counts
-        Lists a reseller's total accounts, suspended accounts, and account
-        creation limit.
+        Returns compact ``__slots__`` records instead of raw dicts.
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+acctcounts
+        Records of ``accountsummary``, ``listaccts`` and ``acctcounts``
+        keep their raw values in a tuple and convert them when a field is
+        read, which takes a fraction of the memory of the decoded JSON::
 
-        :param user: A reseller's username, to query that reseller.
-        If you do not specify a value, the function lists information
-        for the authenticated account.
-        :type user: str
+            result = client.typed().accountsummary('user', 'example.com')
+            result.metadata.result
+            account = result.data[0]
+            account.suspended, account.to_dict()
 
-        :returns: Information for an account. Contains the account,
-        suspended, active, and limit parameters.
-        :rtype: dict
+        Streamed records are converted one at a time with
+        ``cpanel.clients.results.AccountSummary.from_dict``.
+
+        :rtype: cpanel.clients.results.WHMTyped
         """
-        return self._query_get({'user': user})
+        from cpanel.clients.results import WHMTyped
+        return WHMTyped(self)
 
-    def add_configclusterserver(self, name, user, key):
+    def _request(self, request_type, url, payload=None, headers=None,
+                 event=None, idempotent=False, endpoint=None):
         """
-        Add Config Cluster Server
-        Adds a server to a configuration cluster.
+        Sends a request, retrying it according to the retry policy.
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+add_configclusterserver
+        :type request_type: str
+        :type url: str
+        :param payload: The encoded request body.
+        :type payload: bytes
+        :type headers: dict
+        :type event: cpanel.clients.instrumentation.RequestEvent
+        :param idempotent: Whether the request may be retried after any
+        failure rather than only failures to connect.
+        :type idempotent: bool
+        :param endpoint: The API function called.
+        :type endpoint: str
 
-        :param name: The remote configuration cluster server's name.
-        :type name: str
-        :param user: The username for the server's root-level account.
-        :type user: str
-        :param key: A truncated version of the server's remote access key.
-        :type key:str
+        :rtype: bytes
+        """
+        policy = self.retry_policy
+        if policy is None:
+            return self._governed_send(
+                request_type, url, payload, headers, event, endpoint
+            )[1]
+
+        policy.budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                status, body = self._governed_send(
+                    request_type, url, payload, headers, event, endpoint
+                )
+            except Exception as e:
+                if not (policy.is_retryable_error(e, idempotent)
+                        and policy.allow_retry(attempt)):
+                    raise
+            else:
+                if not (policy.is_retryable_status(status, idempotent)
+                        and policy.allow_retry(attempt)):
+                    return body
+            policy.sleep(attempt)
+            attempt += 1
+
+    def _governed_send(self, request_type, url, payload=None, headers=None,
+                       event=None, endpoint=None):
+        """
+        Sends a request within the limits of the host's governor, if any.
+
+        :raises cpanel.clients.auth.SessionExpiredError: when WHM rejects
+        the client's session.
 
-        :returns: metadata
-        :rtype: dict
-        """
-        self._query_post({'name': name, 'user': user, 'key': key})
-
-    def adddns(self, domain, ip, template, trueowner):
-        """
-        Add DNS
-        Creates a DNS zone. When you call this function, the system uses the
-        domain name and IP address that you supply. WHM's standard zone
-        template determines all other zone information.
-        Generates the DNS zone's MX record, domain PTR, and A records
-        automatically.
-
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+adddns
-
-        :param domain: The new zone's domain. (A valid domain name on the
-        server.)
-        :type domain: str
-        :param ip: The domain's IP address. (A valid IP address.)
-        :type ip: str
-        :param template: The zone file template. If you do not use this
-        parameter, the function uses the standard zone file template. (
-            * standard
-            * simple
-            * standardvirtualftp
-            * The name of a custom zone template file in the
-            /var/cpanel/zonetemplates directory.)
-        :type template: str
-        :param trueowner: The new zone's owner. (A valid cPanel or WHM
-        username.)
-        :type trueowner: str
-
-        :returns: Metadata
-        :rtype: dict
-        """
-        allowed_template = (
-            'standard',
-            'simple',
-            'standardvirtualftp',
-            '/var/cpanel/zonetemplates'
-        )
-        if (template not in allowed_template[0:2]
-            or not template.startswith(allowed_template[-1])):
-            raise ValueError()
-
-        return self._query_post({
-            'domain': domain,
-            'ip': ip,
-            'template': template,
-            'trueowner': trueowner
-        })
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :type event: cpanel.clients.instrumentation.RequestEvent
+        :param endpoint: The API function called.
+        :type endpoint: str
 
-    def addips(self, ips, netmask, excludes):
+        :returns: The response status and body.
+        :rtype: tuple
         """
-        Add IPs
-        Adds an IP address or addresses to the server.
-
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+addips
+        if self.governor is None:
+            status, body = self._send(
+                request_type, url, payload, headers, event
+            )
+        else:
+            started = self.governor.acquire()
+            try:
+                status, body = self._send(
+                    request_type, url, payload, headers, event
+                )
+            except Exception:
+                self.governor.release(started, error=True, endpoint=endpoint)
+                raise
+            self.governor.release(started, error=status >= 500,
+                                  endpoint=endpoint)
+
+        if (self.session is not None
+                and self.session.is_expired(status, body)):
+            raise SessionExpiredError(status, url, body)
+        return status, body
+
+    def _connect(self, connection):
+        """
+        Connects a new connection, applying the connect timeout.
+
+        :type connection: HTTPSConnection
+        """
+        if self.connect_timeout is not None:
+            connection.timeout = self.connect_timeout
+        try:
+            connection.connect()
+        except socket.error as e:
+            raise ConnectError(*e.args)
+
+    def _open(self, request_type, url, payload=None, headers=None,
+              event=None):
+        """
+        Sends a request over a pooled connection and waits for the
+        response headers.
+
+        A reused keep-alive connection may have been closed by the server
+        in the meantime, in which case the request is sent again over a
+        fresh connection, but only when the server can't have processed
+        it, see ``_is_stale``. Anything else is up to the retry policy.
 
-        :param ips: The IPv4 address or addresses. (A valid IPv4 address or
-        address range in Class C CIDR format.)
-        :type ips: list
-        :param netmask: The IPv4 address' netmask. (A valid IPv4 netmask
-        address.)
-        :type netmask
-        :param excludes: An IPv4 address or addresses to exclude.
-        :type excludes: list
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :param event: Gets the timings, sizes and status of the request.
+        :type event: cpanel.clients.instrumentation.RequestEvent
+
+        :returns: The connection and the response.
+        :rtype: tuple
+        """
+        if headers is None:
+            headers = self.get_auth_header()
+        while True:
+            connection, reused = self.pool.get_connection()
+            sent = False
+            try:
+                if event is not None:
+                    event.reused = reused
+                    start = default_timer()
+                if getattr(connection, 'sock', None) is None:
+                    self._connect(connection)
+                    if event is not None:
+                        event.timings['connect'] = default_timer() - start
+                        start = default_timer()
+                if self.read_timeout is not None:
+                    connection.sock.settimeout(self.read_timeout)
+                body = payload
+                if payload is not None and len(payload) > self.STREAM_SIZE:
+                    # Sent in blocks instead of joined to the headers.
+                    body = io.BytesIO(payload)
+                connection.request(
+                    method=request_type,
+                    url=url,
+                    body=body,
+                    headers=headers
+                )
+                sent = True
+                response = connection.getresponse()
+            except ConnectError:
+                self.pool.discard_connection(connection)
+                raise
+            except (BadStatusLine, socket.error) as e:
+                self.pool.discard_connection(connection)
+                if reused and self._is_stale(e, sent):
+                    continue
+                raise
+            except Exception:
+                self.pool.discard_connection(connection)
+                raise
+
+            if event is not None:
+                event.timings['ttfb'] = default_timer() - start
+                event.status = response.status
+                event.request_bytes = len(url) + len(payload or b'')
+            return connection, response
+
+    @staticmethod
+    def _is_stale(error, sent):
+        """
+        Whether a request failed because its keep-alive connection was
+        closed by the server before getting it: the connection broke while
+        the request was being sent, or closed without a single byte of
+        response. Timeouts never are, the server may still be working on
+        the request.
+
+        :type error: Exception
+        :param sent: Whether the whole request was sent.
+        :type sent: bool
+
+        :rtype: bool
+        """
+        if isinstance(error, socket.timeout):
+            return False
+        if not sent:
+            return getattr(error, 'errno', None) in (
+                errno.EPIPE, errno.ECONNRESET
+            )
+        if isinstance(error, RemoteDisconnected):
+            return True
+        return (isinstance(error, BadStatusLine)
+                and error.line in ('', "''"))
 
-        :returns: Output of messages
-        :rtype: dict
+    def _release(self, connection, response, complete=True):
         """
-        return self._query_post({
-            'ips': ','.join(ips),
-            'netmask': netmask,
-            'excludes': ','.join(excludes)
-        })
+        Hands a connection back to the pool once its response is done
+        with.
 
-    def addpkg(self, name, featurelist='default', quota='unlimited', ip='n',
-               cgi=True, frontpage=True, cpmod=None, language='EN',
-               maxftp='unlimited', maxsql='unlimited', maxpop='unlimited',
-               maxlists='unlimited', maxsub='unlimited', maxpark='unlimited',
-               maxaddon='unlimited', hasshell=False, bwlimit='unlimited',
-               MAX_EMAIL_PER_HOUR='unlimited',
-               MAX_DEFER_FAIL_PERCENTAGE='unlimited', digestauth=False,
-               _PACKAGE_EXTENSIONS=list):
-        """
-        Add PKG
-        Creates a hosting plan (package).
-
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+addpkg
-
-        :param name: The new hosting plan's name. (A valid hosting plan name.)
-        :param featurelist: The hosting plan's feature list. If you do not
-        use this parameter, the function assigns the default feature list
-        to the account. (A valid feature list name on the server.)
-        :type featurelist: str
-        :param quota: The hosting plan's disk space quota. This parameter
-        defaults to 0 (unlimited). (A positive integer between one and
-        999,999 that represents the maximum disk space that the account
-        may use, in Megabytes (MB).0 - The hosting plan's disk space
-        is unlimited.)
-        :type quota: int
-        :param ip: Whether the account has a dedicated IP address. This
-        parameter defaults to n. (
-            * y - The account has a dedicated IP address.
-            * n - The account does not have a dedicated IP addr
-        )
-        :type ip: str
-        :param cgi: Whether CGI access is enabled for the account. This
-        parameter defaults to ``True``.
-        :type cgi: bool
-        :param frontpage: Whether Microsoft FrontPage Extensions are enabled
-        for the account.
-        :type frontpage: bool
-        :param cpmod: The hosting plan's cPanel theme. This parameter
-        defaults to the server's default cPanel theme. (
-            * x3
-            * paper_lantern
-        )
-        :type cpmod: str
-        :param language: The hosting plan's default locale. This value
-        defaults to the server's default locale. (A two-letter ISO-3166 code.)
-        :param maxftp: The hosting plan's maximum number of FTP accounts.
-        This parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited FTP accounts.
-        )
-        :type maxftp: str
-        :param maxsql: The hosting plan's maximum number of each available
-        type of SQL database. For example, if you set this value to 5 and
-        the system administrator allows MySQL® and PostgreSQL databases,
-        you can create up to 5 MySQL databases and up to 5 PostgreSQL
-        databases. parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited databases.
-        )
-        :type maxsql: str
-        :param maxpop: The hosting plan's maximum number of email accounts.
-        This parameter defaults to ``unlimited.`` (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited email accounts.
-        )
-        :param maxlists: The hosting plan's maximum number of mailing lists.
-        This parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited mailing lists.
-        )
-        :type maxlists: str
-        :param maxsub: The hosting plan's maximum number of subdomains.
-        This parameter defaults to unlimited. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited subdomains.
-        )
-        :type maxsub: str
-        :param maxpark: The hosting plan's maximum number of parked domains.
-        This parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited parked domains.
-        )
-        :type maxpark: str
-        :param maxaddon: The hosting plan's maximum number of addon domains.
-        This parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999.
-            * 0, unlimited, or null - The account has unlimited addon domains.
-        )
-        :type maxaddon: str
-        :param hasshell: Whether the account has shell access.
-        This parameter defaults to `False`.
-        :type hasshell: bool
-        :param bwlimit: The hosting plan's maximum bandwidth use.
-        This parameter defaults to ``unlimited``. (
-            * A positive integer between one and 999,999 that represents the
-            maximum bandwidth use, in Megabytes (MB).
-            * 0, unlimited, or null - The account has unlimited bandwidth.
-        )
-        :type bwlimit: str
-        :param MAX_EMAIL_PER_HOUR: The maximum number of emails that the
-        account can send in one hour. This parameter defaults to ``unlimited``.(
-            * A positive integer.
-            * 0 or unlimited - The account can send an unlimited number of emails.
-        )
-        :type MAX_EMAIL_PER_HOUR: str
-        :param MAX_DEFER_FAIL_PERCENTAGE: The percentage of failed or
-        deferred email messages that the account can send per hour before
-        outgoing mail is rate-limited. (
-            * A positive integer.
-            * 0 or unlimited - The account can send an unlimited number
-            of failed or deferred messages.
-        )
-        :type MAX_DEFER_FAIL_PERCENTAGE: int
-        :param digestauth: Whether to enable Digest Authentication for
-        accounts on the hosting plan. This parameter defaults to ``False``.
-        :type digestauth: bool
-        :param _PACKAGE_EXTENSIONS: The hosting plan's package extensions.
-        If you do not provide a value, the hosting plan will not
-        include package extensions. A list of one or more
-        package extensions on the server.
-        :type _PACKAGE_EXTENSIONS: list
-
-        :returns: The new hosting plan's name.
-        :rtype: dict
+        :type connection: HTTPSConnection
+        :type response: HTTPResponse
+        :param complete: Whether the response was read to the end.
+        :type complete: bool
         """
-        return self._query_post({
-            'name': name,
-            'featurelist': featurelist,
-            'quota': quota,
-            'ip': ip,
-            'cgi': cgi,
-            'frontpage': frontpage,
-            'cpmod': cpmod,
-            'language': language,
-            'maxftp': maxftp,
-            'maxsql': maxsql,
-            'maxpop': maxpop,
-            'maxlists': maxlists,
-            'maxsub': maxsub,
-            'maxpark': maxpark,
-            'maxaddon': maxaddon,
-            'hasshell': hasshell,
-            'bwlimit': bwlimit,
-            'MAX_EMAIL_PER_HOUR': MAX_EMAIL_PER_HOUR,
-            'MAX_DEFER_FAIL_PERCENTAGE': MAX_DEFER_FAIL_PERCENTAGE,
-            'digestauth': digestauth,
-            '_PACKAGE_EXTENSIONS': '_PACKAGE_EXTENSIONS'
-        })
+        if complete and not response.will_close:
+            self.pool.put_connection(connection)
+        else:
+            self.pool.discard_connection(connection)
 
-    def addzonerecord(self, domain, name, _class, ttl, _type):
+    def _send(self, request_type, url, payload=None, headers=None,
+              event=None):
         """
-        Add Zone Record
-        Adds a DNS zone record.
+        Sends a request through the client's transport, if any, or over
+        its connection pool.
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+addzonerecord
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :type event: cpanel.clients.instrumentation.RequestEvent
 
-        :param domain: The new zone record's domain. (A valid domain name on
-        the server.)
-        :type domain: str
-        :param name: The record's name.(A valid domain name or hostname.)
-        :type name: str
-        :param _class: The record's name. (
-            * IN
-            * Very rarely, another valid DNS record class.
-        )
-        :type _class: str
-        :param ttl: The record's Time To Live (TTL). (A positive integer that
-        represents the TTL, in seconds.)
-        :type ttl: str
-        :param _type: The DNS record type.
-        :type _type: str
-
-        :returns: Only metadata
-        :rtype: dict
+        :returns: The response status and body.
+        :rtype: tuple
         """
-        return self._query_post({
-            'domain': domain,
-            'name': name,
-            'class': _class,
-            'ttl': ttl,
-            'type': _type
-        })
+        if self.transport is not None:
+            return self.transport.send(
+                self, request_type, url, payload, headers, event
+            )
+        return self._send_http(request_type, url, payload, headers, event)
 
-    def addzonerecord(self, zone, name, _type, ptrdname):
+    def _send_http(self, request_type, url, payload=None, headers=None,
+                   event=None):
         """
-        Add Zone Record (Reverse DNS)
-        Uses PTR records to add reverse DNS functionality.
-        Reverse DNS lookups use PTR records to convert IP
-        addresses into domain names.
+        Sends a request over a pooled connection and reads the whole
+        response body.
 
-        https://documentation.cpanel.net/pages/viewpage.action?pageId=1512956
-
-        :param zone: The new reverse DNS zone's name. (A valid domain name
-        on the server.)
-        :type zone: str
-        :param name: The record's name. (The last octet of the record's
-        IP address.)
-        :type name: str
-        :param _type: The DNS record type. (For reverse DNS records, you must
-        select PTR.)
-        :type _type: str
-        :param ptrdname: A pointer to a canonical name (CNAME). (A valid
-        hostname.)
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :type event: cpanel.clients.instrumentation.RequestEvent
 
-        :returns: Only metadata
-        :rtype: dict
+        :returns: The response status and body.
+        :rtype: tuple
         """
-        return self._query_post({
-            'zone': zone,
-            'name': name,
-            '_type': _type,
-            'ptrdname': ptrdname
-        })
+        connection, response = self._open(
+            request_type, url, payload, headers, event
+        )
+        start = default_timer()
+        try:
+            body = response.read()
+        except Exception:
+            self._release(connection, response, complete=False)
+            raise
+        self._release(connection, response)
+
+        if event is not None:
+            event.timings['read'] = default_timer() - start
+            event.response_bytes = len(body)
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = zlib.decompress(body, self.GZIP_WBITS)
+        return response.status, body
+
+    def _request_chunks(self, request_type, url, payload=None, headers=None,
+                        chunk_size=64 * 1024, endpoint=None):
+        """
+        Sends a request over a pooled connection and yields the response
+        body in chunks as it arrives.
+
+        The connection only goes back to the pool when the body was read
+        to the end. A transport hands the whole body over at once.
+
+        The request holds a slot of the host's governor until the body
+        was read, but only the wait for the response headers counts as its
+        latency, the rest depends on the consumer.
+
+        :type request_type: str
+        :type url: str
+        :type payload: bytes
+        :type headers: dict
+        :type chunk_size: int
+        :param endpoint: The API function called.
+        :type endpoint: str
 
-    def analyze_transfer_session_remote(self, transfer_session_id):
+        :rtype: generator
         """
-        Analyze Transfer Session Remote
-        Checks the remote server's credentials, which a transfer session uses
-        to connect.
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+analyze_transfer_session_remote
+        if self.transport is not None:
+            yield self._send(request_type, url, payload, headers)[1]
+            return
 
-        :param transfer_session_id: The transfer session's ID.
-        :type transfer_session_id: str
+        governor = self.governor
+        started = governor.acquire() if governor is not None else None
+        latency = None
+        error = True
+        try:
+            connection, response = self._open(
+                request_type, url, payload, headers
+            )
+            if governor is not None:
+                latency = default_timer() - started
+            error = response.status >= 500
+            decompressor = None
+            if response.getheader('Content-Encoding') == 'gzip':
+                decompressor = zlib.decompressobj(self.GZIP_WBITS)
+
+            complete = False
+            try:
+                while True:
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        break
+                    if decompressor is not None:
+                        chunk = decompressor.decompress(chunk)
+                    yield chunk
+                if decompressor is not None:
+                    yield decompressor.flush()
+                complete = True
+            except Exception:
+                error = True
+                raise
+            finally:
+                self._release(connection, response, complete)
+        finally:
+            if governor is not None:
+                governor.release(started, error=error, endpoint=endpoint,
+                                 latency=latency)
+
+    @staticmethod
+    def _encode_params(data):
+        """
+        URL-encodes request parameters, booleans are sent as ``1`` or ``0``.
+        See ``cpanel.clients.encoding.encode_params``.
+
+        :param data: A dictionary or a sequence of ``(name, value)`` pairs.
+        :type data: dict
 
-        :returns: Only metadata
+        :rtype: str
         """
-        return self._query_get({'transfer_session_id': transfer_session_id})
+        return encode_params(data)
 
-    def applist(self):
+    def _build_url(self, request_type, endpoint, data, prefix=''):
         """
-        App List
-
-        Lists available WHM API 1 functions.
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+applist
+        :type request_type: str
+        :type endpoint: str
+        :type data: dict
+        :param prefix: The session's security token, if any.
+        :type prefix: str
 
-        :rtype: dict
+        :rtype: str
         """
-        return self._query_get({})
+        url = '{}/json-api/{}'.format(prefix, endpoint)
+        if request_type == self.REQUEST_TYPE_GET:
+            url = '{}?{}'.format(url, self._encode_params(data))
 
-    def createacct(self, username, domain):
-        """
-        Create Cpanel Account
-        Creates a hosting account and sets up its associated domain information.
+        return url
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+createacct
+    def _build_request(self, request_type, endpoint, data):
+        """
+        Builds the URL, body and headers of a request. ``GET`` parameters
+        go into the URL, ``POST`` ones into a form-encoded body, which is
+        gzipped when compression is on and it's big enough.
 
-        :type username: str
-        :type domain: str
+        :type request_type: str
+        :type endpoint: str
+        :type data: dict
 
-        :rtype: dict
+        :returns: The URL, the body or ``None`` and the headers.
+        :rtype: tuple
         """
-        return self._query_get({
-            'username': username,
-            'domain': domain
-        })
+        if self.session is not None:
+            self.session.ensure()
+        prefix, headers = self._credentials
+        url = self._build_url(request_type, endpoint, data, prefix)
+        headers = headers[request_type]
+        if request_type != self.REQUEST_TYPE_POST:
+            return url, None, headers
 
-    def passwd(self, user, password, db_pass_update=True):
-        """
-        Set Cpanel Account Password
-        Changes the password of a domain owner (cPanel) or reseller (WHM) account.
+        headers = dict(headers)
+        payload = self._encode_params(data).encode('ascii')
+        if self.compress and len(payload) >= self.COMPRESS_MIN_SIZE:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, self.GZIP_WBITS)
+            payload = compressor.compress(payload) + compressor.flush()
+            headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(payload))
+        return url, payload, headers
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+passwd
+    def _query(self, request_type, endpoint, data, decode=True):
+        """
+        Queries specified WHM Server's JSON API.
 
-        :type user: str
-        :type password: str
-        :type db_pass_update: bool
+        :param: request_type: The HTTP request type, it can be ``GET``
+        or ``POST``
+        :type request_type: str
+        :param endpoint: API endpoint.
+        :type endpoint: str
+        :param data: The request parameters.
+        :type data: dict
+        :param decode: Whether to decode the response or return the raw
+        JSON body.
+        :type decode: bool
 
         :rtype: dict
         """
-        return self._query_get({
-            'user': user,
-            'pass': password,
-            'db_pass_update': db_pass_update
-        })
+        request = self._build_request(request_type, endpoint, data)
+        if not self.instruments:
+            body = self._fetch(request_type, endpoint, data, request)
+            return json.loads(body) if decode else body
+
+        event = RequestEvent(self.get_hostname(), endpoint, request_type)
+        for instrument in self.instruments:
+            instrument.before_request(event)
+        try:
+            body = self._fetch(request_type, endpoint, data, request, event)
+            if not decode:
+                return body
+            start = default_timer()
+            response = json.loads(body)
+            event.timings['decode'] = default_timer() - start
+            return response
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.finish()
+            for instrument in self.instruments:
+                instrument.after_request(event)
+
+    def _fetch(self, request_type, endpoint, data, request, event=None):
+        """
+        Gets the raw response body, from the cache when possible.
+
+        :type request_type: str
+        :type endpoint: str
+        :type data: dict
+        :param request: The URL, body and headers of the request.
+        :type request: tuple
+        :type event: cpanel.clients.instrumentation.RequestEvent
 
-    def limitbw(self, user, bwlimit='unlimited'):
+        :rtype: bytes
         """
-        Set Cpanel Account Bandwidth Limit
-        Modifies the bandwidth usage (transfer) limit for a specific account.
+        spec = get_endpoint(endpoint)
+        idempotent = spec is not None and spec.is_idempotent(data)
+        if self.cache is None and self.single_flight is None:
+            return self._authenticated_request(
+                request_type, endpoint, data, request, event, idempotent
+            )
 
-        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+limitbw
+        if spec is None or not spec.is_cacheable(data):
+            if self.cache is None:
+                return self._authenticated_request(
+                    request_type, endpoint, data, request, event, idempotent
+                )
+            try:
+                return self._authenticated_request(
+                    request_type, endpoint, data, request, event, idempotent
+                )
+            finally:
+                # Even a failed call may have changed something.
+                self.cache.invalidate(
+                    data, spec.invalidates if spec is not None else ()
+                )
+
+        # Raw bodies are cached and shared so every caller gets its own
+        # copy once decoded.
+        key = ResponseCache.make_key(endpoint, data)
+        if self.cache is not None:
+            body = self.cache.get(key)
+            if body is not None:
+                if event is not None:
+                    event.cached = True
+                return body
+
+        def fetch():
+            generation = None
+            if self.cache is not None:
+                generation = self.cache.get_generation()
+            body = self._authenticated_request(
+                request_type, endpoint, data, request, event, idempotent
+            )
+            if self.cache is not None:
+                self.cache.set(key, body, generation)
+            return body
 
-        :param user: The account's username.
-        :type user: str
+        if self.single_flight is None:
+            return fetch()
+        body, shared = self.single_flight.do(key, fetch)
+        if shared and event is not None:
+            event.coalesced = True
+        return body
 
-        :param bwlimit: The account's new bandwidth quota. This parameter
-        defaults to unlimited.
-        :type bwlimit: str
+    def _authenticated_request(self, request_type, endpoint, data, request,
+                               event=None, idempotent=False):
+        """
+        Sends a request, renewing the session and sending it again once
+        when WHM rejected the session. A rejection of a session just
+        opened is returned as is.
 
+        :type request_type: str
+        :type endpoint: str
+        :type data: dict
+        :param request: The URL, body and headers of the request.
+        :type request: tuple
+        :type event: cpanel.clients.instrumentation.RequestEvent
+        :type idempotent: bool
+
+        :rtype: bytes
+        """
+        url, payload, headers = request
+        if self.session is None:
+            return self._request(request_type, url, payload, headers, event,
+                                 idempotent, endpoint)
+        try:
+            return self._request(request_type, url, payload, headers, event,
+                                 idempotent, endpoint)
+        except SessionExpiredError as e:
+            if not self.session.renew(e.url):
+                return e.body
+        url, payload, headers = self._build_request(
+            request_type, endpoint, data
+        )
+        return self._request(request_type, url, payload, headers, event,
+                             idempotent, endpoint)
+
+    @endpoint(REQUEST_TYPE_GET, cacheable=True)
+    def listaccts(self, search=None, searchtype=None, searchmethod=None,
+                  want=None, chunk_start=None, chunk_size=None,
+                  sort_field=None, sort_reverse=False, filters=None):
+        """
+        List Accounts
+        Lists the server's accounts, optionally a single page of them.
+
+        https://documentation.cpanel.net/display/SDK/WHM+API+1+Functions+-+listaccts
+
+        :param search: The value to search the accounts for.
+        :type search: str
+        :param searchtype: The field to search. (
+            * domain
+            * owner
+            * user
+            * ip
+            * package
+        )
+        :type searchtype: str
+        :param searchmethod: Either ``exact`` or ``regex``.
+        :type searchmethod: str
+        :param want: The account fields to return, all of them by default.
+        :type want: list
+        :param chunk_start: The 1-based index of the page's first account.
+        :type chunk_start: int
+        :param chunk_size: The number of accounts per page. Paginates only
+        when given.
+        :type chunk_size: int
+        :param sort_field: The account field to sort by.
+        :type sort_field: str
+        :param sort_reverse: Whether to sort in descending order.
+        :type sort_reverse: bool
+        :param filters: ``(field, type, value)`` tuples the accounts must
+        match, e.g. ``('owner', 'eq', 'reseller')``.
+        :type filters: list
+
+        :returns: The accounts in ``data.acct``.
         :rtype: dict
         """
-        return self._query_get({'user': user, 'bwlimit': bwlimit})
+        params = {'api.version': 1}
+        for name, value in (('search', search),
+                            ('searchtype', searchtype),
+                            ('searchmethod', searchmethod)):
+            if value is not None:
+                params[name] = value
+        if want:
+            params['want'] = ','.join(want)
+        if chunk_size:
+            params.update({
+                'api.chunk.enable': 1,
+                'api.chunk.start': chunk_start or 1,
+                'api.chunk.size': chunk_size,
+            })
+        if sort_field:
+            params.update({
+                'api.sort.enable': 1,
+                'api.sort.a.field': sort_field,
+                'api.sort.a.reverse': sort_reverse,
+            })
+        if filters:
+            params['api.filter.enable'] = 1
+            for index, (field, _type, value) in enumerate(filters):
+                key = 'api.filter.{}'.format(chr(ord('a') + index))
+                params[key + '.field'] = field
+                params[key + '.type'] = _type
+                params[key + '.arg0'] = value
+        return params
+
+    def iter_listaccts(self, page_size=1000, prefetch=True, **kwargs):
+        """
+        Iterates over the server's accounts one page at a time.
+
+        While the caller goes through a page, the next one is fetched in
+        the background, so memory stays bounded to two pages and the
+        network time overlaps with the caller's processing.
+
+        :param page_size: The number of accounts per request.
+        :type page_size: int
+        :param prefetch: Whether to fetch the next page in the background.
+        :type prefetch: bool
+        :param kwargs: Search, sort and filter arguments of ``listaccts``.
+
+        :returns: The accounts, one dict at a time.
+        :rtype: generator
+        """
+        from cpanel.clients.pagination import iter_pages
+        from cpanel.clients.streaming import PathNotFoundError
+
+        def fetch_page(start, size):
+            response = self.listaccts(
+                chunk_start=start, chunk_size=size, **kwargs
+            )
+            accounts = (response.get('data') or {}).get('acct')
+            if accounts is None:
+                raise PathNotFoundError(('data', 'acct'), response)
+            return accounts
+
+        for page in iter_pages(fetch_page, page_size, prefetch):
+            for account in page:
+                yield account
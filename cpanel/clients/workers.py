@@ -0,0 +1,202 @@
+# coding=utf-8
+"""
+The plumbing shared by the bulk runners, ``WHMFleet``,
+``ProvisioningPipeline`` and ``ShardedExecutor``: workers pass messages
+to the consumer over a queue, and the consumer keeps count of the run.
+"""
+import threading
+import time
+from timeit import default_timer
+
+from cpanel.compat import queue
+
+# Kinds of the ``(kind, value)`` messages workers put on a results queue.
+# Strings, so they survive pickling through a ``multiprocessing.Queue``.
+RESULT = 'result'
+ERROR = 'error'
+DONE = 'done'
+
+
+def iter_results(results, running, expires_at=None, check=None,
+                 check_interval=1.0):
+    """
+    Yields the results workers put on a queue until all of them are done.
+
+    Each worker puts ``(RESULT, result)`` messages, ``(ERROR, exception)``
+    for a failure ending the run and ``(DONE, worker_id)`` last.
+
+    :type results: queue.Queue
+    :param running: The ids of the workers, each removed by its ``DONE``
+    message.
+    :type running: set
+    :param expires_at: ``time.time()`` at which to stop waiting, the
+    remaining results are dropped.
+    :type expires_at: float
+    :param check: Called every ``check_interval`` seconds without a
+    message, e.g. to raise when a worker died.
+    :type check: callable
+    :type check_interval: float
+
+    :raises Exception: the exception of an ``ERROR`` message.
+
+    :rtype: generator
+    """
+    while running:
+        timeout = check_interval if check is not None else None
+        if expires_at is not None:
+            remaining = max(expires_at - time.time(), 0)
+            timeout = remaining if timeout is None else min(timeout,
+                                                            remaining)
+        try:
+            kind, value = results.get(timeout=timeout)
+        except queue.Empty:
+            if expires_at is not None and time.time() >= expires_at:
+                return
+            if check is not None:
+                check()
+            continue
+        if kind == DONE:
+            running.discard(value)
+        elif kind == ERROR:
+            raise value
+        else:
+            yield value
+
+
+def run_threads(items, func, max_workers, expires_at=None):
+    """
+    Calls ``func`` on every item on a bounded pool of daemon threads.
+
+    The threads take the items one at a time, so a generator is only
+    advanced as fast as the calls complete. Once the consumer stops, the
+    threads finish the calls in progress and take no more items.
+
+    :type items: iterable
+    :param func: Takes an item and returns its result. It catches the
+    errors to report, anything it raises ends the run.
+    :type func: callable
+    :type max_workers: int
+    :param expires_at: See ``iter_results``.
+    :type expires_at: float
+
+    :raises Exception: what iterating the items or ``func`` raised.
+
+    :returns: The results of ``func``, in order of completion.
+    :rtype: generator
+    """
+    items = iter(items)
+    items_lock = threading.Lock()
+    results = queue.Queue()
+    cancelled = threading.Event()
+    end = object()
+
+    def worker(worker_id):
+        try:
+            while not cancelled.is_set():
+                with items_lock:
+                    item = next(items, end)
+                if item is end:
+                    return
+                results.put((RESULT, func(item)))
+        except Exception as e:
+            results.put((ERROR, e))
+        finally:
+            results.put((DONE, worker_id))
+
+    running = set(range(max(max_workers, 1)))
+    for worker_id in running:
+        thread = threading.Thread(target=worker, args=(worker_id, ))
+        thread.daemon = True
+        thread.start()
+    try:
+        for result in iter_results(results, running, expires_at):
+            yield result
+    finally:
+        cancelled.set()
+
+
+class RunStats(object):
+    """
+    Counters of a bulk run, updated by the consumer while other threads
+    may read them.
+
+    Counts the items completed and failed under ``unit``, the ``ok`` and
+    ``failed`` items of each group, e.g. host, under ``group``, and the
+    failures by exception type under ``errors``.
+    """
+    unit = None
+    group = None
+
+    def __init__(self, unit, group):
+        """
+        :param unit: The key of the completed items count, e.g. ``tasks``.
+        :type unit: str
+        :param group: The key of the counts per group, e.g. ``hosts``.
+        :type group: str
+        """
+        self.unit = unit
+        self.group = group
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._stats = None
+
+    def start(self):
+        """
+        Resets the counters for a new run.
+        """
+        with self._lock:
+            self._started_at = default_timer()
+            self._stats = {self.unit: 0, 'failed': 0, self.group: {},
+                           'errors': {}}
+
+    def add(self, error=None):
+        """
+        Counts a completed item.
+
+        :param error: Why it failed, ``None`` if it didn't.
+        :type error: Exception
+        """
+        with self._lock:
+            self._stats[self.unit] += 1
+            if error is None:
+                return
+            self._stats['failed'] += 1
+            # ``RemoteError`` stands in for the worker's exception type.
+            error_type = getattr(error, 'type_name', None) or type(
+                error
+            ).__name__
+            errors = self._stats['errors']
+            errors[error_type] = errors.get(error_type, 0) + 1
+
+    def add_to_group(self, name, failed=False):
+        """
+        :param name: The group, e.g. a hostname.
+        :type name: str
+        :type failed: bool
+        """
+        with self._lock:
+            counts = self._stats[self.group].setdefault(
+                name, {'ok': 0, 'failed': 0}
+            )
+            counts['failed' if failed else 'ok'] += 1
+
+    def get(self):
+        """
+        :returns: A copy of the counters, with the ``elapsed`` seconds and
+        the items completed per second as ``rate``, or ``None`` before
+        the first run.
+        :rtype: dict
+        """
+        with self._lock:
+            if self._stats is None:
+                return None
+            stats = dict(self._stats)
+            stats[self.group] = dict(
+                (name, dict(counts))
+                for name, counts in self._stats[self.group].items()
+            )
+            stats['errors'] = dict(self._stats['errors'])
+            elapsed = default_timer() - self._started_at
+        stats['elapsed'] = elapsed
+        stats['rate'] = stats[self.unit] / elapsed if elapsed else 0.0
+        return stats
@@ -2,7 +2,33 @@ import sys
 
 if sys.version_info[0] == 2:
     import urllib
-    from httplib import HTTPSConnection
+    import Queue as queue
+    from httplib import HTTPSConnection, HTTPException, BadStatusLine
+
+    class RemoteDisconnected(BadStatusLine):
+        # httplib raises a plain BadStatusLine with an empty line instead.
+        pass
+
+    _interned = {}
+
+    def intern(value):
+        # The builtin one only takes byte strings.
+        return _interned.setdefault(value, value)
 else:
-    import urllib.request as urllib
-    from http.client import HTTPSConnection
+    import urllib.parse as urllib
+    import queue
+    from http.client import (
+        HTTPSConnection, HTTPException, BadStatusLine, RemoteDisconnected
+    )
+    from sys import intern
+
+
+def with_metaclass(meta, *bases):
+    """
+    Base class making a class of the metaclass, with either syntax.
+    """
+    class metaclass(type):
+
+        def __new__(cls, name, this_bases, namespace):
+            return meta(name, bases, namespace)
+    return type.__new__(metaclass, 'temporary_class', (), {})
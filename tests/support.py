@@ -0,0 +1,43 @@
+# coding=utf-8
+"""
+Runs the tests against the local fake WHM server of the benchmarks.
+"""
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'benchmarks'
+))
+
+from fake_whm import FakeWHMServer  # noqa: E402
+
+
+def free_port():
+    """
+    :returns: A local port nothing listens on, handed out by the OS and
+    given back.
+    :rtype: int
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class FakeWHMTestCase(unittest.TestCase):
+    """
+    Starts a ``FakeWHMServer`` taking ``server_kwargs`` for every test.
+    """
+    server_kwargs = {}
+
+    def setUp(self):
+        self.server = FakeWHMServer(**self.server_kwargs).start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self, **kwargs):
+        client = self.server.make_client(**kwargs)
+        self.addCleanup(client.close)
+        return client
@@ -0,0 +1,163 @@
+# coding=utf-8
+import ssl
+import sys
+import unittest
+
+from tests.support import FakeWHMTestCase
+from fake_whm import CERTIFICATE, FakeWHMServer
+
+if sys.version_info >= (3, 5):
+    import asyncio
+
+    from cpanel.clients.async_whm_api_client import AsyncWHMAPIClient
+
+
+def _done(result=None, error=None):
+    future = asyncio.Future()
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+    return future
+
+
+class StaleWriter(object):
+    """
+    Writer of an idle connection the server already closed.
+    """
+
+    def __init__(self, error=None):
+        self.error = error
+
+    def write(self, data):
+        pass
+
+    def drain(self):
+        return _done(error=self.error)
+
+    def close(self):
+        pass
+
+
+class StalePool(object):
+    """
+    Hands out a broken connection as reused, then the real ones.
+    """
+
+    def __init__(self, pool, reader, writer):
+        self.pool = pool
+        self.stale = (reader, writer)
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+    def get_connection(self):
+        if self.stale is None:
+            return self.pool.get_connection()
+        connection, self.stale = self.stale, None
+        self.pool._stats['in_use'] += 1
+        return _done((connection, True))
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'asyncio needs Python 3.5')
+class AsyncTestCase(FakeWHMTestCase):
+
+    def setUp(self):
+        super(AsyncTestCase, self).setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+
+    def make_client(self, server=None, **kwargs):
+        server = server or self.server
+        client = AsyncWHMAPIClient(
+            'localhost', 'root', 'secret', port=server.port,
+            ssl_context=ssl.create_default_context(cafile=CERTIFICATE),
+            **kwargs
+        )
+        self.addCleanup(self.close, client)
+        return client
+
+    def close(self, client):
+        client.pool.close()
+        # Lets the transports finish closing.
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+    def run_calls(self, *calls):
+        return self.loop.run_until_complete(asyncio.gather(*calls))
+
+
+class ResponseReaderTest(AsyncTestCase):
+
+    def check_framing(self, framing, **kwargs):
+        server = FakeWHMServer(accounts=500, framing=framing).start()
+        self.addCleanup(server.stop)
+        client = self.make_client(server, **kwargs)
+        for _ in range(2):
+            response, = self.run_calls(client.listaccts())
+            self.assertEqual(len(response['data']['acct']), 500)
+        return client.pool.get_stats()
+
+    def test_content_length(self):
+        stats = self.check_framing('length')
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+
+    def test_chunked(self):
+        stats = self.check_framing('chunked')
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+
+    def test_close_delimited(self):
+        stats = self.check_framing('close')
+        self.assertEqual((stats['created'], stats['reused']), (2, 0))
+
+    def test_gzip(self):
+        for framing in ('length', 'chunked', 'close'):
+            self.check_framing(framing, compress=True)
+
+
+class StaleConnectionTest(AsyncTestCase):
+
+    def call_over(self, reader, writer):
+        client = self.make_client()
+        client.pool = StalePool(client.pool, reader, writer)
+        return self.run_calls(client.createacct('bob', 'bob.example.com'))
+
+    def test_resent_when_closed_without_response(self):
+        reader = asyncio.StreamReader()
+        reader.feed_eof()
+        self.call_over(reader, StaleWriter())
+        self.assertEqual(self.server.requests['createacct'], 1)
+
+    def test_resent_when_broken_while_sending(self):
+        self.call_over(asyncio.StreamReader(),
+                       StaleWriter(BrokenPipeError(32, 'Broken pipe')))
+        self.assertEqual(self.server.requests['createacct'], 1)
+
+    def test_not_resent_when_reset_after_sending(self):
+        reader = asyncio.StreamReader()
+        reader.set_exception(ConnectionResetError(104, 'Reset by peer'))
+        with self.assertRaises(ConnectionResetError):
+            self.call_over(reader, StaleWriter())
+        self.assertNotIn('createacct', self.server.requests)
+
+
+class CoalesceTest(AsyncTestCase):
+    server_kwargs = {'latency': 0.05}
+
+    def test_identical_reads_share_a_request(self):
+        client = self.make_client(coalesce=True)
+        responses = self.run_calls(
+            *[client.accountsummary('bob', 'bob.example.com')
+              for _ in range(5)] +
+            [client.accountsummary('alice', 'alice.example.com')]
+        )
+        self.assertEqual(self.server.requests['accountsummary'], 2)
+        self.assertEqual(len(set(map(repr, responses[:5]))), 1)
+        self.assertEqual(client._flights, {})
+
+    def test_writes_not_coalesced(self):
+        client = self.make_client(coalesce=True)
+        self.run_calls(client.passwd('bob', 'secret'),
+                       client.passwd('bob', 'secret'))
+        self.assertEqual(self.server.requests['passwd'], 2)
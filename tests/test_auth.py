@@ -0,0 +1,75 @@
+# coding=utf-8
+import time
+import unittest
+
+from cpanel.clients.auth import LoginError
+from cpanel.clients.whm_api_client import WHMAPIClient
+from tests.support import FakeWHMTestCase
+
+
+class SessionTest(FakeWHMTestCase):
+
+    def test_logs_in_once(self):
+        client = self.make_client(session=True)
+        client.applist()
+        client.acctcounts('bob')
+        self.assertEqual(self.server.requests['login'], 1)
+        self.assertTrue(
+            client.session.get_security_token().startswith('/cpsess')
+        )
+
+    def test_expired_session_renewed(self):
+        self.server.session_ttl = 0.2
+        client = self.make_client(session=True)
+        client.session.min_age = 0.1
+        first = client.session.get_security_token()
+        client.applist()
+        time.sleep(0.3)
+        self.assertEqual(client.applist()['metadata']['result'], 1)
+        self.assertEqual(self.server.requests['login'], 2)
+        self.assertEqual(self.server.requests['applist'], 3)
+        self.assertNotEqual(client.session.get_security_token(), first)
+
+    def test_permission_denial_keeps_session(self):
+        self.server.denied = frozenset(['acctcounts'])
+        client = self.make_client(session=True)
+        response = client.acctcounts('bob')
+        self.assertEqual(response['metadata']['reason'], 'Permission denied.')
+        self.assertEqual(self.server.requests['acctcounts'], 1)
+        self.assertEqual(self.server.requests['login'], 1)
+
+    def test_new_session_rejected_not_renewed(self):
+        self.server.session_ttl = 0
+        client = self.make_client(session=True)
+        self.assertEqual(client.applist(), {'error': 'Token denied.'})
+        self.assertEqual(self.server.requests['applist'], 1)
+        self.assertEqual(self.server.requests['login'], 1)
+
+    def test_refused_login(self):
+        client = WHMAPIClient('localhost', 'root', '', port=self.server.port,
+                              pool=self.server.make_pool(), session=True)
+        with self.assertRaises(LoginError):
+            client.applist()
+
+
+class TokenTest(FakeWHMTestCase):
+
+    def test_token_header(self):
+        client = self.make_client(api_token='ABC123')
+        self.assertEqual(client.get_auth_header()['Authorization'],
+                         'whm root:ABC123')
+        self.assertEqual(client.applist()['metadata']['result'], 1)
+
+
+class BasicAuthTest(unittest.TestCase):
+
+    def test_header_kept_per_client(self):
+        first = WHMAPIClient('localhost', 'root', 'secret')
+        second = WHMAPIClient('localhost', 'root', 'secret')
+        self.assertEqual(first.get_auth_header()['Authorization'],
+                         'Basic cm9vdDpzZWNyZXQ=')
+        self.assertIsNot(first.get_auth_header(), second.get_auth_header())
+
+        first.set_auth_header('root', 'changed')
+        self.assertEqual(second.get_auth_header()['Authorization'],
+                         'Basic cm9vdDpzZWNyZXQ=')
@@ -0,0 +1,40 @@
+# coding=utf-8
+from tests.support import FakeWHMTestCase
+
+
+class BatchTest(FakeWHMTestCase):
+
+    def test_calls_split_in_chunks(self):
+        client = self.make_client()
+        with client.batch(chunk_size=2) as batch:
+            calls = [batch.limitbw('user{}'.format(index), 1024)
+                     for index in range(5)]
+            self.assertEqual(len(batch), 5)
+        self.assertEqual(self.server.requests['batch'], 3)
+        self.assertNotIn('limitbw', self.server.requests)
+        for call in calls:
+            self.assertEqual(call.result['metadata']['command'], 'limitbw')
+
+    def test_results_in_call_order(self):
+        client = self.make_client()
+        batch = client.batch(chunk_size=10)
+        batch.applist()
+        batch.acctcounts('bob')
+        results = batch.execute()
+        self.assertEqual(
+            [result['metadata']['command'] for result in results],
+            ['applist', 'acctcounts']
+        )
+        self.assertEqual(len(batch), 0)
+
+    def test_chunk_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            self.make_client().batch(chunk_size=0)
+
+    def test_failed_block_sends_nothing(self):
+        client = self.make_client()
+        with self.assertRaises(KeyError):
+            with client.batch() as batch:
+                batch.applist()
+                raise KeyError('stop')
+        self.assertNotIn('batch', self.server.requests)
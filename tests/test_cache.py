@@ -0,0 +1,81 @@
+# coding=utf-8
+import unittest
+
+from cpanel.clients.cache import ResponseCache
+from tests.support import FakeWHMTestCase
+
+
+class ClientCacheTest(FakeWHMTestCase):
+
+    def setUp(self):
+        super(ClientCacheTest, self).setUp()
+        self.client = self.make_client(cache=ResponseCache())
+
+    def test_reads_served_from_cache(self):
+        first = self.client.acctcounts('bob')
+        self.assertEqual(self.client.acctcounts('bob'), first)
+        self.assertEqual(self.server.requests['acctcounts'], 1)
+        stats = self.client.get_cache().get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_parameters_are_part_of_the_key(self):
+        self.client.acctcounts('bob')
+        self.client.acctcounts('alice')
+        self.assertEqual(self.server.requests['acctcounts'], 2)
+
+    def test_uncacheable_parameters_always_sent(self):
+        self.client.accesshash('bob', generate=True)
+        self.client.accesshash('bob', generate=True)
+        self.assertEqual(self.server.requests['accesshash'], 2)
+
+    def test_write_drops_entries_of_its_user(self):
+        self.client.acctcounts('bob')
+        self.client.acctcounts('alice')
+        self.client.limitbw('bob', 1024)
+        self.client.acctcounts('bob')
+        self.client.acctcounts('alice')
+        self.assertEqual(self.server.requests['acctcounts'], 3)
+
+    def test_createacct_drops_listings(self):
+        self.client.listaccts()
+        self.client.acctcounts()
+        self.client.createacct('bob', 'bob.example.com')
+        self.client.listaccts()
+        self.client.acctcounts()
+        self.assertEqual(self.server.requests['listaccts'], 2)
+        self.assertEqual(self.server.requests['acctcounts'], 2)
+
+    def test_batched_write_drops_entries(self):
+        self.client.acctcounts('bob')
+        with self.client.batch() as batch:
+            batch.limitbw('bob', 1024)
+        self.client.acctcounts('bob')
+        self.assertEqual(self.server.requests['acctcounts'], 2)
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set(('a', ), 1)
+        cache.set(('b', ), 2)
+        cache.get(('a', ))
+        cache.set(('c', ), 3)
+        self.assertIsNone(cache.get(('b', )))
+        self.assertEqual(cache.get(('a', )), 1)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = ResponseCache(ttl=-1)
+        cache.set(('a', ), 1)
+        self.assertIsNone(cache.get(('a', )))
+
+    def test_read_in_flight_during_invalidation_is_not_stored(self):
+        cache = ResponseCache()
+        key = ResponseCache.make_key('acctcounts', {})
+        generation = cache.get_generation()
+        cache.invalidate({'username': 'bob'}, ('acctcounts', ))
+        cache.set(key, b'stale', generation)
+        self.assertIsNone(cache.get(key))
+        cache.set(key, b'fresh', cache.get_generation())
+        self.assertEqual(cache.get(key), b'fresh')
@@ -0,0 +1,45 @@
+# coding=utf-8
+from cpanel.clients.instrumentation import HistogramCollector
+from tests.support import FakeWHMTestCase
+
+
+class PostBodyTest(FakeWHMTestCase):
+    server_kwargs = {'accounts': 500}
+
+    def test_post_parameters_sent_in_the_body(self):
+        client = self.make_client()
+        response = client.addpkg('basic', quota=1024)
+        self.assertEqual(response['metadata']['result'], 1)
+        received = self.server.received['addpkg']
+        self.assertEqual(received['query'], [])
+        form = dict(received['form'])
+        self.assertEqual((form['name'], form['quota'], form['cgi']),
+                         ('basic', '1024', '1'))
+        self.assertFalse(received['gzipped'])
+
+    def test_get_parameters_sent_in_the_url(self):
+        client = self.make_client()
+        client.accountsummary('bob', 'bob.example.com')
+        received = self.server.received['accountsummary']
+        self.assertEqual(dict(received['query'])['user'], 'bob')
+        self.assertEqual(received['form'], [])
+
+    def test_small_body_not_compressed(self):
+        client = self.make_client(compress=True)
+        client.addpkg('basic')
+        self.assertFalse(self.server.received['addpkg']['gzipped'])
+
+    def test_gzip_round_trip(self):
+        collector = HistogramCollector()
+        client = self.make_client(compress=True, instruments=[collector])
+        featurelist = 'features-' + 'x' * 2000
+        client.addpkg('basic', featurelist=featurelist)
+        received = self.server.received['addpkg']
+        self.assertTrue(received['gzipped'])
+        self.assertEqual(dict(received['form'])['featurelist'], featurelist)
+
+        accounts = client.listaccts()['data']['acct']
+        self.assertEqual(len(accounts), 500)
+        stats = collector.get_stats()[('localhost', 'listaccts')]
+        # The body read off the wire is the gzipped one.
+        self.assertLess(stats['response_bytes'], len(str(accounts)) // 4)
@@ -0,0 +1,51 @@
+# coding=utf-8
+import unittest
+
+from cpanel.clients import encoding
+from cpanel.clients.batch import WHMBatch
+from cpanel.clients.encoding import encode_pair, encode_params
+from cpanel.clients.endpoints import get_endpoint
+from cpanel.clients.whm_api_client import WHMAPIClient
+
+
+class BatchClient(WHMAPIClient):
+
+    def __init__(self):
+        super(BatchClient, self).__init__('localhost', 'root', 'secret')
+        self.sent = []
+
+    def _query(self, request_type, endpoint, data, decode=True):
+        self.sent.append(self._build_request(request_type, endpoint, data))
+        return {'data': {'payload': [{}]}}
+
+
+def _memoized_values():
+    return [value for _, _, value in encoding._pairs]
+
+
+class EncodeTest(unittest.TestCase):
+
+    def test_encoding(self):
+        self.assertEqual(encode_pair('cgi', True), 'cgi=1')
+        self.assertEqual(encode_pair('cgi', False), 'cgi=0')
+        self.assertEqual(encode_pair('quota', 1.0), 'quota=1.0')
+        self.assertEqual(encode_params([('user', 'bob'), ('q', 'a b&c')]),
+                         'user=bob&q=a+b%26c')
+
+    def test_only_booleans_and_defaults_memoized(self):
+        get_endpoint('addpkg')
+        self.assertIn(('maxftp', str, 'unlimited'), encoding._pairs)
+        encode_pair('hasshell', True)
+        self.assertIn(('hasshell', bool, True), encoding._pairs)
+        encode_pair('user', 'someone-unique')
+        self.assertNotIn('someone-unique', _memoized_values())
+
+    def test_batch_commands_not_memoized(self):
+        client = BatchClient()
+        batch = WHMBatch(client)
+        batch.passwd('bob', 'S3cretPW')
+        batch.execute()
+        _, payload, _ = client.sent[0]
+        self.assertIn(b'pass%3DS3cretPW', payload)
+        self.assertFalse([value for value in _memoized_values()
+                          if 'S3cretPW' in str(value)])
@@ -0,0 +1,184 @@
+# coding=utf-8
+import unittest
+
+from cpanel.clients.endpoints import (
+    get_endpoint, get_endpoint_names, get_proxy_method
+)
+from cpanel.clients.whm_api_client import WHMAPIClient
+
+
+class ParamsClient(WHMAPIClient):
+    """
+    Returns what a call would send instead of sending it.
+    """
+
+    def __init__(self):
+        super(ParamsClient, self).__init__('localhost', 'root', 'secret')
+
+    def _query(self, request_type, endpoint, data, decode=True):
+        return request_type, endpoint, data
+
+
+def _function(method):
+    return getattr(method, '__func__', method)
+
+
+class Proxy(object):
+    """
+    Stands in for a client like the batch, stream and typed proxies.
+    """
+
+    def __getattr__(self, name):
+        return get_proxy_method(self, WHMAPIClient, name)
+
+    def _query(self, request_type, endpoint, data):
+        return 'proxied', endpoint, data
+
+
+class GeneratedMethodTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ParamsClient()
+
+    def test_positional_and_keyword_arguments(self):
+        self.assertEqual(
+            self.client.accountsummary('bob', 'bob.example.com'),
+            ('GET', 'accountsummary',
+             {'user': 'bob', 'domain': 'bob.example.com'})
+        )
+        self.assertEqual(
+            self.client.accountsummary(domain='bob.example.com', user='bob'),
+            self.client.accountsummary('bob', 'bob.example.com')
+        )
+
+    def test_defaults_sent_and_none_skipped(self):
+        _, _, params = self.client.createacct('bob', 'bob.example.com')
+        self.assertEqual(params,
+                         {'username': 'bob', 'domain': 'bob.example.com'})
+        _, _, params = self.client.limitbw('bob')
+        self.assertEqual(params, {'user': 'bob', 'bwlimit': 'unlimited'})
+
+    def test_argument_renamed_on_the_wire(self):
+        request_type, _, params = self.client.passwd('bob', 'secret')
+        self.assertEqual(request_type, 'GET')
+        self.assertEqual(params, {'user': 'bob', 'pass': 'secret',
+                                  'db_pass_update': True})
+
+    def test_lists_comma_joined(self):
+        _, _, params = self.client.addips(['10.0.0.1', '10.0.0.2'],
+                                          '255.255.255.0')
+        self.assertEqual(params['ips'], '10.0.0.1,10.0.0.2')
+
+    def test_bad_arguments(self):
+        with self.assertRaises(TypeError):
+            self.client.accountsummary('bob')
+        with self.assertRaises(TypeError):
+            self.client.accountsummary('bob', 'bob.example.com', 'extra')
+        with self.assertRaises(TypeError):
+            self.client.accountsummary('bob', 'bob.example.com', user='x')
+        with self.assertRaises(TypeError):
+            self.client.limitbw('bob', bogus=1)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            self.client.adddns('example.com', '10.0.0.1', template='nope')
+        _, _, params = self.client.adddns('example.com', '10.0.0.1',
+                                          template='simple')
+        self.assertEqual(params['template'], 'simple')
+
+    def test_addzonerecord_reverse_dns_arguments(self):
+        request_type, _, params = self.client.addzonerecord(
+            '1.168.192.in-addr.arpa', '10', 'PTR', 'host.example.com'
+        )
+        self.assertEqual(request_type, 'POST')
+        self.assertEqual(params, {
+            'zone': '1.168.192.in-addr.arpa', 'name': '10', 'type': 'PTR',
+            'ptrdname': 'host.example.com', 'class': 'IN',
+        })
+        _, _, params = self.client.addzonerecord(
+            'example.com', 'www', 'A', address='10.0.0.1', ttl=300
+        )
+        self.assertEqual(params['address'], '10.0.0.1')
+        self.assertNotIn('ptrdname', params)
+
+    def test_docstring_documents_parameters(self):
+        doc = self.client.addpkg.__doc__
+        self.assertIn(':type cgi: bool', doc)
+        self.assertIn(':param maxftp: The maximum number of FTP accounts.',
+                      doc)
+        doc = self.client.adddns.__doc__
+        self.assertIn('``standardvirtualftp``', doc)
+        self.assertIn(':type template: str', doc)
+        doc = self.client.passwd.__doc__
+        self.assertIn(':param password: The new password. Sent as ``pass``.',
+                      doc)
+
+    def test_method_made_once_and_attached_to_the_class(self):
+        self.client.abort_transfer_session('abc')
+        method = getattr(ParamsClient, 'abort_transfer_session')
+        # Python 2 makes a new unbound method on every lookup.
+        self.assertIs(_function(ParamsClient.abort_transfer_session),
+                      _function(method))
+        self.assertEqual(method.endpoint, 'abort_transfer_session')
+        self.assertEqual(method.request_type, 'GET')
+
+    def test_unknown_method(self):
+        with self.assertRaises(AttributeError):
+            self.client.no_such_function()
+
+    def test_registry(self):
+        names = get_endpoint_names()
+        self.assertIn('listaccts', names)
+        self.assertIn('createacct', names)
+        self.assertTrue(get_endpoint('acctcounts').is_cacheable({}))
+        self.assertFalse(get_endpoint('createacct').is_idempotent({}))
+        self.assertFalse(
+            get_endpoint('accesshash').is_cacheable({'generate': True})
+        )
+
+
+class ClassLookupTest(unittest.TestCase):
+
+    def test_methods_found_on_the_class(self):
+        self.assertTrue(hasattr(WHMAPIClient, 'accountsummary'))
+        self.assertFalse(hasattr(WHMAPIClient, 'no_such_function'))
+        self.assertIn('passwd', dir(WHMAPIClient))
+        self.assertIn('passwd', dir(ParamsClient()))
+
+    def test_signature(self):
+        method = _function(WHMAPIClient.addzonerecord)
+        code = method.__code__
+        self.assertEqual(code.co_varnames[:5],
+                         ('self', 'zone', 'name', '_type', 'ptrdname'))
+        self.assertEqual(method.__defaults__[:2], (None, 'IN'))
+
+    def test_super_of_an_override(self):
+
+        class PasswordClient(ParamsClient):
+
+            def passwd(self, user, password, db_pass_update=True):
+                return super(PasswordClient, self).passwd(
+                    user, password.strip(), db_pass_update
+                )
+
+        _, _, params = PasswordClient().passwd('bob', ' secret ')
+        self.assertEqual(params['pass'], 'secret')
+
+
+class ProxyMethodTest(unittest.TestCase):
+
+    def test_methods_called_on_the_proxy(self):
+        proxy = Proxy()
+        # Again once the method is attached to the client class.
+        for _ in range(2):
+            self.assertEqual(proxy.limitbw('bob'), (
+                'proxied', 'limitbw', {'user': 'bob', 'bwlimit': 'unlimited'}
+            ))
+        self.assertEqual(proxy.listaccts(search='bob')[:2],
+                         ('proxied', 'listaccts'))
+
+    def test_only_api_methods(self):
+        with self.assertRaises(AttributeError):
+            Proxy().get_hostname
+        with self.assertRaises(AttributeError):
+            Proxy().no_such_function
@@ -0,0 +1,55 @@
+# coding=utf-8
+import socket
+import time
+
+from cpanel.clients.fleet import FleetTimeoutError, WHMFleet
+from tests.support import FakeWHMTestCase, free_port
+from fake_whm import FakeWHMServer, make_client
+
+
+class WHMFleetTest(FakeWHMTestCase):
+
+    def setUp(self):
+        super(WHMFleetTest, self).setUp()
+        self.slow = FakeWHMServer(latency=1.0).start()
+        self.addCleanup(self.slow.stop)
+
+    def make_fleet(self, *servers):
+        clients = []
+        for server in servers:
+            client = server.make_client()
+            self.addCleanup(client.close)
+            clients.append(client)
+        return WHMFleet(clients)
+
+    def test_results_in_order_of_completion(self):
+        fleet = self.make_fleet(self.slow, self.server)
+        started = time.time()
+        results = fleet.run('applist')
+        first = next(results)
+        self.assertLess(time.time() - started, 0.9)
+        results = [first] + list(results)
+        self.assertEqual([res.error for res in results], [None, None])
+        self.assertEqual(results[0].result['metadata']['command'], 'applist')
+        self.assertEqual(self.server.requests['applist'], 1)
+        self.assertEqual(self.slow.requests['applist'], 1)
+
+    def test_deadline_reports_unfinished_hosts(self):
+        fleet = self.make_fleet(self.slow, self.server, self.slow)
+        started = time.time()
+        results = list(fleet.run('applist', deadline=0.3))
+        self.assertLess(time.time() - started, 0.9)
+        self.assertEqual(len(results), 3)
+        self.assertIsNone(results[0].error)
+        for res in results[1:]:
+            self.assertIsInstance(res.error, FleetTimeoutError)
+            self.assertIsNone(res.result)
+
+    def test_failed_host_is_reported(self):
+        down = make_client(free_port())
+        self.addCleanup(down.close)
+        fleet = WHMFleet([down, self.make_client()])
+        results = dict((res.result is None, res) for res in
+                       fleet.run('applist', deadline=5))
+        self.assertIsInstance(results[True].error, socket.error)
+        self.assertIsNone(results[False].error)
@@ -0,0 +1,65 @@
+# coding=utf-8
+import random
+import threading
+import unittest
+
+from cpanel.clients.governor import HostGovernor
+from tests.support import FakeWHMTestCase
+
+
+def _jitter(endpoint):
+    return random.uniform(0.02, 0.06)
+
+
+class HostGovernorTest(unittest.TestCase):
+
+    def feed(self, governor, low, high, count, endpoint='accountsummary'):
+        generator = random.Random(count)
+        for _ in range(count):
+            started = governor.acquire()
+            governor.release(started, endpoint=endpoint,
+                             latency=generator.uniform(low, high))
+
+    def test_jitter_is_not_overload(self):
+        governor = HostGovernor(initial_limit=8)
+        self.feed(governor, 0.02, 0.06, 1000)
+        self.assertEqual(governor.get_stats()['decreases'], 0)
+        self.assertGreater(governor.get_limit(), 8)
+
+    def test_rising_latency_decreases_limit(self):
+        governor = HostGovernor(initial_limit=8)
+        self.feed(governor, 0.02, 0.06, 200)
+        limit = governor.get_limit()
+        self.feed(governor, 0.2, 0.3, 20)
+        self.assertLess(governor.get_limit(), limit)
+
+    def test_endpoints_have_their_own_baseline(self):
+        governor = HostGovernor(initial_limit=8)
+        self.feed(governor, 0.02, 0.06, 200, 'applist')
+        self.feed(governor, 0.5, 0.6, 200, 'listaccts')
+        self.assertEqual(governor.get_stats()['decreases'], 0)
+
+    def test_errors_decrease_limit(self):
+        governor = HostGovernor(initial_limit=8)
+        governor.release(governor.acquire(), error=True)
+        self.assertEqual(governor.get_limit(), 5)
+
+
+class JitteryHostTest(FakeWHMTestCase):
+    server_kwargs = {'latency': _jitter}
+
+    def test_healthy_host_keeps_concurrency(self):
+        governor = HostGovernor(initial_limit=8)
+        client = self.make_client(governor=governor)
+
+        def work():
+            for _ in range(15):
+                client.accountsummary('bob', 'bob.example.com')
+
+        threads = [threading.Thread(target=work) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(governor.get_stats()['decreases'], 0)
+        self.assertGreaterEqual(governor.get_limit(), 8)
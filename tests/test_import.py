@@ -0,0 +1,44 @@
+# coding=utf-8
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from tests.support import FakeWHMTestCase
+from bench_import import CALL, CALL_DEFERRED, DEFERRED, IMPORT, REPORT, ROOT
+from fake_whm import CERTIFICATE
+
+# Far above the import time, only catches e.g. asyncio coming back.
+MAX_IMPORT_SECONDS = 5.0
+
+
+def run(code):
+    """
+    :returns: The deferred modules imported by the code, in a fresh
+    interpreter.
+    :rtype: list
+    """
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     env=environment)
+    return json.loads(output.decode('utf-8'))
+
+
+class DeferredImportTest(unittest.TestCase):
+
+    def test_import_leaves_deferred_modules(self):
+        code = ('from timeit import default_timer\n'
+                'start = default_timer()\n' + IMPORT + '\n'
+                'assert default_timer() - start < {}\n'.format(
+                    MAX_IMPORT_SECONDS) +
+                REPORT.format(deferred=DEFERRED))
+        self.assertEqual(run(code), [])
+
+
+class DeferredCallTest(FakeWHMTestCase):
+
+    def test_call_only_loads_the_declarations(self):
+        code = (CALL.format(cafile=CERTIFICATE, port=self.server.port) +
+                REPORT.format(deferred=CALL_DEFERRED))
+        self.assertEqual(run(code), [])
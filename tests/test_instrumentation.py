@@ -0,0 +1,74 @@
+# coding=utf-8
+import socket
+import unittest
+
+from cpanel.clients import whm_api_client
+from cpanel.clients.instrumentation import Histogram, HistogramCollector
+from tests.support import FakeWHMTestCase, free_port
+from fake_whm import make_client
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        for value in (0.001, ) * 98 + (0.5, 2.0):
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50'], 0.001, delta=0.0003)
+        self.assertAlmostEqual(summary['p99'], 0.5, delta=0.13)
+        self.assertEqual(summary['max'], 2.0)
+
+
+class HistogramCollectorTest(FakeWHMTestCase):
+    server_kwargs = {'denied': ('applist', )}
+
+    def setUp(self):
+        super(HistogramCollectorTest, self).setUp()
+        self.collector = HistogramCollector()
+
+    def test_phases(self):
+        client = self.make_client(instruments=[self.collector])
+        for _ in range(3):
+            client.acctcounts()
+        stats = self.collector.get_stats()[('localhost', 'acctcounts')]
+        # Only the first call opened a connection.
+        self.assertEqual(stats['connect']['count'], 1)
+        for phase in ('ttfb', 'read', 'decode', 'total'):
+            self.assertEqual(stats[phase]['count'], 3, phase)
+        self.assertGreaterEqual(stats['total']['max'],
+                                stats['ttfb']['max'])
+        self.assertEqual(stats['statuses'], {200: 3})
+        self.assertGreater(stats['response_bytes'], 0)
+
+    def test_statuses_and_errors(self):
+        client = self.make_client(instruments=[self.collector])
+        client.applist()
+        down = make_client(free_port(), instruments=[self.collector])
+        self.addCleanup(down.close)
+        with self.assertRaises(socket.error):
+            down.applist()
+
+        stats = self.collector.get_stats()[('localhost', 'applist')]
+        self.assertEqual(stats['statuses'], {403: 1})
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['total']['count'], 2)
+
+        self.collector.reset()
+        self.assertEqual(self.collector.get_stats(), {})
+
+    def test_no_event_without_instruments(self):
+        def fail(*args):
+            raise AssertionError('RequestEvent made without instruments.')
+
+        self.addCleanup(setattr, whm_api_client, 'RequestEvent',
+                        whm_api_client.RequestEvent)
+        whm_api_client.RequestEvent = fail
+        client = self.make_client()
+        self.assertEqual(client.acctcounts()['metadata']['result'], 1)
+
+        client.add_instrument(self.collector)
+        with self.assertRaises(AssertionError):
+            client.acctcounts()
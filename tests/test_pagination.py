@@ -0,0 +1,61 @@
+# coding=utf-8
+import threading
+import time
+import unittest
+
+from cpanel.clients.pagination import iter_pages
+from tests.support import FakeWHMTestCase
+
+
+class IterPagesTest(unittest.TestCase):
+
+    def make_fetch_page(self, total):
+        self.starts = []
+        self.fetched = threading.Event()
+
+        def fetch_page(start, size):
+            self.starts.append(start)
+            self.fetched.set()
+            return list(range(start, min(start + size, total + 1)))
+        return fetch_page
+
+    def test_pages(self):
+        for prefetch in (False, True):
+            pages = list(iter_pages(self.make_fetch_page(25), 10, prefetch))
+            self.assertEqual([len(page) for page in pages], [10, 10, 5])
+            self.assertEqual(pages[2], list(range(21, 26)))
+
+    def test_prefetch_holds_one_page_in_reserve(self):
+        pages = iter_pages(self.make_fetch_page(100), 10)
+        self.assertEqual(next(pages)[0], 1)
+        # Given time, the fetcher gets the next page only.
+        time.sleep(0.3)
+        self.assertEqual(self.starts, [1, 11])
+        self.fetched.clear()
+        self.assertEqual(next(pages)[0], 11)
+        self.fetched.wait(1.0)
+        time.sleep(0.3)
+        self.assertEqual(self.starts, [1, 11, 21])
+        pages.close()
+
+    def test_errors_raised_to_the_caller(self):
+        def fetch_page(start, size):
+            if start > 1:
+                raise ValueError(start)
+            return [1] * size
+
+        pages = iter_pages(fetch_page, 10)
+        self.assertEqual(len(next(pages)), 10)
+        self.assertRaises(ValueError, next, pages)
+
+
+class IterListacctsTest(FakeWHMTestCase):
+    server_kwargs = {'accounts': 25}
+
+    def test_all_accounts_in_pages(self):
+        client = self.make_client()
+        users = [account['user']
+                 for account in client.iter_listaccts(page_size=10)]
+        self.assertEqual(len(users), 25)
+        self.assertEqual(len(set(users)), 25)
+        self.assertEqual(self.server.requests['listaccts'], 3)
@@ -0,0 +1,41 @@
+# coding=utf-8
+from tests.support import FakeWHMTestCase
+
+
+class PoolReuseTest(FakeWHMTestCase):
+
+    def test_sequential_calls_share_one_connection(self):
+        client = self.make_client()
+        for _ in range(5):
+            self.assertEqual(client.applist()['metadata']['result'], 1)
+        stats = client.get_pool_stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 4)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_maxsize_zero_keeps_no_connection(self):
+        client = self.make_client(pool=self.server.make_pool(maxsize=0))
+        client.applist()
+        client.applist()
+        stats = client.get_pool_stats()
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(stats['idle'], 0)
+
+
+class StaleReconnectTest(FakeWHMTestCase):
+    server_kwargs = {'keep_alive_max': 1}
+
+    def test_closed_keep_alive_connection_is_replaced(self):
+        client = self.make_client()
+        for _ in range(3):
+            self.assertEqual(client.applist()['metadata']['result'], 1)
+        self.assertEqual(client.get_pool_stats()['created'], 3)
+        # Each call reached the server exactly once.
+        self.assertEqual(self.server.requests['applist'], 3)
+
+    def test_mutating_call_is_resent_when_never_received(self):
+        client = self.make_client()
+        client.applist()
+        client.createacct('bob', 'bob.example.com')
+        self.assertEqual(self.server.requests['createacct'], 1)
@@ -0,0 +1,84 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+
+from cpanel.clients.provisioning import (
+    Checkpoint, ProvisioningError, ProvisioningPipeline
+)
+from tests.support import FakeWHMTestCase
+
+
+class ProvisioningPipelineTest(FakeWHMTestCase):
+
+    def setUp(self):
+        super(ProvisioningPipelineTest, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'checkpoint')
+        self.client = self.make_client()
+
+    def run_pipeline(self, *specs):
+        pipeline = ProvisioningPipeline(self.client, self.path, max_workers=2)
+        return dict((res.username, res) for res in pipeline.run(specs))
+
+    def test_resume_skips_journaled_steps(self):
+        spec = {'username': 'bob', 'domain': 'bob.example.com',
+                'password': 'secret', 'bwlimit': 1024}
+        res = self.run_pipeline(spec)['bob']
+        self.assertIsNone(res.error)
+        self.assertEqual(res.steps, ('createacct', 'passwd', 'limitbw'))
+        self.assertTrue(Checkpoint(self.path).is_done('bob', 'limitbw'))
+
+        res = self.run_pipeline(spec)['bob']
+        self.assertEqual(res.steps, ())
+        self.assertEqual(self.server.requests['createacct'], 1)
+        self.assertEqual(self.server.requests['passwd'], 1)
+
+    def test_account_created_before_journaling_counts_as_done(self):
+        # A run stopped right after WHM created the account.
+        self.client.createacct('bob', 'bob.example.com')
+
+        res = self.run_pipeline({'username': 'bob',
+                                 'domain': 'bob.example.com',
+                                 'password': 'secret'})['bob']
+        self.assertIsNone(res.error)
+        self.assertEqual(res.steps, ('createacct', 'passwd'))
+        self.assertEqual(self.server.requests['passwd'], 1)
+        self.assertTrue(Checkpoint(self.path).is_done('bob', 'createacct'))
+
+    def test_existing_account_of_another_domain_fails(self):
+        self.client.createacct('bob', 'other.example.com')
+
+        res = self.run_pipeline({'username': 'bob',
+                                 'domain': 'bob.example.com',
+                                 'password': 'secret'})['bob']
+        self.assertEqual(res.failed_step, 'createacct')
+        self.assertIsInstance(res.error, ProvisioningError)
+        self.assertNotIn('passwd', self.server.requests)
+        self.assertFalse(Checkpoint(self.path).is_done('bob', 'createacct'))
+
+    def test_plan_and_contact_email_passed_to_createacct(self):
+        res = self.run_pipeline({'username': 'bob',
+                                 'domain': 'bob.example.com',
+                                 'plan': 'basic',
+                                 'contactemail': 'bob@example.org'})['bob']
+        self.assertIsNone(res.error)
+        self.assertEqual(res.steps, ('createacct', ))
+        account = self.server.created['bob']
+        self.assertEqual((account['plan'], account['email']),
+                         ('basic', 'bob@example.org'))
+
+    def test_stats(self):
+        self.client.createacct('bob', 'other.example.com')
+        pipeline = ProvisioningPipeline(self.client, self.path, max_workers=2)
+        list(pipeline.run([
+            {'username': 'bob', 'domain': 'bob.example.com'},
+            {'username': 'alice', 'domain': 'alice.example.com',
+             'password': 'secret'},
+        ]))
+        stats = pipeline.get_stats()
+        self.assertEqual((stats['accounts'], stats['failed']), (2, 1))
+        self.assertEqual(stats['steps']['createacct'],
+                         {'ok': 1, 'failed': 1})
+        self.assertEqual(stats['errors'], {'ProvisioningError': 1})
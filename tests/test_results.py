@@ -0,0 +1,70 @@
+# coding=utf-8
+import pickle
+import unittest
+
+from cpanel.clients.results import (
+    AccountCounts, AccountSummary, Metadata, Result
+)
+from tests.support import FakeWHMTestCase
+from fake_whm import make_account
+
+
+class RecordTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        raw = dict(make_account(7), suspended=1, custom={'nested': [1]})
+        record = AccountSummary.from_dict(raw)
+        self.assertEqual(record.to_dict(), raw)
+        self.assertEqual(record.get('custom'), {'nested': [1]})
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_missing_fields(self):
+        record = AccountSummary.from_dict({'user': 'bob'})
+        self.assertEqual(record.to_dict(), {'user': 'bob'})
+        self.assertIsNone(record.domain)
+        self.assertEqual(record.get('domain', 'none'), 'none')
+        self.assertEqual(record.get('undeclared', 'none'), 'none')
+
+    def test_conversions(self):
+        record = AccountSummary.from_dict({
+            'user': 'bob', 'suspended': 0, 'is_locked': '1',
+            'unix_startdate': '1434189600', 'suspendtime': '',
+        })
+        self.assertIs(record.suspended, False)
+        self.assertIs(record.is_locked, True)
+        self.assertEqual(record.unix_startdate, 1434189600)
+        self.assertIsNone(record.suspendtime)
+        # Converted on access only, the raw values are kept.
+        self.assertEqual(record.to_dict()['is_locked'], '1')
+
+        counts = AccountCounts.from_dict({'user': 'reseller',
+                                          'limit': 'unlimited',
+                                          'account': '12'})
+        self.assertEqual((counts.account, counts.limit), (12, 'unlimited'))
+        metadata = Metadata.from_dict({'result': 0, 'version': '1'})
+        self.assertEqual((metadata.result, metadata.version), (False, 1))
+
+    def test_interned_values_shared(self):
+        first = AccountSummary.from_dict({'plan': u''.join(['ba', 'sic'])})
+        second = AccountSummary.from_dict({'plan': u''.join(['bas', 'ic'])})
+        self.assertIs(first.plan, second.plan)
+
+
+class TypedTest(FakeWHMTestCase):
+    server_kwargs = {'accounts': 20}
+
+    def test_typed_results(self):
+        client = self.make_client()
+        raw = client.listaccts()
+        result = client.typed().listaccts()
+        self.assertIsInstance(result, Result)
+        self.assertIs(result.metadata.result, True)
+        self.assertEqual(len(result.data), 20)
+        self.assertEqual(result.data[3].user, 'user000003')
+        self.assertEqual(result.to_dict(), raw)
+
+    def test_untyped_endpoint_keeps_raw_data(self):
+        client = self.make_client()
+        result = client.typed().applist()
+        self.assertIn('applist', result.data['app'])
+        self.assertEqual(result.to_dict(), client.applist())
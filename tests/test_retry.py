@@ -0,0 +1,57 @@
+# coding=utf-8
+import socket
+import time
+
+from cpanel.clients.retry import RetryPolicy
+from tests.support import FakeWHMTestCase
+
+
+def _slow_createacct(endpoint):
+    return 1.0 if endpoint == 'createacct' else 0
+
+
+class ReadTimeoutTest(FakeWHMTestCase):
+    server_kwargs = {'latency': _slow_createacct}
+
+    def assert_sent_once(self, client):
+        # Opens the keep-alive connection the call then reuses.
+        client.applist()
+        # A socket.timeout, or an SSLError on Python 2.
+        with self.assertRaises(socket.error):
+            client.createacct('bob', 'bob.example.com')
+        # Lets a resent request reach the server.
+        time.sleep(1.2)
+        self.assertEqual(self.server.requests.get('createacct'), 1)
+
+    def test_mutating_call_not_resent_on_reused_connection(self):
+        self.assert_sent_once(self.make_client(read_timeout=0.3))
+
+    def test_mutating_call_not_retried_by_policy(self):
+        self.assert_sent_once(self.make_client(
+            read_timeout=0.3, retry_policy=RetryPolicy(backoff_base=0)
+        ))
+
+
+class IdempotencyTest(FakeWHMTestCase):
+    server_kwargs = {'error_rate': 1.0}
+
+    def make_client(self, **kwargs):
+        return super(IdempotencyTest, self).make_client(
+            retry_policy=RetryPolicy(max_attempts=3, backoff_base=0),
+            **kwargs
+        )
+
+    def test_read_retried_on_unavailable(self):
+        response = self.make_client().applist()
+        self.assertEqual(response['error'], 'Injected failure.')
+        self.assertEqual(self.server.requests['applist'], 3)
+
+    def test_mutating_call_not_retried_on_unavailable(self):
+        self.make_client().createacct('bob', 'bob.example.com')
+        self.assertEqual(self.server.requests['createacct'], 1)
+
+    def test_declared_idempotent_call_retried(self):
+        self.make_client().analyze_transfer_session_remote('abc')
+        self.assertEqual(
+            self.server.requests['analyze_transfer_session_remote'], 3
+        )
@@ -0,0 +1,93 @@
+# coding=utf-8
+import os
+import threading
+
+from cpanel.clients.sharding import (
+    RemoteError, ShardedExecutor, WorkerExitedError
+)
+from tests.support import FakeWHMTestCase
+from fake_whm import make_client
+
+
+class Unpicklable(Exception):
+
+    def __init__(self, message):
+        super(Unpicklable, self).__init__(message)
+        self.lock = threading.Lock()
+
+
+# Tasks and the client factory run in the worker processes, so they are
+# module level.
+
+def fake_client(hostname, port):
+    return make_client(port)
+
+
+def count_accounts(client):
+    return len(client.listaccts()['data']['acct'])
+
+
+def fail_unpicklable(client):
+    raise Unpicklable('Holds a lock.')
+
+
+def exit_worker(client):
+    os._exit(3)
+
+
+def broken_tasks(hosts):
+    yield (hosts[0]['hostname'], 'applist', ())
+    raise ValueError('Broken task list.')
+
+
+class ShardedExecutorTest(FakeWHMTestCase):
+    server_kwargs = {'accounts': 30}
+
+    def setUp(self):
+        super(ShardedExecutorTest, self).setUp()
+        self.hosts = [{'hostname': 'web{}'.format(index),
+                       'port': self.server.port} for index in range(3)]
+        self.executor = ShardedExecutor(self.hosts, processes=2, threads=2,
+                                        client_class=fake_client)
+
+    def test_results_and_stats(self):
+        tasks = [(host['hostname'], count_accounts, ())
+                 for host in self.hosts for _ in range(4)]
+        tasks.append(('web0', 'accountsummary', ('bob', 'bob.example.com')))
+        results = list(self.executor.run(tasks))
+        self.assertEqual(len(results), 13)
+        self.assertEqual(sorted(res.result for res in results
+                                if res.method == 'count_accounts'),
+                         [30] * 12)
+        self.assertEqual(self.server.requests['listaccts'], 12)
+
+        stats = self.executor.get_stats()
+        self.assertEqual((stats['tasks'], stats['failed']), (13, 0))
+        self.assertEqual(stats['hosts']['web0'], {'ok': 5, 'failed': 0})
+        self.assertGreater(stats['rate'], 0)
+
+    def test_unknown_host(self):
+        results = list(self.executor.run([('web0', 'applist', ()),
+                                          ('nowhere', 'applist', ())]))
+        errors = dict((res.hostname, res.error) for res in results)
+        self.assertIsNone(errors['web0'])
+        self.assertIsInstance(errors['nowhere'], KeyError)
+        self.assertEqual(self.executor.get_stats()['errors'],
+                         {'KeyError': 1})
+
+    def test_unpicklable_error_sent_as_remote_error(self):
+        res, = self.executor.run([('web1', fail_unpicklable, ())])
+        self.assertIsInstance(res.error, RemoteError)
+        self.assertEqual(res.error.type_name, 'Unpicklable')
+        self.assertIn('Holds a lock.', str(res.error))
+        self.assertEqual(self.executor.get_stats()['errors'],
+                         {'Unpicklable': 1})
+
+    def test_dead_worker(self):
+        with self.assertRaises(WorkerExitedError):
+            list(self.executor.run([('web0', exit_worker, ()),
+                                    ('web1', 'applist', ())]))
+
+    def test_broken_tasks(self):
+        with self.assertRaises(ValueError):
+            list(self.executor.run(broken_tasks(self.hosts)))
@@ -0,0 +1,97 @@
+# coding=utf-8
+import threading
+import time
+import unittest
+
+from cpanel.clients.singleflight import SingleFlight
+from tests.support import FakeWHMTestCase
+
+WAITERS = 5
+
+
+def _run_threads(target, count=WAITERS):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+        self.outcomes = []
+
+    def call(self, func):
+        def target():
+            try:
+                self.outcomes.append(self.flight.do('key', func))
+            except Exception as e:
+                self.outcomes.append(e)
+
+        threads = _run_threads(target)
+        # The leader is held until every other caller is waiting for it.
+        deadline = time.time() + 5
+        while (self.flight.get_stats()['coalesced'] < WAITERS - 1
+               and time.time() < deadline):
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+    def test_one_call_shared(self):
+        def func():
+            self.calls.append(1)
+            self.release.wait()
+            return {'result': 1}
+
+        self.call(func)
+        self.assertEqual(len(self.calls), 1)
+        results = [result for result, _ in self.outcomes]
+        self.assertEqual(results, [{'result': 1}] * WAITERS)
+        self.assertEqual(sorted(shared for _, shared in self.outcomes),
+                         [False] + [True] * (WAITERS - 1))
+        self.assertEqual(self.flight.get_stats(),
+                         {'calls': 1, 'coalesced': WAITERS - 1,
+                          'in_flight': 0})
+
+    def test_error_reaches_every_waiter(self):
+        error = ValueError('Broken.')
+
+        def func():
+            self.calls.append(1)
+            self.release.wait()
+            raise error
+
+        self.call(func)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.outcomes, [error] * WAITERS)
+        # The next call runs again.
+        self.assertEqual(self.flight.do('key', lambda: 2), (2, False))
+
+
+class CoalescedClientTest(FakeWHMTestCase):
+    server_kwargs = {'latency': 0.2}
+
+    def test_concurrent_reads_send_one_request(self):
+        client = self.make_client(coalesce=True)
+        responses = []
+
+        def read():
+            responses.append(client.accountsummary('bob', 'bob.example.com'))
+
+        for thread in _run_threads(read):
+            thread.join()
+        self.assertEqual(self.server.requests['accountsummary'], 1)
+        self.assertEqual(len(responses), WAITERS)
+        # Every caller decodes its own copy.
+        self.assertEqual(len(set(map(id, responses))), WAITERS)
+
+    def test_writes_not_coalesced(self):
+        client = self.make_client(coalesce=True)
+        for thread in _run_threads(lambda: client.passwd('bob', 'secret'),
+                                   count=2):
+            thread.join()
+        self.assertEqual(self.server.requests['passwd'], 2)
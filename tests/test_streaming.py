@@ -0,0 +1,109 @@
+# coding=utf-8
+import json
+import unittest
+
+from cpanel.clients.streaming import PathNotFoundError, iter_json_array
+from tests.support import FakeWHMTestCase
+
+PATH = ('data', 'acct')
+RECORDS = [
+    {'user': u'b\xe9b 東京', 'quote': 'say "hi" \\ bye'},
+    {'brackets': '[{]}', 'comma': 'a,b:c'},
+    1.5, -2e10, 123456789, 0, True, None, [], {},
+]
+
+
+def _split(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class IterJsonArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.body = json.dumps({'data': {'acct': RECORDS}}, ensure_ascii=False
+                               ).encode('utf-8')
+
+    def test_split_at_every_boundary(self):
+        for index in range(1, len(self.body)):
+            chunks = [self.body[:index], self.body[index:]]
+            self.assertEqual(list(iter_json_array(chunks, PATH)), RECORDS,
+                             self.body[:index])
+
+    def test_one_byte_chunks(self):
+        self.assertEqual(list(iter_json_array(_split(self.body, 1), PATH)),
+                         RECORDS)
+
+    def test_keys_around_the_array(self):
+        body = (b'{"data": {"other": [1, {"acct": []}], "acct": [1, 2], '
+                b'"after": 3}, "metadata": {"result": 1}}')
+        self.assertEqual(list(iter_json_array(_split(body, 7), PATH)),
+                         [1, 2])
+
+    def test_metadata_after_data(self):
+        body = b'{"data": {"acct": [{"user": "bob"}]}, "metadata": {}}'
+        self.assertEqual(list(iter_json_array([body], PATH)),
+                         [{'user': 'bob'}])
+
+    def test_empty_array(self):
+        body = b'{"metadata": {"result": 1}, "data": {"acct": [ ]}}'
+        self.assertEqual(list(iter_json_array(_split(body, 3), PATH)), [])
+
+    def test_failed_call(self):
+        body = (b'{"metadata": {"result": 0, "reason": "Access denied."}, '
+                b'"data": null}')
+        with self.assertRaises(PathNotFoundError) as context:
+            list(iter_json_array(_split(body, 5), PATH))
+        self.assertEqual(context.exception.document['metadata']['reason'],
+                         'Access denied.')
+
+        body = b'{"metadata": {"result": 0}}'
+        with self.assertRaises(PathNotFoundError):
+            list(iter_json_array([body], PATH))
+
+    def test_body_cut_short(self):
+        body = self.body[:self.body.index(b'1.5') + 2]
+        records = iter_json_array(_split(body, 4), PATH)
+        self.assertEqual(next(records), RECORDS[0])
+        self.assertEqual(next(records), RECORDS[1])
+        with self.assertRaises(ValueError):
+            list(records)
+
+    def test_not_json(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'<html>'], PATH))
+
+
+class StreamTest(FakeWHMTestCase):
+    server_kwargs = {'accounts': 200}
+
+    def test_records_streamed(self):
+        client = self.make_client()
+        users = [account['user']
+                 for account in client.stream('data.acct').listaccts()]
+        self.assertEqual(len(users), 200)
+        self.assertEqual(users[-1], 'user000199')
+
+    def test_connection_returned_once_read(self):
+        client = self.make_client()
+        accounts = client.stream(PATH).listaccts()
+        next(accounts)
+        stats = client.get_pool().get_stats()
+        self.assertEqual((stats['in_use'], stats['idle']), (1, 0))
+        list(accounts)
+        stats = client.get_pool().get_stats()
+        self.assertEqual((stats['in_use'], stats['idle']), (0, 1))
+
+    def test_abandoned_stream_discards_connection(self):
+        client = self.make_client()
+        accounts = client.stream(PATH).listaccts()
+        next(accounts)
+        accounts.close()
+        stats = client.get_pool().get_stats()
+        self.assertEqual((stats['in_use'], stats['idle'], stats['discarded']),
+                         (0, 0, 1))
+
+    def test_failed_call_reads_the_body(self):
+        client = self.make_client()
+        with self.assertRaises(PathNotFoundError):
+            list(client.stream('data.nothing').applist())
+        self.assertEqual(client.get_pool().get_stats()['idle'], 1)
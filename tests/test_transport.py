@@ -0,0 +1,86 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+
+from cpanel.clients.transport import (
+    CassetteMissError, RecordingTransport, ReplayTransport
+)
+from tests.support import FakeWHMTestCase, free_port
+from fake_whm import make_client
+
+
+class CassetteTest(FakeWHMTestCase):
+
+    def setUp(self):
+        super(CassetteTest, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'whm.cassette')
+
+    def record(self, *calls, **kwargs):
+        recorder = RecordingTransport(self.path)
+        client = self.make_client(transport=recorder, **kwargs)
+        try:
+            return [call(client) for call in calls]
+        finally:
+            recorder.close()
+
+    def make_replay_client(self, **kwargs):
+        replay = ReplayTransport(self.path)
+        self.addCleanup(replay.close)
+        # Nothing listens there, every response comes from the cassette.
+        client = make_client(free_port(), transport=replay, **kwargs)
+        self.addCleanup(client.close)
+        return client, replay
+
+    def test_record_then_replay(self):
+        recorded = self.record(
+            lambda client: client.listaccts(),
+            lambda client: client.createacct('bob', 'bob.example.com'),
+            lambda client: client.createacct('bob', 'bob.example.com'),
+        )
+        client, replay = self.make_replay_client()
+        self.assertEqual(len(replay), 3)
+        self.assertEqual(client.listaccts(), recorded[0])
+        # Responses to the same request come in recorded order, then
+        # start over.
+        results = [client.createacct('bob', 'bob.example.com')
+                   ['metadata']['result'] for _ in range(3)]
+        self.assertEqual(results, [1, 0, 1])
+        self.assertEqual(self.server.requests['listaccts'], 1)
+
+    def test_gzipped_body_matches_plain_one(self):
+        featurelist = 'features-' + 'x' * 2000
+        recorded = self.record(
+            lambda client: client.addpkg('basic', featurelist=featurelist),
+            compress=True,
+        )
+        client, _ = self.make_replay_client()
+        self.assertEqual(client.addpkg('basic', featurelist=featurelist),
+                         recorded[0])
+
+    def test_truncated_cassette(self):
+        self.record(lambda client: client.applist(),
+                    lambda client: client.acctcounts())
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+
+        client, replay = self.make_replay_client()
+        self.assertEqual(len(replay), 1)
+        self.assertEqual(client.applist()['metadata']['result'], 1)
+        with self.assertRaises(CassetteMissError):
+            client.acctcounts()
+
+    def test_miss(self):
+        self.record(lambda client: client.accountsummary('bob', 'bob.com'))
+        client, _ = self.make_replay_client()
+        with self.assertRaises(CassetteMissError) as context:
+            client.accountsummary('alice', 'alice.com')
+        self.assertIn('accountsummary', str(context.exception))
+
+    def test_not_a_cassette(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{"data": null}')
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path)
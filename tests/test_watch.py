@@ -0,0 +1,124 @@
+# coding=utf-8
+import json
+import socket
+import time
+import unittest
+
+from cpanel.clients.watch import ChangeWatcher, flatten
+from tests.support import FakeWHMTestCase
+
+
+def _body(account, result=1):
+    return json.dumps({
+        'metadata': {'result': result, 'reason': 'OK'},
+        'data': {'acct': [account]} if result else None,
+    }).encode('utf-8')
+
+
+class ScriptedClient(object):
+    """
+    Answers the polls with the given bodies, raising the exceptions.
+    """
+
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+
+    def _query(self, request_type, endpoint, data, decode=True):
+        body = self.bodies.pop(0)
+        if isinstance(body, Exception):
+            raise body
+        return body
+
+
+class ChangeWatcherTest(unittest.TestCase):
+    PARAMS = {'user': 'bob'}
+
+    def poll(self, *bodies, **kwargs):
+        watcher = ChangeWatcher(ScriptedClient(*bodies), **kwargs)
+        watcher.watch('accountsummary', self.PARAMS)
+        events = []
+        for _ in bodies:
+            try:
+                events.append(watcher.poll('accountsummary', self.PARAMS))
+            except Exception as e:
+                events.append(e)
+        return watcher, events
+
+    def test_flatten(self):
+        self.assertEqual(
+            flatten({'acct': [{'user': 'bob', 'ips': []}], 'n': None}),
+            {'acct.0.user': 'bob', 'acct.0.ips': [], 'n': None}
+        )
+
+    def test_diffs(self):
+        watcher, events = self.poll(
+            _body({'user': 'bob', 'suspended': 0}),
+            _body({'user': 'bob', 'suspended': 0}),
+            _body({'user': 'bob', 'suspended': 1}),
+            _body({'user': 'bob', 'email': 'bob@example.com'}),
+        )
+        self.assertEqual(events[:2], [None, None])
+        self.assertEqual(events[2].modified, {'acct.0.suspended': 1})
+        self.assertEqual((events[2].added, events[2].removed), ({}, ()))
+        self.assertEqual(events[3].added, {'acct.0.email': 'bob@example.com'})
+        self.assertEqual(events[3].removed, ('acct.0.suspended', ))
+        self.assertEqual(events[3].params, self.PARAMS)
+        stats = watcher.get_stats()
+        self.assertEqual((stats['polls'], stats['changed'],
+                          stats['unchanged']), (4, 2, 2))
+
+    def test_values_of_other_types_differ(self):
+        _, events = self.poll(_body({'suspended': 1}),
+                              _body({'suspended': True}))
+        self.assertEqual(events[1].modified, {'acct.0.suspended': True})
+
+    def test_failed_poll_keeps_previous_state(self):
+        watcher, events = self.poll(
+            _body({'user': 'bob', 'suspended': 0}),
+            socket.error('Connection refused.'),
+            _body(None, result=0),
+            _body({'user': 'bob', 'suspended': 1}),
+        )
+        self.assertIsInstance(events[1], socket.error)
+        self.assertIsInstance(events[2], ValueError)
+        self.assertEqual(events[3].modified, {'acct.0.suspended': 1})
+        self.assertEqual(watcher.get_stats()['errors'], 2)
+
+    def test_emit_initial(self):
+        _, events = self.poll(_body({'user': 'bob'}), emit_initial=True)
+        self.assertEqual(events[0].added, {'acct.0.user': 'bob'})
+
+    def test_subscriber_errors_counted(self):
+        watcher = ChangeWatcher(ScriptedClient(_body({'user': 'bob'})),
+                                emit_initial=True)
+        received = []
+        watcher.subscribe(lambda event: 1 / 0)
+        watcher.subscribe(received.append)
+        watcher.watch('accountsummary', self.PARAMS)
+        watcher.poll('accountsummary', self.PARAMS)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(watcher.get_stats()['subscriber_errors'], 1)
+
+    def test_write_endpoint_refused(self):
+        watcher = ChangeWatcher(ScriptedClient())
+        with self.assertRaises(ValueError):
+            watcher.watch('createacct', {'username': 'bob'})
+
+
+class PollingTest(FakeWHMTestCase):
+
+    def test_change_noticed_by_the_polling_threads(self):
+        client = self.make_client()
+        events = []
+        with ChangeWatcher(client, interval=0.05) as watcher:
+            watcher.subscribe(events.append)
+            watcher.watch('accountsummary', {'user': 'bob'})
+            while not watcher.get_stats()['polls']:
+                time.sleep(0.01)
+            client.createacct('bob', 'bob.example.com')
+            deadline = time.time() + 5
+            while not events and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(events[0].modified['acct.0.domain'],
+                         'bob.example.com')
+        self.assertEqual(watcher.get_stats()['watched'], 1)